@@ -0,0 +1,700 @@
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import logging
+import sqlite3
+import multiprocessing
+import tempfile
+
+import pandas as pd
+
+from data_processor import NewsDataProcessor
+from data_integrator import NewsDataIntegrator
+from search_index import like_search
+from ingest_schema import IngestSchema
+from time_parser import PublishTimeParser
+from text_cleaner import TextCleaner, HTML_BACKENDS, create_html_stripper, lxml_html
+from cleaning_reference import reference_clean_text, fuzz_texts
+
+# 基准测试时只输出警告，避免逐批日志影响计时
+logging.getLogger("NewsDataProcessor").setLevel(logging.WARNING)
+logging.getLogger("NewsDataIntegrator").setLevel(logging.WARNING)
+logging.getLogger("MonthlyPartitions").setLevel(logging.WARNING)
+
+logger = logging.getLogger("Benchmark")
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+ARCHIVE_GLOB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "archive", "*.json")
+
+
+def load_sample_records(rows):
+    """
+    以 data/archive 中归档的采集器原始数据为样本，生成指定行数的记录
+
+    每条复制出来的记录在标题和内容末尾加上序号，避免被去重步骤删除。
+    """
+    samples = []
+    for file_path in sorted(glob.glob(ARCHIVE_GLOB)):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        samples.extend(data if isinstance(data, list) else [data])
+    if not samples:
+        raise RuntimeError(f"没有找到样本数据: {ARCHIVE_GLOB}")
+
+    records = []
+    for i in range(rows):
+        record = dict(samples[i % len(samples)])
+        record['title'] = f"{record.get('title', '')} {i}"
+        record['content'] = f"{record.get('content', '')} {i}"
+        records.append(record)
+    return records
+
+
+def write_sample_files(directory, rows, files):
+    """将样本记录平均写入多个JSON文件，返回文件路径列表"""
+    records = load_sample_records(rows)
+    per_file = (len(records) + files - 1) // files
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, f"sample_{i:03d}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(records[i * per_file:(i + 1) * per_file], f, ensure_ascii=False)
+        paths.append(path)
+    return paths
+
+
+def read_outputs(output_dir):
+    """读取处理后文件的内容（去掉处理时间列），用于比较输出是否一致"""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(output_dir, "*.csv"))):
+        frames.append(pd.read_csv(path, encoding='utf-8').drop(columns=['processed_at']))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def bench_clean(args):
+    """比较 TextCleaner 与原始实现的清理速度，并检查两者输出完全一致"""
+    texts = []
+    for record in load_sample_records(args.rows):
+        texts.append(record.get('title'))
+        texts.append(record.get('content'))
+    # 原始实现使用BeautifulSoup去标签，逐字节比较时使用相同的后端
+    cleaner = TextCleaner(html_backend='bs4')
+
+    start = time.perf_counter()
+    expected = [reference_clean_text(text) for text in texts]
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [cleaner.clean(text) for text in texts]
+    engine_time = time.perf_counter() - start
+
+    print(f"{'实现':>12} {'耗时(秒)':>10} {'文本/秒':>10}")
+    print(f"{'re.sub':>12} {reference_time:>10.2f} {len(texts) / reference_time:>10.0f}")
+    print(f"{'TextCleaner':>12} {engine_time:>10.2f} {len(texts) / engine_time:>10.0f}")
+    print(f"加速比: {reference_time / engine_time:.2f}")
+
+    mismatches = [text for text, a, b in zip(texts, expected, actual) if a != b]
+    fuzz = fuzz_texts(args.fuzz)
+    mismatches.extend(text for text in fuzz if reference_clean_text(text) != cleaner.clean(text))
+    print(f"一致性检查: {len(texts)} 条样本文本, {len(fuzz)} 条随机文本, {len(mismatches)} 条不一致")
+    for text in mismatches[:5]:
+        print(f"  不一致: {text!r}")
+    return 1 if mismatches else 0
+
+
+def reference_clean_news_data(processor, df):
+    """原始的 clean_news_data 文本清理和过滤步骤：逐列 apply，再分别做去空和长度过滤"""
+    df = df.drop_duplicates()
+    df = df.dropna(subset=['title', 'content'])
+    if 'title' in df.columns:
+        df['title'] = df['title'].apply(lambda x: processor.clean_text(x))
+        df = df[df['title'].str.strip() != '']
+    if 'content' in df.columns:
+        df['content'] = df['content'].apply(lambda x: processor.clean_text(x))
+        df = df[df['content'].str.strip() != '']
+    df['processed_at'] = None
+    if 'content' in df.columns:
+        df = df[df['content'].str.len() > 20]
+    if 'title' in df.columns:
+        df = df[df['title'].str.len() > 5]
+    return df
+
+
+def bench_clean_frame(args):
+    """比较 clean_news_data 与原始逐列 apply 实现在大DataFrame上的吞吐量，并检查输出一致"""
+    df = pd.DataFrame(load_sample_records(args.rows)).drop(columns=['publish_time'], errors='ignore')
+    work_dir = tempfile.mkdtemp(prefix="news_bench_")
+    try:
+        processor = NewsDataProcessor(os.path.join(work_dir, "raw"), os.path.join(work_dir, "out"))
+
+        start = time.perf_counter()
+        expected = reference_clean_news_data(processor, df.copy())
+        reference_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = processor.clean_news_data(df.copy())
+        vectorized_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{'实现':>16} {'耗时(秒)':>10} {'行/秒':>10}")
+    print(f"{'逐列apply':>16} {reference_time:>10.2f} {args.rows / reference_time:>10.0f}")
+    print(f"{'clean_news_data':>16} {vectorized_time:>10.2f} {args.rows / vectorized_time:>10.0f}")
+    print(f"加速比: {reference_time / vectorized_time:.2f}")
+
+    columns = [column for column in expected.columns if column != 'processed_at']
+    identical = expected[columns].equals(actual[columns])
+    print(f"输出一致: {identical}（保留 {len(actual)} / {args.rows} 行）")
+    return 0 if identical else 1
+
+
+def bench_load(args):
+    """比较按读取模式加载与pandas推断类型加载的耗时和内存占用"""
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        schema = IngestSchema.from_config(json.load(f).get("data_cleaning", {}))
+
+    records = load_sample_records(args.rows)
+    # 模拟采集器导出的额外字段
+    for i, record in enumerate(records):
+        for j in range(args.extra_columns):
+            record[f'extra_{j}'] = f'字段{j}-{i}'
+
+    work_dir = tempfile.mkdtemp(prefix="news_bench_")
+    try:
+        paths = {
+            'csv': os.path.join(work_dir, "sample.csv"),
+            'json': os.path.join(work_dir, "sample.json")
+        }
+        pd.DataFrame(records).to_csv(paths['csv'], index=False, encoding='utf-8')
+        with open(paths['json'], 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False)
+
+        print(f"{'格式':>6} {'读取方式':>8} {'耗时(秒)':>10} {'内存(MB)':>10} {'行数':>8} {'列数':>6}")
+        for fmt, path in paths.items():
+            for label, ingest_schema in (('推断类型', None), ('读取模式', schema)):
+                processor = NewsDataProcessor(
+                    os.path.join(work_dir, "raw"), os.path.join(work_dir, "out"),
+                    batch_size=args.batch_size, ingest_schema=ingest_schema
+                )
+                start = time.perf_counter()
+                df = processor.load_file(path)
+                elapsed = time.perf_counter() - start
+                memory = df.memory_usage(deep=True).sum() / 1024 / 1024
+                print(f"{fmt:>6} {label:>8} {elapsed:>10.2f} {memory:>10.1f} {len(df):>8} {len(df.columns):>6}")
+        return 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def mixed_publish_times(rows):
+    """以样本记录为基础，让部分来源改用ISO字符串、毫秒时间戳和不补零的中文日期，模拟多种格式混用"""
+    df = pd.DataFrame(load_sample_records(rows))[['publish_time', 'source']]
+    parsed, _ = PublishTimeParser().parse(df['publish_time'])
+    codes = pd.factorize(df['source'])[0] % 4
+    values = df['publish_time'].astype(object).copy()
+    values[codes == 1] = parsed[codes == 1].dt.strftime('%Y-%m-%dT%H:%M:%S+08:00')
+    values[codes == 2] = ((parsed[codes == 2] - pd.Timedelta(hours=8)).astype('int64') // 10**6).astype(object)
+    values[codes == 3] = parsed[codes == 3].apply(lambda t: f"{t.year}年{t.month}月{t.day}日 {t.hour:02d}:{t.minute:02d}")
+    df['publish_time'] = values
+    df['source'] = df['source'].astype('category')
+    return df
+
+
+def bench_publish_time(args):
+    """比较 PublishTimeParser 与 pd.to_datetime 在多种格式混用时的耗时和解析率"""
+    df = mixed_publish_times(args.rows)
+    present = int(df['publish_time'].notna().sum())
+
+    print(f"{'方法':>22} {'耗时(秒)':>10} {'无法解析':>10}")
+    start = time.perf_counter()
+    try:
+        result = pd.to_datetime(df['publish_time'])
+        unparsed = f"{(int(result.isna().sum()) - (len(df) - present)) / present:.1%}"
+    except Exception:
+        unparsed = "整列失败"
+    print(f"{'pd.to_datetime':>22} {time.perf_counter() - start:>10.2f} {unparsed:>10}")
+
+    # 逐个元素推断格式；带时区和不带时区的值混用时必须统一转换为UTC
+    start = time.perf_counter()
+    result = pd.to_datetime(df['publish_time'], format='mixed', errors='coerce', utc=True)
+    unparsed = (int(result.isna().sum()) - (len(df) - present)) / present
+    print(f"{'to_datetime(mixed)':>22} {time.perf_counter() - start:>10.2f} {unparsed:>10.1%}")
+
+    parser = PublishTimeParser()
+    for label in ('PublishTimeParser(首批)', 'PublishTimeParser(缓存)'):
+        start = time.perf_counter()
+        _, failed = parser.parse(df['publish_time'], df['source'])
+        print(f"{label:>22} {time.perf_counter() - start:>10.2f} {failed / present:>10.1%}")
+    return 0
+
+
+def to_html(record, index):
+    """把样本记录包装成采集器抓取的网页正文片段，用于HTML去标签后端的基准测试"""
+    paragraphs = ''.join(
+        f'<p class="para">{sentence}。</p>' for sentence in str(record.get('content', '')).split('。') if sentence
+    )
+    return (
+        f'<div id="article-{index}" class="article"><h1>{record.get("title", "")}</h1>'
+        f'<script type="text/javascript">var pv = {index};</script>'
+        f'<img src="/img/{index}.jpg"/><br>{paragraphs}'
+        f'<!-- end of article --><a href="/news/{index}">&gt;&gt; 查看原文&nbsp;</a></div>'
+    )
+
+
+def bench_html_backends(args):
+    """比较各HTML去标签后端的吞吐量，以及整条清理流程的吞吐量"""
+    documents = [to_html(record, i) for i, record in enumerate(load_sample_records(args.rows))]
+    backends = [name for name in HTML_BACKENDS if name != 'auto' and (name != 'lxml' or lxml_html is not None)]
+    if lxml_html is None:
+        print("lxml 未安装，跳过 lxml 后端")
+
+    expected = [TextCleaner(html_backend='bs4').clean(doc) for doc in documents]
+    print(f"{'后端':>6} {'去标签 行/秒':>14} {'完整清理 行/秒':>16} {'与bs4不同':>10}")
+    for name in backends:
+        stripper = create_html_stripper(name)
+        start = time.perf_counter()
+        for doc in documents:
+            stripper.strip(doc)
+        strip_time = time.perf_counter() - start
+
+        cleaner = TextCleaner(html_backend=name)
+        start = time.perf_counter()
+        actual = [cleaner.clean(doc) for doc in documents]
+        clean_time = time.perf_counter() - start
+
+        differing = sum(1 for a, b in zip(expected, actual) if a != b)
+        print(f"{name:>6} {len(documents) / strip_time:>14.0f} {len(documents) / clean_time:>16.0f} {differing:>10}")
+    return 0
+
+
+def bench_clean_scaling(args):
+    """比较不同进程数下 NewsDataProcessor 的清理吞吐量，并检查输出一致"""
+    work_dir = tempfile.mkdtemp(prefix="news_bench_")
+    try:
+        raw_dir = os.path.join(work_dir, "raw")
+        os.makedirs(raw_dir)
+        files = write_sample_files(raw_dir, args.rows, args.files)
+
+        baseline = None
+        baseline_time = None
+        print(f"{'进程数':>6} {'耗时(秒)':>10} {'行/秒':>10} {'加速比':>8} {'输出一致':>8}")
+        for workers in range(1, args.max_workers + 1):
+            output_dir = os.path.join(work_dir, f"out_{workers}")
+            processor = NewsDataProcessor(raw_dir, output_dir, batch_size=args.batch_size, workers=workers)
+            start = time.perf_counter()
+            processor.process_files(files, archive=False)
+            elapsed = time.perf_counter() - start
+
+            output = read_outputs(output_dir)
+            if baseline is None:
+                baseline, baseline_time = output, elapsed
+            identical = output.equals(baseline)
+            print(f"{workers:>6} {elapsed:>10.2f} {args.rows / elapsed:>10.0f} {baseline_time / elapsed:>8.2f} {str(identical):>8}")
+            if not identical:
+                return 1
+        return 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def processed_frame(rows):
+    """以样本记录为基础，生成与处理后文件相同列的DataFrame"""
+    df = pd.DataFrame(load_sample_records(rows)).reindex(columns=['title', 'content', 'publish_time', 'source', 'url'])
+    df['publish_time'] = pd.Timestamp('2025-03-21 08:30:00') + pd.to_timedelta(range(rows), unit='s')
+    df['processed_at'] = pd.Timestamp.now()
+    return df
+
+
+def reference_import(db_file, table_name, file_path, chunk_rows):
+    """原始导入实现：默认设置的新连接，每块调用 DataFrame.to_sql"""
+    imported_at = pd.Timestamp.now()
+    conn = sqlite3.connect(db_file)
+    try:
+        with pd.read_csv(file_path, encoding='utf-8', chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                chunk.assign(imported_at=imported_at).to_sql(table_name, conn, if_exists='append', index=False)
+    finally:
+        conn.close()
+
+
+def reference_import_batch(db_file, table_name, df):
+    """原始的逐批导入实现（内存模式的 sink）：每批打开新连接并调用 DataFrame.to_sql"""
+    conn = sqlite3.connect(db_file)
+    try:
+        df.assign(imported_at=pd.Timestamp.now()).to_sql(table_name, conn, if_exists='append', index=False)
+    finally:
+        conn.close()
+
+
+def bench_import(args):
+    """
+    比较集成器与原始 to_sql 实现的导入吞吐量，并检查导入的数据一致：
+    - 文件：import_to_database 导入一个处理后文件
+    - 逐批：import_dataframe 逐批导入清理后的DataFrame（流水线内存模式）
+    """
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    work_dir = tempfile.mkdtemp(prefix="news_bench_")
+    try:
+        df = processed_frame(args.rows)
+        file_path = os.path.join(work_dir, "sample_processed.csv")
+        df.to_csv(file_path, index=False, encoding='utf-8')
+        batches = [df.iloc[i:i + args.batch_size] for i in range(0, len(df), args.batch_size)]
+
+        identical = True
+        print(f"{'场景':>6} {'实现':>12} {'耗时(秒)':>10} {'行/秒':>10}")
+        for scenario in ('文件', '逐批'):
+            tables = {}
+            for label in ('to_sql', 'integrator'):
+                name = f"{label}_{len(tables)}_{scenario}"
+                config['integration']['target_db_file'] = os.path.join(work_dir, f"{name}.db")
+                config['data_paths']['output_dir'] = work_dir
+                config_file = os.path.join(work_dir, f"{name}.json")
+                with open(config_file, 'w', encoding='utf-8') as f:
+                    json.dump(config, f)
+                integrator = NewsDataIntegrator(config_file)
+
+                start = time.perf_counter()
+                if scenario == '文件' and label == 'to_sql':
+                    reference_import(integrator.db_file, integrator.table_name, file_path, integrator.import_chunk_rows)
+                elif scenario == '文件':
+                    integrator.import_to_database(file_path)
+                else:
+                    for batch in batches:
+                        if label == 'to_sql':
+                            reference_import_batch(integrator.db_file, integrator.table_name, batch)
+                        else:
+                            integrator.import_dataframe(batch)
+                elapsed = time.perf_counter() - start
+                print(f"{scenario:>6} {label:>12} {elapsed:>10.2f} {args.rows / elapsed:>10.0f}")
+
+                tables[label] = pd.read_sql_query(
+                    f"SELECT title, content, publish_time, source, url, processed_at FROM {integrator.table_name} ORDER BY id",
+                    integrator.db.connection()
+                )
+                integrator.close()
+            identical &= tables['to_sql'].equals(tables['integrator'])
+
+        print(f"导入的数据一致: {identical}（{args.rows} 行）")
+        return 0 if identical else 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def reference_export(integrator, output_file):
+    """原始导出实现：read_sql_query 读入整张表，转换为字典列表后 json.dump"""
+    df = pd.read_sql_query(f"SELECT * FROM {integrator.table_name} ORDER BY publish_time DESC", integrator.db.connection())
+    for col in df.columns:
+        if 'time' in col.lower() or 'date' in col.lower():
+            df[col] = pd.to_datetime(df[col]).dt.strftime('%Y-%m-%d %H:%M:%S')
+    records = df.to_dict(orient='records')
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=4)
+    return len(records)
+
+
+def memory_status(field):
+    """读取 /proc/self/status 中的内存项（MB），如 VmRSS（当前常驻内存）和 VmHWM（峰值常驻内存）"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_export(label, config_file, output_file, queue):
+    """在子进程中执行一种导出实现，返回耗时和峰值内存相对导出前的增量（MB）"""
+    integrator = NewsDataIntegrator(config_file)
+    # ru_maxrss 会继承父进程的峰值，改用只属于本进程的 VmHWM
+    baseline = memory_status('VmRSS')
+    start = time.perf_counter()
+    if label == 'pandas':
+        rows = reference_export(integrator, output_file)
+    else:
+        rows = integrator.export_to_json(output_file)
+    elapsed = time.perf_counter() - start
+    integrator.close()
+    queue.put((rows, elapsed, memory_status('VmHWM') - baseline))
+
+
+def bench_export(args):
+    """
+    比较流式导出与原始pandas导出实现的耗时和峰值内存，并检查导出的记录一致
+
+    每种实现在单独的子进程中运行，峰值内存不受生成测试数据库的影响。
+    """
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    work_dir = tempfile.mkdtemp(prefix="news_bench_")
+    try:
+        config['integration']['target_db_file'] = os.path.join(work_dir, "export.db")
+        # 内存映射读取的页面也计入RSS，关闭后峰值内存只反映导出实现本身
+        config['integration'].setdefault('sqlite', {})['mmap_size_mb'] = 0
+        config['data_paths']['output_dir'] = work_dir
+        config_file = os.path.join(work_dir, "export.json")
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+
+        integrator = NewsDataIntegrator(config_file)
+        for start in range(0, args.rows, 100000):
+            df = processed_frame(min(100000, args.rows - start))
+            df['title'] = df['title'] + f" {start}"
+            df['content'] = df['content'].str[:args.content_chars] + f" {start}"
+            df['publish_time'] += pd.to_timedelta(start, unit='s')
+            integrator.import_dataframe(df)
+        integrator.close()
+        print(f"测试数据库: {args.rows} 行，{os.path.getsize(config['integration']['target_db_file']) / 1024 / 1024:.0f} MB")
+
+        # spawn 启动的子进程不继承父进程的内存
+        context = multiprocessing.get_context('spawn')
+        print(f"{'实现':>12} {'耗时(秒)':>10} {'行/秒':>10} {'峰值内存(MB)':>14} {'文件(MB)':>10}")
+        for label, extension in (('pandas', '.json'), ('stream', '.json'), ('stream', '.jsonl')):
+            output_file = os.path.join(work_dir, f"{label}{extension}")
+            queue = context.Queue()
+            process = context.Process(target=run_export, args=(label, config_file, output_file, queue))
+            process.start()
+            rows, elapsed, memory = queue.get()
+            process.join()
+            size = os.path.getsize(output_file) / 1024 / 1024
+            print(f"{label + extension:>12} {elapsed:>10.2f} {rows / elapsed:>10.0f} {memory:>14.0f} {size:>10.0f}")
+
+        # 原始实现把空值写成 NaN（不是合法的JSON），流式导出写成 null，比较时视为相同
+        with open(os.path.join(work_dir, "pandas.json"), 'r', encoding='utf-8') as f:
+            expected = json.load(f, parse_constant=lambda constant: None)
+        with open(os.path.join(work_dir, "stream.json"), 'r', encoding='utf-8') as f:
+            identical = json.load(f) == expected
+        with open(os.path.join(work_dir, "stream.jsonl"), 'r', encoding='utf-8') as f:
+            identical &= [json.loads(line) for line in f] == expected
+        print(f"导出的记录一致: {identical}（{len(expected)} 行）")
+        return 0 if identical else 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# 搜索基准测试中只出现一次的新闻标题
+RARE_TITLE = "钙钛矿叠层电池转换效率创下新纪录"
+
+
+def bench_search(args):
+    """
+    比较全文索引与 LIKE 全表扫描的搜索延迟，并检查两者匹配的记录一致；
+    同时测量为已有记录建立索引的耗时、索引占用的空间，以及触发器对导入吞吐量的影响
+    """
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    work_dir = tempfile.mkdtemp(prefix="news_bench_")
+    try:
+        db_file = os.path.join(work_dir, "search.db")
+        config['integration']['target_db_file'] = db_file
+        config['data_paths']['output_dir'] = work_dir
+        config_file = os.path.join(work_dir, "search.json")
+
+        def open_integrator(fts_enabled):
+            config['integration'].setdefault('fts', {})['enabled'] = fts_enabled
+            with open(config_file, 'w', encoding='utf-8') as f:
+                json.dump(config, f)
+            return NewsDataIntegrator(config_file)
+
+        def sample_frame(start, rows):
+            df = processed_frame(rows)
+            df['title'] = df['title'] + f" {start}"
+            df['content'] = df['content'].str[:args.content_chars] + f" {start}"
+            df['publish_time'] += pd.to_timedelta(start, unit='s')
+            return df
+
+        def timed_import(integrator, start):
+            df = sample_frame(start, args.import_rows)
+            began = time.perf_counter()
+            integrator.import_dataframe(df)
+            return args.import_rows / (time.perf_counter() - began)
+
+        integrator = open_integrator(False)
+        for start in range(0, args.rows, 100000):
+            integrator.import_dataframe(sample_frame(start, min(100000, args.rows - start)))
+            if start == args.rows // 200000 * 100000:
+                # 表中间插入一条只出现一次的新闻，LIKE 搜索需要扫描整个表才能确定没有更多匹配
+                rare = sample_frame(start, 1)
+                rare['title'] = RARE_TITLE
+                integrator.import_dataframe(rare)
+        rate_plain = timed_import(integrator, args.rows)
+        integrator.db.connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size_plain = os.path.getsize(db_file)
+        integrator.close()
+
+        began = time.perf_counter()
+        integrator = open_integrator(True)
+        build_seconds = time.perf_counter() - began
+        rate_fts = timed_import(integrator, args.rows + args.import_rows)
+        integrator.db.connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size_fts = os.path.getsize(db_file)
+        rows = args.rows + 2 * args.import_rows + 1
+
+        print(f"测试数据库: {rows} 行，{size_plain / 1024 / 1024:.0f} MB；"
+              f"建立全文索引 {build_seconds:.1f} 秒，索引约 {(size_fts - size_plain) / 1024 / 1024:.0f} MB")
+        print(f"导入吞吐量（每批 {args.import_rows} 行）: 无索引 {rate_plain:.0f} 行/秒，有索引 {rate_fts:.0f} 行/秒")
+
+        conn = integrator.db.connection()
+        identical = True
+        print(f"{'搜索词':>16} {'匹配数':>8} {'LIKE(毫秒)':>12} {'全文索引(毫秒)':>16}")
+        for query in args.queries:
+            timings = {}
+            for label, search in (('like', lambda: like_search(conn, integrator.table_name, query, args.limit)),
+                                  ('fts', lambda: integrator.search(query, args.limit))):
+                elapsed = []
+                for _ in range(args.repeat):
+                    began = time.perf_counter()
+                    search()
+                    elapsed.append(time.perf_counter() - began)
+                timings[label] = sorted(elapsed)[len(elapsed) // 2] * 1000
+
+            # 比较不限数量时两种方式匹配的记录
+            expected = {result['id'] for result in like_search(conn, integrator.table_name, query, rows)}
+            actual = {result['id'] for result in integrator.search(query, rows)}
+            identical &= expected == actual
+            print(f"{query:>16} {len(expected):>8} {timings['like']:>12.1f} {timings['fts']:>16.1f}")
+        integrator.close()
+
+        print(f"匹配的记录一致: {identical}（返回前 {args.limit} 条，取 {args.repeat} 次的中位数）")
+        return 0 if identical else 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_retention(args):
+    """比较执行保留策略前后主库的大小，以及完整导出和 VACUUM 的耗时"""
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    work_dir = tempfile.mkdtemp(prefix="news_bench_")
+    try:
+        db_file = os.path.join(work_dir, "retention.db")
+        config['integration']['target_db_file'] = db_file
+        config['data_paths']['output_dir'] = work_dir
+        config['retention'] = {
+            "enabled": True, "hot_months": args.hot_months, "partition_dir": os.path.join(work_dir, "partitions"),
+            "compress_after_months": args.compress_after_months, "vacuum": True
+        }
+        config_file = os.path.join(work_dir, "retention.json")
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+
+        # 发布时间均匀分布在最近 months 个月
+        integrator = NewsDataIntegrator(config_file)
+        now = pd.Timestamp.now()
+        seconds = args.months * 30 * 24 * 3600
+        for start in range(0, args.rows, 100000):
+            rows = min(100000, args.rows - start)
+            df = processed_frame(rows)
+            df['title'] = df['title'] + f" {start}"
+            df['content'] = df['content'].str[:args.content_chars] + f" {start}"
+            df['publish_time'] = now - pd.to_timedelta([(start + i) * seconds // args.rows for i in range(rows)], unit='s')
+            integrator.import_dataframe(df)
+
+        def measure():
+            conn = integrator.db.connection()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            rows = conn.execute(f"SELECT COUNT(*) FROM {integrator.table_name}").fetchone()[0]
+            size = os.path.getsize(db_file) / 1024 / 1024
+            began = time.perf_counter()
+            integrator.export_to_json(os.path.join(work_dir, "export.json"))
+            export_seconds = time.perf_counter() - began
+            began = time.perf_counter()
+            conn.execute("VACUUM")
+            return rows, size, export_seconds, time.perf_counter() - began
+
+        print(f"{'':>8} {'行数':>10} {'主库(MB)':>10} {'完整导出(秒)':>14} {'VACUUM(秒)':>12}")
+        before = measure()
+        print(f"{'执行前':>8} {before[0]:>10} {before[1]:>10.0f} {before[2]:>14.2f} {before[3]:>12.2f}")
+
+        began = time.perf_counter()
+        moved = integrator.apply_retention()
+        elapsed = time.perf_counter() - began
+
+        after = measure()
+        print(f"{'执行后':>8} {after[0]:>10} {after[1]:>10.0f} {after[2]:>14.2f} {after[3]:>12.2f}")
+
+        partitions = integrator.partitions.list_partitions()
+        archived = sum(partition['bytes'] for partition in partitions) / 1024 / 1024
+        print(f"保留 {args.hot_months} 个月：移出 {moved} 行到 {len(partitions)} 个分区（共 {archived:.0f} MB，"
+              f"其中 {sum(partition['compressed'] for partition in partitions)} 个已压缩），耗时 {elapsed:.1f} 秒")
+        integrator.close()
+        return 0 if after[0] + moved == before[0] else 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='新闻数据处理流水线性能基准测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    clean = subparsers.add_parser('clean', help='比较文本清理引擎与原始实现的速度和输出')
+    clean.add_argument('--rows', type=int, default=5000, help='样本行数（每行清理标题和内容）')
+    clean.add_argument('--fuzz', type=int, default=20000, help='随机边界输入的数量')
+    clean.set_defaults(func=bench_clean)
+
+    frame = subparsers.add_parser('clean-frame', help='比较 clean_news_data 与原始逐列apply实现的吞吐量')
+    frame.add_argument('--rows', type=int, default=100000, help='DataFrame行数')
+    frame.set_defaults(func=bench_clean_frame)
+
+    load = subparsers.add_parser('load', help='比较按读取模式加载与推断类型加载的耗时和内存')
+    load.add_argument('--rows', type=int, default=50000, help='样本行数')
+    load.add_argument('--extra-columns', type=int, default=10, help='模拟采集器额外导出的列数')
+    load.add_argument('--batch-size', type=int, default=5000, help='每批行数')
+    load.set_defaults(func=bench_load)
+
+    publish_time = subparsers.add_parser('publish-time', help='比较发布时间解析器与 pd.to_datetime 的耗时和解析率')
+    publish_time.add_argument('--rows', type=int, default=100000, help='样本行数')
+    publish_time.set_defaults(func=bench_publish_time)
+
+    backends = subparsers.add_parser('html-backends', help='比较各HTML去标签后端的吞吐量')
+    backends.add_argument('--rows', type=int, default=5000, help='样本行数（每行包装成一个HTML片段）')
+    backends.set_defaults(func=bench_html_backends)
+
+    scaling = subparsers.add_parser('clean-scaling', help='比较1到N个进程并行清理的吞吐量')
+    scaling.add_argument('--rows', type=int, default=20000, help='样本总行数')
+    scaling.add_argument('--files', type=int, default=8, help='样本文件数')
+    scaling.add_argument('--batch-size', type=int, default=1000, help='每批行数')
+    scaling.add_argument('--max-workers', type=int, default=os.cpu_count() or 1, help='最大进程数')
+    scaling.set_defaults(func=bench_clean_scaling)
+
+    integrate = subparsers.add_parser('import', help='比较集成器导入处理后文件与原始 to_sql 实现的吞吐量')
+    integrate.add_argument('--rows', type=int, default=100000, help='处理后文件的行数')
+    integrate.add_argument('--batch-size', type=int, default=5000, help='逐批导入时每批的行数')
+    integrate.set_defaults(func=bench_import)
+
+    export = subparsers.add_parser('export', help='比较流式导出与原始pandas导出实现的耗时和峰值内存')
+    export.add_argument('--rows', type=int, default=1000000, help='数据库中的行数')
+    export.add_argument('--content-chars', type=int, default=200, help='每条内容截取的字符数，控制数据库大小')
+    export.set_defaults(func=bench_export)
+
+    search = subparsers.add_parser('search', help='比较全文索引与 LIKE 全表扫描的搜索延迟')
+    search.add_argument('--rows', type=int, default=1000000, help='数据库中的行数')
+    search.add_argument('--content-chars', type=int, default=200, help='每条内容截取的字符数，控制数据库大小')
+    search.add_argument('--import-rows', type=int, default=50000, help='测量导入吞吐量时每批的行数')
+    search.add_argument('--limit', type=int, default=20, help='每次搜索返回的结果数')
+    search.add_argument('--repeat', type=int, default=5, help='每个搜索词的重复次数')
+    search.add_argument('--queries', nargs='+', default=['钙钛矿', '量子计算', '智慧城市建设', '阿里巴巴 中国联通', '第1861号', '华为'],
+                        help='搜索词，少于3个字的词无法使用 trigram 索引')
+    search.set_defaults(func=bench_search)
+
+    retention = subparsers.add_parser('retention', help='比较执行保留策略前后主库的大小和完整导出、VACUUM的耗时')
+    retention.add_argument('--rows', type=int, default=1000000, help='数据库中的行数')
+    retention.add_argument('--months', type=int, default=24, help='发布时间分布的月数')
+    retention.add_argument('--hot-months', type=int, default=3, help='主库保留的月数')
+    retention.add_argument('--compress-after-months', type=int, default=12, help='早于多少个月的分区压缩')
+    retention.add_argument('--content-chars', type=int, default=200, help='每条内容截取的字符数，控制数据库大小')
+    retention.set_defaults(func=bench_retention)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
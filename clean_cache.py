@@ -0,0 +1,211 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("CleanTextCache")
+
+# 批量查询SQLite时每条语句的参数个数上限
+_QUERY_CHUNK = 500
+
+
+class CleanTextCache:
+    """
+    按原始文本内容寻址的清理结果缓存
+
+    键是原始文本的 blake2b 哈希（以清理引擎的 cache_namespace，即规则版本和HTML后端，
+    作为哈希密钥，清理规则变化后旧结果自然失效），值是清理后的文本和当时清理所用的时间。
+    内存中是有上限的LRU；配置了 db_file 时，未命中内存的文本再查SQLite，
+    新的清理结果批量写入SQLite，以便在多次运行之间复用。
+
+    统计命中次数和命中所节省的清理时间（按首次清理的耗时计算）。
+    """
+
+    def __init__(self, max_entries=100000, db_file=None, max_disk_entries=1000000):
+        """
+        初始化缓存
+
+        参数:
+        max_entries: 内存LRU的最大条目数
+        db_file: SQLite缓存文件路径，None表示只使用内存缓存
+        max_disk_entries: SQLite中保留的最大条目数，超出时删除最早写入的条目
+        """
+        self.max_entries = max_entries
+        self.db_file = db_file
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.reset_stats()
+
+    def __getstate__(self):
+        # 交给进程池工作进程时不复制内存中的条目，SQLite连接在工作进程中重新打开
+        state = self.__dict__.copy()
+        state['_memory'] = OrderedDict()
+        state['_lock'] = None
+        state['_conn'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._memory)
+
+    @staticmethod
+    def key(text, namespace):
+        """计算原始文本在指定清理配置下的缓存键"""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16, key=namespace.encode('utf-8')[:64]).digest()
+
+    def clean_many(self, values, cleaner):
+        """
+        清理一组文本，已缓存的文本直接取缓存结果
+
+        参数:
+        values: 原始值的可迭代对象，非字符串值直接清理，不缓存
+        cleaner: TextCleaner 实例
+
+        返回:
+        清理后的值列表，顺序与输入一致
+        """
+        values = list(values)
+        clean = cleaner.clean
+        namespace = cleaner.cache_namespace
+        results = [None] * len(values)
+        # 缓存键 -> 需要该结果的位置列表
+        missing = {}
+
+        with self._lock:
+            for i, value in enumerate(values):
+                if not isinstance(value, str):
+                    results[i] = clean(value)
+                    continue
+                self.lookups += 1
+                key = self.key(value, namespace)
+                entry = self._memory.get(key)
+                if entry is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    self.saved_seconds += entry[1]
+                    results[i] = entry[0]
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            if missing and self.db_file:
+                for key, entry in self._load(list(missing)).items():
+                    positions = missing.pop(key)
+                    self.disk_hits += len(positions)
+                    self.saved_seconds += entry[1] * len(positions)
+                    self._remember(key, entry)
+                    for i in positions:
+                        results[i] = entry[0]
+
+            new_entries = []
+            for key, positions in missing.items():
+                start = time.perf_counter()
+                cleaned = clean(values[positions[0]])
+                cost = time.perf_counter() - start
+                self.clean_seconds += cost
+                # 同一批中重复出现的文本只清理一次
+                self.memory_hits += len(positions) - 1
+                self.saved_seconds += cost * (len(positions) - 1)
+                entry = (cleaned, cost)
+                self._remember(key, entry)
+                new_entries.append((key, cleaned, cost))
+                for i in positions:
+                    results[i] = cleaned
+
+            if new_entries and self.db_file:
+                self._store(new_entries)
+
+        return results
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _connect(self):
+        if self._conn is None:
+            db_dir = os.path.dirname(self.db_file)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            # 并行清理时多个进程各自打开连接，写入冲突时等待
+            self._conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS clean_cache (
+                key BLOB PRIMARY KEY,
+                cleaned TEXT,
+                cost REAL
+            )
+            ''')
+            self._conn.commit()
+        return self._conn
+
+    def _load(self, keys):
+        found = {}
+        try:
+            conn = self._connect()
+            for i in range(0, len(keys), _QUERY_CHUNK):
+                chunk = keys[i:i + _QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                for key, cleaned, cost in conn.execute(
+                    f"SELECT key, cleaned, cost FROM clean_cache WHERE key IN ({placeholders})", chunk
+                ):
+                    found[key] = (cleaned, cost)
+        except sqlite3.Error as e:
+            logger.error(f"读取清理缓存时出错: {str(e)}")
+        return found
+
+    def _store(self, entries):
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO clean_cache (key, cleaned, cost) VALUES (?, ?, ?)", entries)
+                # rowid 随写入递增，超出上限时删除最早写入的条目
+                conn.execute(
+                    "DELETE FROM clean_cache WHERE rowid <= (SELECT MAX(rowid) FROM clean_cache) - ?",
+                    (self.max_disk_entries,)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"写入清理缓存时出错: {str(e)}")
+
+    def reset_stats(self):
+        """清零统计"""
+        self.lookups = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.clean_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def take_stats(self):
+        """返回自上次调用以来的统计并清零"""
+        stats = {
+            "lookups": self.lookups,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "clean_seconds": self.clean_seconds,
+            "saved_seconds": self.saved_seconds
+        }
+        self.reset_stats()
+        return stats
+
+    def merge_stats(self, stats):
+        """累加其他进程中的统计"""
+        self.lookups += stats["lookups"]
+        self.memory_hits += stats["memory_hits"]
+        self.disk_hits += stats["disk_hits"]
+        self.clean_seconds += stats["clean_seconds"]
+        self.saved_seconds += stats["saved_seconds"]
+
+    def close(self):
+        """关闭SQLite连接"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,67 @@
+import re
+import html
+import random
+
+from bs4 import BeautifulSoup
+
+# TextCleaner 的参照实现和随机边界输入，tests/test_text_cleaner.py 和 benchmark.py 用来比较输出一致性
+
+
+def reference_clean_text(text):
+    """原始的逐条 re.sub 清理实现，作为 TextCleaner 输出一致性的参照"""
+    if not isinstance(text, str):
+        return text
+
+    css_patterns = [
+        r'ct_hqimg\s*\{[^\}]*\}',
+        r'\.hqimg_wrapper\s*\{[^\}]*\}',
+        r'[a-zA-Z0-9_\-\.]+\s*\{[^\}]*\}',
+        r'<style[^>]*>.*?</style>'
+    ]
+    for pattern in css_patterns:
+        text = re.sub(pattern, '', text, flags=re.DOTALL)
+
+    text = html.unescape(text)
+
+    try:
+        if '<' in text and '>' in text:
+            soup = BeautifulSoup(text, 'html.parser')
+            text = soup.get_text()
+    except Exception:
+        text = re.sub(r'<[^>]+>', ' ', text)
+
+    text = re.sub(r'(class|id|style)=["\'][^"\']+["\']', ' ', text)
+    text = re.sub(r'<script[^>]*>.*?</script>', ' ', text, flags=re.DOTALL)
+    text = re.sub(r'https?://\S+', '', text)
+
+    patterns_to_remove = [
+        r'图片来源：.*?网络',
+        r'来源：.*?网',
+        r'编辑：.*?[\s,，。；;]',
+        r'记者：.*?[\s,，。；;]',
+        r'责任编辑：.*?[\s,，。；;]',
+        r'作者：.*?[\s,，。；;]',
+        r'发布时间：.*?[\s,，。；;]',
+        r'更新时间：.*?[\s,，。；;]'
+    ]
+    for pattern in patterns_to_remove:
+        text = re.sub(pattern, '', text)
+
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[\x00-\x1F\x7F]', '', text)
+    return text.strip()
+
+
+# 随机拼接这些片段生成边界输入：CSS规则、标签、实体、URL、署名文本以及各类空白和控制字符
+FUZZ_FRAGMENTS = [
+    '编辑：', '责任', '记者：', '来源：', '网', '网络', '图片来源：', '作者：', '发布时间：', '更新时间：',
+    'ct_hqimg', '.hqimg_wrapper', 'b-c.d', '{', '}', '<style>', '</style>', '<script>', 'x</script>',
+    'abc', 'A_1', 'x-y', '.', 'q{', '} ', '<p>', '</p>', '<', '>', '=', 'class="c"', "id='q'", 'style=', '&amp;', '&lt;', '&gt;', 'http://x', 'https://',
+    '。', '，', ';', '：', ' ', '\n', '\t', '\u3000', '\xa0', '\x85', '\x01', '\x1c', '\x7f', 'a'
+]
+
+
+def fuzz_texts(count, seed=0):
+    """用 FUZZ_FRAGMENTS 随机拼接生成边界输入，相同的 seed 生成相同的文本"""
+    rng = random.Random(seed)
+    return [''.join(rng.choice(FUZZ_FRAGMENTS) for _ in range(rng.randint(0, 25))) for _ in range(count)]
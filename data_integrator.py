@@ -1,9 +1,18 @@
 import os
 import json
+import time
+import hashlib
+import argparse
 import pandas as pd
 import sqlite3
 import logging
 from datetime import datetime
+from processed_io import iter_processed_chunks, PROCESSED_EXTENSIONS
+from db_connection import SQLiteConnectionManager
+from search_index import FullTextIndex, like_search
+from db_partitions import MonthlyPartitions
+from json_stream import (iter_cursor_rows, iter_cursor_records, write_lines, append_records, encode_record,
+                         format_for, has_json_functions, json_object_sql)
 
 # 配置日志
 logging.basicConfig(
@@ -16,6 +25,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger("NewsDataIntegrator")
 
+# 补算 content_hash 时每批读取和更新的行数
+INSERT_BATCH_ROWS = 10000
+
+# 导出时每次 fetchmany 读取的行数
+EXPORT_BATCH_ROWS = 5000
+
+# 只在数据库内部使用、不导出到JSON文件的列
+INTERNAL_COLUMNS = ('content_hash',)
+
+def _sql_values(series):
+    """将一列转换为可以直接绑定到SQLite的Python值列表，空值为None，时间与 DataFrame.to_sql 的写法一致"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.dt.strftime('%Y-%m-%d %H:%M:%S').astype(object)
+        # 与 datetime.isoformat(' ') 一致：只有微秒不为0时才写出小数部分
+        fraction = (series.dt.microsecond.fillna(0) != 0).to_numpy()
+        if fraction.any():
+            values[fraction] = series[fraction].dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+    else:
+        values = series.astype(object)
+    return values.where(series.notna(), None).tolist()
+
+def content_hash(title, content):
+    """
+    计算新闻内容的哈希，作为去重的唯一键
+
+    标题和内容分别合并空白字符后再计算，只在空白上不同的同一篇文章得到相同的哈希。
+    """
+    text = ' '.join((title or '').split()) + '\n' + ' '.join((content or '').split())
+    # 只用于去重，不需要抗碰撞攻击；SHA-1 有硬件加速，比 blake2b 快
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
 class NewsDataIntegrator:
     def __init__(self, config_file="config.json"):
         """
@@ -28,11 +68,20 @@ class NewsDataIntegrator:
         self.processed_dir = self.config["data_paths"]["output_dir"]
         self.db_file = self.config["integration"]["target_db_file"]
         self.table_name = self.config["integration"]["table_name"]
+        self.import_chunk_rows = self.config["integration"].get("import_chunk_rows", 50000)
         
-        # 确保目录存在
-        db_dir = os.path.dirname(self.db_file)
-        if db_dir:  # 只有当数据库文件包含目录路径时才创建目录
-            os.makedirs(db_dir, exist_ok=True)
+        # 各线程复用自己的连接，打开时设置WAL等参数（同时负责创建数据库所在目录）
+        self.db = SQLiteConnectionManager.from_config(self.db_file, self.config["integration"].get("sqlite", {}))
+        self._table_columns = []
+        # 标题和内容的全文索引（可选），由新闻表上的触发器保持同步
+        fts_config = self.config["integration"].get("fts", {})
+        self.fts_enabled = fts_config.get("enabled", False)
+        self.search_index = FullTextIndex.from_config(self.table_name, fts_config)
+        # 按月分区的冷数据存储，主库只保留最近几个月（retention）
+        self.retention_config = self.config.get("retention", {})
+        self.partitions = MonthlyPartitions.from_config(self.db, self.table_name, self.retention_config)
+        # 最近一次导出写入JSON文件的字节数
+        self.last_export_bytes = 0
         
         # 初始化数据库
         self._init_database()
@@ -58,78 +107,321 @@ class NewsDataIntegrator:
     def _init_database(self):
         """初始化数据库和表"""
         try:
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            
-            # 创建新闻文章表
-            cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS {self.table_name} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT,
-                content TEXT,
-                publish_time TIMESTAMP,
-                source TEXT,
-                url TEXT,
-                processed_at TIMESTAMP,
-                imported_at TIMESTAMP
-            )
-            ''')
+            with self.db.transaction() as conn:
+                # 创建新闻文章表
+                conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {self.table_name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT,
+                    content TEXT,
+                    publish_time TIMESTAMP,
+                    source TEXT,
+                    url TEXT,
+                    processed_at TIMESTAMP,
+                    imported_at TIMESTAMP,
+                    content_hash TEXT
+                )
+                ''')
+                
+                # 旧版本创建的表没有 content_hash 列
+                columns = [row[1] for row in conn.execute(f"PRAGMA table_info({self.table_name})")]
+                if 'content_hash' not in columns:
+                    conn.execute(f"ALTER TABLE {self.table_name} ADD COLUMN content_hash TEXT")
+                
+                # 增量导出的进度：每个输出文件已导出的最大id和上次完整导出的时间
+                conn.execute('''
+                CREATE TABLE IF NOT EXISTS export_state (
+                    output_file TEXT PRIMARY KEY,
+                    last_id INTEGER,
+                    snapshot_at REAL
+                )
+                ''')
+                
+                # 创建索引
+                conn.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_title ON {self.table_name} (title)
+                ''')
+                conn.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_publish_time ON {self.table_name} (publish_time)
+                ''')
             
-            # 创建索引
-            cursor.execute(f'''
-            CREATE INDEX IF NOT EXISTS idx_title ON {self.table_name} (title)
-            ''')
-            cursor.execute(f'''
-            CREATE INDEX IF NOT EXISTS idx_publish_time ON {self.table_name} (publish_time)
-            ''')
-            
-            conn.commit()
-            conn.close()
+            # 导入时只写入表中存在的列
+            self._table_columns = [row[1] for row in self.db.connection().execute(f"PRAGMA table_info({self.table_name})")]
+            try:
+                self._backfill_content_hash()
+            except Exception as e:
+                # 没有 content_hash 的记录不参与去重，但不影响之后创建唯一索引和全文索引
+                logger.error(f"为旧记录计算 content_hash 时出错: {str(e)}，这些记录不参与去重")
+            self._create_unique_index()
+            self._init_search_index()
             logger.info(f"数据库初始化完成: {self.db_file}")
         except Exception as e:
             logger.error(f"初始化数据库时出错: {str(e)}")
     
+    def _backfill_content_hash(self):
+        """
+        为旧记录计算 content_hash
+
+        唯一索引已经存在时（例如旧版本或其他工具写入了没有 content_hash 的记录），部分旧记录可能与已有记录重复，
+        这些重复按 compact() 的规则处理：每组只保留id最小的一条，删除的记录数记录在日志中。
+
+        返回:
+        因重复而删除的记录数
+        """
+        conn = self.db.connection()
+        total = 0
+        removed = 0
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                f"SELECT id, title, content FROM {self.table_name} WHERE content_hash IS NULL AND id > ? ORDER BY id LIMIT ?",
+                (last_id, INSERT_BATCH_ROWS)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            updates = [(content_hash(title, content), row_id) for row_id, title, content in rows]
+            with self.db.transaction() as conn:
+                try:
+                    conn.executemany(f"UPDATE {self.table_name} SET content_hash = ? WHERE id = ?", updates)
+                except sqlite3.IntegrityError:
+                    removed += self._resolve_hash_conflicts(conn, updates)
+            total += len(rows)
+        if total:
+            logger.info(f"已为 {total} 条旧记录计算 content_hash")
+        if removed:
+            logger.warning(f"{removed} 条旧记录与已有记录内容重复，已删除（每组保留id最小的一条）")
+            # 已导出的JSON文件中仍有被删除的记录，下次导出时重新完整导出
+            self.reset_export_state()
+        return removed
+
+    def _resolve_hash_conflicts(self, conn, updates):
+        """逐条写入 content_hash，与唯一索引中已有记录冲突时只保留id较小的一条，返回删除的记录数"""
+        removed = 0
+        for digest, row_id in updates:
+            existing = conn.execute(
+                f"SELECT id FROM {self.table_name} WHERE content_hash = ? AND id != ?", (digest, row_id)
+            ).fetchone()
+            if existing is not None and existing[0] < row_id:
+                conn.execute(f"DELETE FROM {self.table_name} WHERE id = ?", (row_id,))
+                removed += 1
+                continue
+            if existing is not None:
+                conn.execute(f"DELETE FROM {self.table_name} WHERE id = ?", (existing[0],))
+                removed += 1
+            conn.execute(f"UPDATE {self.table_name} SET content_hash = ? WHERE id = ?", (digest, row_id))
+        return removed
+
+    def _create_unique_index(self):
+        """
+        创建 content_hash 的唯一索引
+
+        返回:
+        是否创建成功；表中已有重复记录时失败，需要先运行 compact()
+        """
+        try:
+            self.db.connection().execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS idx_content_hash ON {self.table_name} (content_hash)"
+            )
+            return True
+        except sqlite3.IntegrityError:
+            logger.warning(f"表 {self.table_name} 中已有重复的新闻，无法创建唯一索引，重复导入不会被忽略；"
+                           f"请运行 python data_integrator.py --compact 清理重复记录")
+            return False
+
+    def _init_search_index(self):
+        """按配置创建或删除全文索引；第一次启用时为已有的记录建立索引"""
+        exists = self.search_index.exists(self.db.connection())
+        if self.fts_enabled and not exists:
+            start = time.perf_counter()
+            try:
+                with self.db.transaction() as conn:
+                    tokenizer = self.search_index.create(conn)
+            except sqlite3.OperationalError as e:
+                # 编译时没有启用FTS5的SQLite
+                logger.error(f"无法创建全文索引: {str(e)}，搜索将使用 LIKE 全表扫描")
+                return
+            logger.info(f"已创建全文索引 {self.search_index.fts_table}（{tokenizer} 分词器），"
+                        f"耗时 {time.perf_counter() - start:.2f} 秒")
+        elif not self.fts_enabled and exists:
+            # 关闭后不再维护索引，保留触发器会拖慢导入，旧的索引也会过期
+            with self.db.transaction() as conn:
+                self.search_index.drop(conn)
+            logger.info(f"全文索引已关闭，已删除 {self.search_index.fts_table}")
+    
+    def rebuild_search_index(self):
+        """
+        重新创建全文索引（例如修改了 integration.fts.tokenizer 之后），并合并索引的各个段
+
+        返回:
+        是否已重建；未启用全文索引时返回False
+        """
+        if not self.fts_enabled:
+            logger.warning("未启用全文索引（integration.fts.enabled），无需重建")
+            return False
+        start = time.perf_counter()
+        with self.db.transaction() as conn:
+            self.search_index.drop(conn)
+            tokenizer = self.search_index.create(conn)
+            self.search_index.optimize(conn)
+        logger.info(f"已重建全文索引 {self.search_index.fts_table}（{tokenizer} 分词器），"
+                    f"耗时 {time.perf_counter() - start:.2f} 秒")
+        return True
+    
+    def search(self, query, limit=20):
+        """
+        按关键词搜索新闻标题和内容
+        
+        启用全文索引时按相关度排序，否则退回 LIKE 全表扫描，按发布时间倒序。
+        多个词用空白分隔，需要同时出现；每个词按子串匹配，不区分英文大小写。
+        
+        参数:
+        query: 搜索词
+        limit: 返回的最大结果数
+        
+        返回:
+        结果字典列表，包含 id、title、publish_time、source、url、snippet（摘要，匹配部分用【】标记）
+        和 score（相关度，越大越相关；LIKE 搜索时为None）
+        """
+        conn = self.db.connection()
+        results = None
+        if self.fts_enabled and self.search_index.exists(conn):
+            results = self.search_index.search(conn, query, limit)
+        if results is None:
+            results = like_search(conn, self.table_name, query, limit)
+        return results
+    
+    def compact(self, vacuum=True):
+        """
+        删除内容重复的记录（每组保留id最小、即最早导入的一条），然后创建唯一索引
+
+        参数:
+        vacuum: 删除后是否执行 VACUUM 回收数据库文件的空间
+
+        返回:
+        删除的记录数
+        """
+        self._backfill_content_hash()
+        with self.db.transaction() as conn:
+            removed = conn.execute(f'''
+            DELETE FROM {self.table_name}
+            WHERE content_hash IS NOT NULL
+              AND id NOT IN (SELECT MIN(id) FROM {self.table_name} GROUP BY content_hash)
+            ''').rowcount
+        logger.info(f"已删除 {removed} 条重复记录")
+        if removed:
+            # 已导出的JSON文件中仍有被删除的记录，下次导出时重新完整导出
+            self.reset_export_state()
+        self._create_unique_index()
+        if vacuum and removed:
+            self.db.connection().execute("VACUUM")
+            logger.info(f"已回收数据库文件空间: {self.db_file}")
+        return removed
+    
+    def apply_retention(self, now=None):
+        """
+        执行保留策略：把早于 retention.hot_months 个月的新闻按月移到分区文件，压缩旧分区，
+        有记录移出时回收主库的空间（retention.vacuum）
+        
+        已导出的JSON文件中仍有移出的记录，下次导出时重新完整导出，之后只包含主库中的记录。
+        
+        参数:
+        now: 当前时间，None表示使用系统时间
+        
+        返回:
+        移出主库的记录数
+        """
+        start = time.perf_counter()
+        moved, months, compressed = self.partitions.run(now)
+        if moved:
+            self.reset_export_state()
+            if self.retention_config.get("vacuum", True):
+                self.db.connection().execute("VACUUM")
+        logger.info(f"保留策略执行完成：移出 {moved} 条记录（{', '.join(months) or '无'}），"
+                    f"压缩 {compressed} 个分区，耗时 {time.perf_counter() - start:.2f} 秒")
+        return moved
+    
     def get_processed_files(self):
-        """获取处理后的数据文件"""
+        """获取处理后的数据文件（Parquet或CSV）"""
         files = []
         for filename in os.listdir(self.processed_dir):
-            if filename.endswith('.csv'):
+            if filename.endswith(PROCESSED_EXTENSIONS):
                 files.append(os.path.join(self.processed_dir, filename))
         return files
     
+    def import_dataframe(self, df, conn=None, imported_at=None):
+        """
+        将清理后的DataFrame导入到数据库
+        
+        参数:
+        df: 清理后的新闻数据
+        conn: 已开启事务的数据库连接，None表示使用当前线程的连接，在一个事务中导入
+        imported_at: 导入时间戳，None表示当前时间
+        
+        返回:
+        新导入的记录数，内容与已有记录重复（content_hash 相同）的记录被忽略，不计入
+        """
+        if df.empty:
+            return 0
+        if conn is None:
+            with self.db.transaction() as conn:
+                return self.import_dataframe(df, conn, imported_at)
+        
+        # 添加导入时间戳和去重用的内容哈希
+        titles = df['title'].tolist() if 'title' in df.columns else [None] * len(df)
+        contents = df['content'].tolist() if 'content' in df.columns else [None] * len(df)
+        df = df.assign(
+            imported_at=imported_at or datetime.now(),
+            content_hash=[content_hash(title, content) for title, content in zip(titles, contents)]
+        )
+        
+        # 只写入表中存在的列
+        columns = [column for column in df.columns if column in self._table_columns]
+        extra = [column for column in df.columns if column not in self._table_columns]
+        if extra:
+            logger.warning(f"表 {self.table_name} 中没有列 {extra}，这些列不会导入")
+        # executemany 逐行消费生成器，不需要先构建所有行的元组列表
+        values = pd.DataFrame({column: _sql_values(df[column]) for column in columns}, dtype=object)
+        query = (f"INSERT OR IGNORE INTO {self.table_name} ({', '.join(columns)}) "
+                 f"VALUES ({', '.join('?' * len(columns))})")
+        inserted = conn.executemany(query, values.itertuples(index=False, name=None)).rowcount
+        if inserted < len(df):
+            logger.info(f"忽略 {len(df) - inserted} 条内容重复的记录")
+        return inserted
+    
     def import_to_database(self, file_path):
         """
-        将处理后的数据导入到数据库
+        将处理后的数据导入到数据库，按 import_chunk_rows 分块读取，内存占用与文件大小无关
+        
+        整个文件在一个事务中导入，出错时回滚，不会留下导入了一部分的数据
         
         参数:
         file_path: 处理后的数据文件路径
         
         返回:
-        导入的记录数
+        新导入的记录数（不含因内容重复而忽略的记录），出错时返回None
         """
         try:
-            # 读取CSV文件
-            df = pd.read_csv(file_path, encoding='utf-8')
-            if df.empty:
-                logger.warning(f"文件 {file_path} 没有数据，跳过导入")
-                return 0
-            
-            # 添加导入时间戳
-            df['imported_at'] = datetime.now()
+            imported_at = datetime.now()
+            rows_read = 0
+            records_count = 0
             
-            # 连接数据库
-            conn = sqlite3.connect(self.db_file)
+            with self.db.transaction() as conn:
+                # 分块读取并导入，Parquet文件保留了时间列的类型，不需要重新解析
+                for chunk in iter_processed_chunks(file_path, self.import_chunk_rows):
+                    rows_read += len(chunk)
+                    records_count += self.import_dataframe(chunk, conn, imported_at)
             
-            # 导入数据
-            records_count = len(df)
-            df.to_sql(self.table_name, conn, if_exists='append', index=False)
+            if rows_read == 0:
+                logger.warning(f"文件 {file_path} 没有数据，跳过导入")
+                return 0
             
-            conn.close()
-            logger.info(f"已将 {records_count} 条记录从 {file_path} 导入到数据库")
+            logger.info(f"已将 {records_count} 条记录从 {file_path} 导入到数据库"
+                        f"（文件共 {rows_read} 行，{rows_read - records_count} 行与已有记录重复）")
             return records_count
         except Exception as e:
             logger.error(f"导入数据到数据库时出错: {str(e)}")
-            return 0
+            return None
     
     def move_imported_file(self, file_path, imported_dir="data/imported"):
         """
@@ -153,83 +445,250 @@ class NewsDataIntegrator:
         """
         将数据库中的新闻数据导出为JSON文件
         
+        用游标逐批读取并边读边写，内存占用与表的大小无关。扩展名为 .jsonl 时每行写一个JSON对象，
+        否则写出JSON数组（每行一条记录）。
+        
         参数:
-        output_file: 输出的JSON文件路径
+        output_file: 输出的JSON或JSONL文件路径
         limit: 限制导出的记录数，None表示导出所有记录
         
         返回:
         导出的记录数
         """
+        tmp_file = output_file + ".tmp"
         try:
             # 确保输出目录存在
             output_dir = os.path.dirname(output_file)
             if output_dir:
                 os.makedirs(output_dir, exist_ok=True)
             
-            # 连接数据库
-            conn = sqlite3.connect(self.db_file)
-            
-            # 构建查询
-            query = f"SELECT * FROM {self.table_name} ORDER BY publish_time DESC"
+            # 支持JSON函数时由SQLite直接把每行编码为JSON，否则逐条读取后在Python中编码
+            conn = self.db.connection()
+            sql_json = has_json_functions(conn)
+            if sql_json:
+                query = f"SELECT id, {json_object_sql(self._export_columns())} FROM {self.table_name}"
+            else:
+                query = f"SELECT {', '.join(self._export_columns())} FROM {self.table_name}"
+            query += " ORDER BY publish_time DESC"
+            params = []
             if limit:
-                query += f" LIMIT {limit}"
+                query += " LIMIT ?"
+                params.append(limit)
+            cursor = conn.execute(query, params)
+            if sql_json:
+                rows = iter_cursor_rows(cursor, EXPORT_BATCH_ROWS)
+            else:
+                rows = ((record['id'], encode_record(record)) for record in iter_cursor_records(cursor, EXPORT_BATCH_ROWS))
             
-            # 读取数据
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            # 增量导出需要知道本次导出的最大id
+            max_id = 0
+            def lines():
+                nonlocal max_id
+                for record_id, line in rows:
+                    if record_id > max_id:
+                        max_id = record_id
+                    yield line
             
-            if df.empty:
-                logger.warning(f"没有数据可导出")
-                return 0
+            # 先写临时文件再替换，读取方不会看到写了一半的文件
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                count = write_lines(f, lines(), format_for(output_file), EXPORT_BATCH_ROWS)
             
-            # 转换日期时间列为字符串格式
-            for col in df.columns:
-                if 'time' in col.lower() or 'date' in col.lower():
-                    try:
-                        df[col] = pd.to_datetime(df[col]).dt.strftime('%Y-%m-%d %H:%M:%S')
-                    except:
-                        pass
+            if not count:
+                logger.warning(f"没有数据可导出")
+                if not os.path.exists(output_file):
+                    os.remove(tmp_file)
+                    return 0
+                # 已有的导出文件中的记录都已不在数据库中（如被保留策略移出），替换为空文件
             
-            # 转换为字典列表
-            records = df.to_dict(orient='records')
+            os.replace(tmp_file, output_file)
+            self.last_export_bytes = os.path.getsize(output_file)
             
-            # 保存为JSON文件
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(records, f, ensure_ascii=False, indent=4)
+            # 完整导出后，增量导出从本次的最大id继续；只导出了一部分时下次增量导出需要重新完整导出
+            if limit:
+                self.reset_export_state(output_file)
+            else:
+                self._save_export_state(output_file, max_id, time.time())
             
-            logger.info(f"已将 {len(records)} 条记录导出到 {output_file}")
-            return len(records)
+            if count:
+                logger.info(f"已将 {count} 条记录导出到 {output_file}")
+            return count
         except Exception as e:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
             logger.error(f"导出数据到JSON文件时出错: {str(e)}")
             return 0
     
-    def integrate(self):
-        """集成所有处理后的数据到数据库"""
+    def export_incremental(self, output_file, snapshot_interval_minutes=60):
+        """
+        增量导出：只把上次导出之后新增的记录追加到JSON文件末尾
+        
+        以下情况改为调用 export_to_json 完整导出（按发布时间倒序重写整个文件）：
+        - 该文件还没有导出过，或文件已不存在
+        - 距上次完整导出超过 snapshot_interval_minutes 分钟（同时反映记录的删除，恢复排序）
+        - 文件的格式无法原地追加
+        
+        两次完整导出之间，新记录位于数组末尾。
+        
+        参数:
+        output_file: 输出的JSON文件路径
+        snapshot_interval_minutes: 完整导出的间隔（分钟），None表示只在必要时完整导出
+        
+        返回:
+        本次写入的记录数
+        """
+        state = self._load_export_state(output_file)
+        if state is None or not os.path.exists(output_file):
+            return self.export_to_json(output_file)
+        last_id, snapshot_at = state
+        if snapshot_interval_minutes is not None and time.time() - snapshot_at >= snapshot_interval_minutes * 60:
+            logger.info(f"距上次完整导出已超过 {snapshot_interval_minutes} 分钟，重新完整导出 {output_file}")
+            return self.export_to_json(output_file)
+        
+        try:
+            records = self.fetch_records_after(last_id)
+            if not records:
+                logger.info(f"没有新记录需要导出到 {output_file}")
+                return 0
+            self.last_export_bytes = append_records(output_file, records)
+        except ValueError as e:
+            logger.warning(f"无法追加到 {output_file}（{str(e)}），改为完整导出")
+            return self.export_to_json(output_file)
+        except Exception as e:
+            logger.error(f"增量导出到JSON文件时出错: {str(e)}")
+            return 0
+        
+        self._save_export_state(output_file, records[-1]['id'])
+        logger.info(f"已将 {len(records)} 条新记录追加到 {output_file}")
+        return len(records)
+    
+    def _load_export_state(self, output_file):
+        """返回 (已导出的最大id, 上次完整导出的时间戳)，没有记录时返回None"""
+        return self.db.connection().execute(
+            "SELECT last_id, snapshot_at FROM export_state WHERE output_file = ?", (os.path.abspath(output_file),)
+        ).fetchone()
+    
+    def _save_export_state(self, output_file, last_id, snapshot_at=None):
+        """保存导出进度，snapshot_at 为None时保留上次完整导出的时间"""
+        with self.db.transaction() as conn:
+            if snapshot_at is None:
+                conn.execute("UPDATE export_state SET last_id = ? WHERE output_file = ?",
+                             (last_id, os.path.abspath(output_file)))
+            else:
+                conn.execute("INSERT OR REPLACE INTO export_state (output_file, last_id, snapshot_at) VALUES (?, ?, ?)",
+                             (os.path.abspath(output_file), last_id, snapshot_at))
+    
+    def reset_export_state(self, output_file=None):
+        """清除导出进度，下次增量导出时完整导出；output_file 为None时清除所有文件的进度"""
+        with self.db.transaction() as conn:
+            if output_file is None:
+                conn.execute("DELETE FROM export_state")
+            else:
+                conn.execute("DELETE FROM export_state WHERE output_file = ?", (os.path.abspath(output_file),))
+    
+    def fetch_records_after(self, last_id=0, limit=None):
+        """
+        读取id大于指定值的新闻记录（按id升序），用于增量消费
+
+        参数:
+        last_id: 上次读取到的最大id
+        limit: 限制读取的记录数，None表示读取所有新记录
+
+        返回:
+        记录字典列表，列和时间字段格式与 export_to_json 一致
+        """
+        query = f"SELECT {', '.join(self._export_columns())} FROM {self.table_name} WHERE id > ? ORDER BY id"
+        params = [last_id]
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        cursor = self.db.connection().execute(query, params)
+        return list(iter_cursor_records(cursor, EXPORT_BATCH_ROWS))
+    
+    def _export_columns(self):
+        """导出的列：表中除 INTERNAL_COLUMNS 之外的列，按表中顺序排列"""
+        return [column for column in self._table_columns if column not in INTERNAL_COLUMNS]
+    
+    def close(self):
+        """关闭所有线程打开的数据库连接"""
+        self.db.close()
+    
+    def integrate(self, metrics=None):
+        """
+        集成所有处理后的数据到数据库
+
+        参数:
+        metrics: 本轮流水线的指标（CycleMetrics），每个导入的文件记录一条 import 阶段明细
+
+        返回:
+        导入的记录数
+        """
         files = self.get_processed_files()
         if not files:
             logger.info("没有新的处理后文件需要导入")
-            return
+            return 0
         
         logger.info(f"发现 {len(files)} 个处理后文件需要导入")
         total_records = 0
         
         for file_path in files:
             logger.info(f"正在导入文件: {file_path}")
+            start = time.perf_counter()
             records = self.import_to_database(file_path)
+            if records is None:
+                # 导入失败，文件留在处理后目录中，下次重试
+                continue
             total_records += records
+            if metrics is not None:
+                metrics.add_file("import", file_path, time.perf_counter() - start, rows_in=records, rows_out=records,
+                                 bytes_in=os.path.getsize(file_path))
             
-            if records > 0:
-                self.move_imported_file(file_path)
+            # 重复导入的记录已被忽略，即使没有新记录也移走文件，避免每轮重复读取
+            self.move_imported_file(file_path)
         
         logger.info(f"数据集成完成，共导入 {total_records} 条记录")
-        
-        # 导入完成后，自动导出为JSON文件
-        if total_records > 0:
-            self.export_to_json()
+        return total_records
 
 def main():
-    integrator = NewsDataIntegrator()
-    integrator.integrate()
+    parser = argparse.ArgumentParser(description='将处理后的新闻数据导入数据库')
+    parser.add_argument('--config', '-c', default='config.json', help='配置文件路径')
+    parser.add_argument('--compact', action='store_true', help='删除数据库中内容重复的新闻并创建唯一索引，然后退出')
+    parser.add_argument('--rebuild-search-index', action='store_true', help='重新创建全文索引，然后退出')
+    parser.add_argument('--search', '-s', default=None, help='按关键词搜索新闻（多个词用空格分隔），输出结果后退出')
+    parser.add_argument('--limit', '-l', type=int, default=20, help='搜索返回的最大结果数')
+    parser.add_argument('--retention', action='store_true', help='把超过保留期的新闻按月移到分区文件并压缩旧分区，然后退出')
+    parser.add_argument('--list-partitions', action='store_true', help='列出已移出主库的月份分区，然后退出')
+    args = parser.parse_args()
+    
+    integrator = NewsDataIntegrator(args.config)
+    if args.compact:
+        integrator.compact()
+        return
+    if args.rebuild_search_index:
+        integrator.rebuild_search_index()
+        return
+    if args.retention:
+        integrator.apply_retention()
+        return
+    if args.list_partitions:
+        for partition in integrator.partitions.list_partitions():
+            state = "已压缩" if partition["compressed"] else "未压缩"
+            print(f"{partition['month']}  {state}  {partition['bytes'] / 1024 / 1024:>8.1f} MB  {partition['file']}")
+        return
+    if args.search is not None:
+        for result in integrator.search(args.search, args.limit):
+            score = f"{result['score']:.2f}" if result['score'] is not None else '-'
+            print(f"[{result['id']}] {result['publish_time']} {result['title']}（{result['source']}，相关度 {score}）")
+            print(f"    {result['snippet']}")
+        return
+    
+    # 导入完成后，将新记录增量导出到JSON文件
+    if integrator.integrate() > 0:
+        export_config = integrator.config.get("export", {})
+        integrator.export_incremental(
+            integrator.config.get("output_json_file", "data/news_data.json"),
+            export_config.get("snapshot_interval_minutes", 60)
+        )
     
     # 如果需要单独导出JSON文件
     # integrator.export_to_json()
@@ -1,12 +1,20 @@
 import os
 import json
+import argparse
+import numpy as np
 import pandas as pd
 import time
 from datetime import datetime
 import logging
-import re
-import html
-from bs4 import BeautifulSoup
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from file_scanner import RawFileScanner, FileStabilityGate, SUPPORTED_EXTENSIONS
+from stream_loader import iter_record_batches
+from text_cleaner import TextCleaner, HTML_BACKENDS
+from clean_cache import CleanTextCache
+from ingest_schema import IngestSchema
+from time_parser import PublishTimeParser
+from processed_io import ProcessedFileWriter, INTERMEDIATE_FORMATS, resolve_format
 
 # 配置日志
 logging.basicConfig(
@@ -20,7 +28,8 @@ logging.basicConfig(
 logger = logging.getLogger("NewsDataProcessor")
 
 class NewsDataProcessor:
-    def __init__(self, input_dir, output_dir, archive_dir=None):
+    def __init__(self, input_dir, output_dir, archive_dir=None, stability_gate=None, batch_size=5000, workers=1,
+                 html_backend='auto', clean_cache=None, ingest_schema=None, time_parser=None, intermediate_format='auto'):
         """
         初始化数据处理器
         
@@ -28,42 +37,50 @@ class NewsDataProcessor:
         input_dir: 八爪鱼采集器输出数据的目录
         output_dir: 处理后数据的输出目录
         archive_dir: 处理完成后原始数据的归档目录
+        stability_gate: 文件写入完成检测器，None表示使用默认设置
+        batch_size: 流式读取时每批的记录数
+        workers: 并行清理的进程数，1表示在当前进程中串行清理
+        html_backend: HTML去标签后端（auto、fast、lxml 或 bs4）
+        clean_cache: 清理结果缓存（CleanTextCache），None表示不使用缓存
+        ingest_schema: 读取模式（IngestSchema），None表示保留所有列并由pandas推断类型
+        time_parser: 发布时间解析器（PublishTimeParser），None表示使用默认格式
+        intermediate_format: 处理后文件的格式（auto、parquet 或 csv），auto 表示安装了pyarrow时使用Parquet
         """
         self.input_dir = input_dir
         self.output_dir = output_dir
         self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self.workers = workers
+        self.stability_gate = stability_gate or FileStabilityGate()
         
         # 确保目录存在
         os.makedirs(input_dir, exist_ok=True)
         os.makedirs(output_dir, exist_ok=True)
         if archive_dir:
             os.makedirs(archive_dir, exist_ok=True)
+        
+        # 输入目录扫描器，未变化的子目录复用上次的列举结果
+        self.scanner = RawFileScanner(input_dir)
+        
+        # 文本清理引擎，正则表达式只编译一次
+        self.text_cleaner = TextCleaner(html_backend)
+        # 重复出现的原始文本直接复用上次的清理结果
+        self.clean_cache = clean_cache
+        self.ingest_schema = ingest_schema or IngestSchema()
+        # 记住各来源使用的时间格式，按格式分组向量化解析
+        self.time_parser = time_parser or PublishTimeParser()
+        # Parquet保留列类型，集成器读取时不需要重新解析文本
+        self.intermediate_format = resolve_format(intermediate_format)
+        # 最近一次 process_files 中处理失败、仍留在输入目录中等待重试的文件
+        self.failed_files = []
     
     def get_new_files(self):
         """获取输入目录中尚未处理的新文件"""
-        files = []
-        
-        # 原有的非递归搜索
         logger.info(f"搜索目录: {self.input_dir}")
-        for filename in os.listdir(self.input_dir):
-            file_path = os.path.join(self.input_dir, filename)
-            # 如果是文件且符合扩展名要求，添加到列表
-            if os.path.isfile(file_path) and (filename.endswith('.json') or filename.endswith('.csv')):
-                files.append(file_path)
-                logger.info(f"找到文件: {file_path}")
-        
-        # 递归搜索子目录
-        for root, dirs, dir_files in os.walk(self.input_dir):
-            # 跳过顶级目录，因为已经在上面处理过了
-            if root == self.input_dir:
-                continue
-                
-            logger.info(f"搜索子目录: {root}")
-            for filename in dir_files:
-                if filename.endswith('.json') or filename.endswith('.csv'):
-                    file_path = os.path.join(root, filename)
-                    files.append(file_path)
-                    logger.info(f"在子目录中找到文件: {file_path}")
+        files = []
+        for file_info in self.scanner.scan():
+            files.append(file_info['path'])
+            logger.debug(f"找到文件: {file_info['path']}")
         
         if not files:
             logger.info("没有找到任何符合条件的文件")
@@ -82,67 +99,7 @@ class NewsDataProcessor:
         返回:
         清理后的文本
         """
-        if not isinstance(text, str):
-            return text
-        
-        # 先处理一些常见的CSS样式定义，完全移除它们
-        css_patterns = [
-            r'ct_hqimg\s*\{[^\}]*\}',
-            r'\.hqimg_wrapper\s*\{[^\}]*\}',
-            r'[a-zA-Z0-9_\-\.]+\s*\{[^\}]*\}',  # 通用CSS规则
-            r'<style[^>]*>.*?</style>'  # 样式标签
-        ]
-        
-        for pattern in css_patterns:
-            text = re.sub(pattern, '', text, flags=re.DOTALL)
-            
-        # 解码HTML实体
-        text = html.unescape(text)
-        
-        # 使用BeautifulSoup去除HTML标签
-        try:
-            # 只有当文本看起来像HTML时才使用BeautifulSoup
-            if '<' in text and '>' in text:
-                soup = BeautifulSoup(text, 'html.parser')
-                text = soup.get_text()
-        except:
-            # 如果BeautifulSoup处理失败，使用正则表达式去除HTML标签
-            text = re.sub(r'<[^>]+>', ' ', text)
-        
-        # 去除常见的CSS类名和ID
-        text = re.sub(r'(class|id|style)=["\'][^"\']+["\']', ' ', text)
-        
-        # 去除JavaScript代码
-        text = re.sub(r'<script[^>]*>.*?</script>', ' ', text, flags=re.DOTALL)
-        
-        # 去除可能的URL
-        text = re.sub(r'https?://\S+', '', text)
-        
-        # 去除常见的无意义文本
-        patterns_to_remove = [
-            r'图片来源：.*?网络',
-            r'来源：.*?网',
-            r'编辑：.*?[\s,，。；;]',
-            r'记者：.*?[\s,，。；;]',
-            r'责任编辑：.*?[\s,，。；;]',
-            r'作者：.*?[\s,，。；;]',
-            r'发布时间：.*?[\s,，。；;]',
-            r'更新时间：.*?[\s,，。；;]'
-        ]
-        
-        for pattern in patterns_to_remove:
-            text = re.sub(pattern, '', text)
-        
-        # 去除多余的空白字符（空格、制表符、换行符等）
-        text = re.sub(r'\s+', ' ', text)
-        
-        # 去除特殊控制字符
-        text = re.sub(r'[\x00-\x1F\x7F]', '', text)
-        
-        # 最终修剪
-        text = text.strip()
-        
-        return text
+        return self.text_cleaner.clean(text)
     
     def clean_news_data(self, df):
         """
@@ -165,35 +122,24 @@ class NewsDataProcessor:
         # 根据具体情况填充或删除缺失值
         df = df.dropna(subset=['title', 'content'])  # 删除标题或内容为空的行
         
-        # 3. 格式化日期时间字段
+        # 3. 格式化日期时间字段，无法解析的值为空，解析失败的比例记录在日志中
         if 'publish_time' in df.columns:
-            try:
-                df['publish_time'] = pd.to_datetime(df['publish_time'])
-            except:
-                logger.warning("无法转换publish_time字段为日期时间格式")
-        
-        # 4. 文本清理
-        if 'title' in df.columns:
-            df['title'] = df['title'].apply(lambda x: self.clean_text(x))
-            # 删除清理后标题为空的行
-            df = df[df['title'].str.strip() != '']
-            
-        if 'content' in df.columns:
-            df['content'] = df['content'].apply(lambda x: self.clean_text(x))
-            # 删除清理后内容为空的行
-            df = df[df['content'].str.strip() != '']
-            
+            sources = df['source'] if 'source' in df.columns else None
+            df['publish_time'], _ = self.time_parser.parse(df['publish_time'], sources)
+        
+        # 4. 文本清理：每列一次遍历得到清理后的文本和长度，合并所有过滤条件后只筛选一次
+        # 清理结果已去除首尾空白，长度条件同时排除了清理后为空的行
+        keep = np.ones(len(df), dtype=bool)
+        for column, min_length in (('title', 5), ('content', 20)):  # 标题至少5个字符，内容至少20个字符
+            if column in df.columns:
+                cleaned, lengths = self.text_cleaner.clean_column(df[column], self.clean_cache)
+                df[column] = cleaned
+                keep &= lengths > min_length
+        df = df[keep]
+        
         # 5. 添加处理时间戳
         df['processed_at'] = datetime.now()
         
-        # 6. 删除内容过短的行（可能是无效内容）
-        if 'content' in df.columns:
-            df = df[df['content'].str.len() > 20]  # 内容至少20个字符
-            
-        # 7. 删除标题过短的行
-        if 'title' in df.columns:
-            df = df[df['title'].str.len() > 5]  # 标题至少5个字符
-        
         return df
     
     def load_file(self, file_path):
@@ -206,23 +152,67 @@ class NewsDataProcessor:
         返回:
         DataFrame对象
         """
+        if not file_path.endswith(SUPPORTED_EXTENSIONS):
+            logger.error(f"不支持的文件格式: {file_path}")
+            return pd.DataFrame()
         try:
-            if file_path.endswith('.json'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                if isinstance(data, list):
-                    return pd.DataFrame(data)
-                else:
-                    return pd.DataFrame([data])
-            elif file_path.endswith('.csv'):
-                return pd.read_csv(file_path, encoding='utf-8')
-            else:
-                logger.error(f"不支持的文件格式: {file_path}")
+            batches = list(self.iter_file_batches(file_path))
+            if not batches:
                 return pd.DataFrame()
+            # 各批次的分类列取值不同，合并后重新转换类型
+            return self.ingest_schema.cast(pd.concat(batches, ignore_index=True))
         except Exception as e:
             logger.error(f"加载文件 {file_path} 时出错: {str(e)}")
             return pd.DataFrame()
     
+    def iter_file_batches(self, file_path):
+        """
+        分批加载数据文件，JSON和JSONL文件流式读取，CSV文件按 chunksize 分块读取，
+        内存占用与文件大小无关。按读取模式选取列、转换类型，并丢弃缺少必填字段的行
+        
+        参数:
+        file_path: 文件路径
+        
+        返回:
+        DataFrame的生成器，每个最多 batch_size 行
+        """
+        schema = self.ingest_schema
+        rejected = 0
+        if file_path.endswith('.json') or file_path.endswith('.jsonl'):
+            for batch in iter_record_batches(file_path, self.batch_size):
+                df, batch_rejected = schema.records_to_frame(batch)
+                rejected += batch_rejected
+                yield df
+        elif file_path.endswith('.csv'):
+            with pd.read_csv(file_path, encoding='utf-8', chunksize=self.batch_size, **schema.csv_options()) as reader:
+                for chunk in reader:
+                    df, batch_rejected = schema.apply(chunk)
+                    rejected += batch_rejected
+                    yield df
+        else:
+            raise ValueError(f"不支持的文件格式: {file_path}")
+        
+        if rejected:
+            logger.info(f"{os.path.basename(file_path)} 中有 {rejected} 行缺少必填字段 {schema.required_fields}，已在读取时丢弃")
+    
+    def open_processed_output(self, original_filename, output_dir=None):
+        """
+        新建处理后的输出文件，用于逐批追加写入
+
+        参数:
+        original_filename: 原始文件名
+        output_dir: 输出目录，None表示 self.output_dir
+
+        返回:
+        ProcessedFileWriter 实例，写完后需要调用 close()
+        """
+        output_dir = output_dir or self.output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base_name = os.path.splitext(os.path.basename(original_filename))[0]
+        extension = '.parquet' if self.intermediate_format == 'parquet' else '.csv'
+        return ProcessedFileWriter(os.path.join(output_dir, f"{base_name}_processed_{timestamp}{extension}"))
+    
     def save_processed_data(self, df, original_filename):
         """
         保存处理后的数据
@@ -230,20 +220,24 @@ class NewsDataProcessor:
         参数:
         df: 处理后的DataFrame
         original_filename: 原始文件名
+        
+        返回:
+        输出文件路径，没有数据可保存时返回None
         """
         if df.empty:
-            logger.warning(f"没有数据可保存，跳过 {original_filename}")
-            return
-            
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_name = os.path.splitext(os.path.basename(original_filename))[0]
-        output_file = os.path.join(self.output_dir, f"{base_name}_processed_{timestamp}.csv")
+            logger.debug(f"没有数据可保存，跳过 {original_filename}")
+            return None
         
+        writer = self.open_processed_output(original_filename)
         try:
-            df.to_csv(output_file, index=False, encoding='utf-8')
-            logger.info(f"已保存处理后的数据到 {output_file}")
+            writer.write(df)
+            writer.close()
+            logger.info(f"已保存 {len(df)} 条处理后的数据到 {writer.path}")
         except Exception as e:
+            writer.discard()
             logger.error(f"保存处理后的数据时出错: {str(e)}")
+            raise
+        return writer.path
     
     def archive_file(self, file_path):
         """
@@ -260,46 +254,285 @@ class NewsDataProcessor:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             archive_path = os.path.join(self.archive_dir, f"{timestamp}_{filename}")
             os.rename(file_path, archive_path)
+            self.stability_gate.remove_marker(file_path)
             logger.info(f"已归档文件 {file_path} 到 {archive_path}")
         except Exception as e:
             logger.error(f"归档文件 {file_path} 时出错: {str(e)}")
     
-    def process(self):
-        """处理所有新文件"""
-        files = self.get_new_files()
+    def _iter_file_tasks(self, files):
+        """
+        依次产生每个文件的数据批次
+
+        返回:
+        (文件路径, 批次) 的生成器；批次为DataFrame，加载出错时为异常对象，
+        每个文件结束时产生一个 None 作为结束标记
+        """
+        for file_path in files:
+            logger.info(f"正在处理文件: {file_path}")
+            try:
+                for df in self.iter_file_batches(file_path):
+                    yield file_path, df
+            except Exception as e:
+                yield file_path, e
+            yield file_path, None
+    
+    def _clean_batches(self, tasks):
+        """
+        清理数据批次，workers 大于1时在进程池中并行清理
+        
+        结果按提交顺序返回，同时在途的批次数不超过 workers 的两倍，内存占用有上限。
+        
+        返回:
+        (文件路径, 原始批次, 清理结果) 的生成器，清理出错时清理结果为异常对象
+        """
+        if self.workers <= 1:
+            for file_path, item in tasks:
+                cleaned = None
+                if isinstance(item, pd.DataFrame):
+                    try:
+                        cleaned = self.clean_news_data(item)
+                    except Exception as e:
+                        cleaned = e
+                yield file_path, item, cleaned
+            return
+        
+        window = deque()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_clean_worker, initargs=(self,)) as executor:
+            for file_path, item in tasks:
+                future = executor.submit(_clean_in_worker, item) if isinstance(item, pd.DataFrame) else None
+                window.append((file_path, item, future))
+                if len(window) >= self.workers * 2:
+                    yield self._resolve_clean_task(*window.popleft())
+            while window:
+                yield self._resolve_clean_task(*window.popleft())
+    
+    def _resolve_clean_task(self, file_path, item, future):
+        if future is None:
+            return file_path, item, None
+        try:
+            cleaned, cache_stats = future.result()
+        except Exception as e:
+            return file_path, item, e
+        # 汇总工作进程中的缓存统计
+        if cache_stats and self.clean_cache is not None:
+            self.clean_cache.merge_stats(cache_stats)
+        return file_path, item, cleaned
+    
+    def log_cache_stats(self):
+        """记录并清零清理结果缓存的命中率和节省的时间"""
+        if self.clean_cache is None:
+            return
+        stats = self.clean_cache.take_stats()
+        if not stats["lookups"]:
+            return
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        logger.info(f"清理缓存: 查询 {stats['lookups']} 次，命中 {hits} 次（{hits / stats['lookups']:.1%}，"
+                    f"内存 {stats['memory_hits']}，磁盘 {stats['disk_hits']}），"
+                    f"清理耗时 {stats['clean_seconds']:.2f} 秒，节省约 {stats['saved_seconds']:.2f} 秒")
+    
+    def process_files(self, files, sink=None, archive=True, audit_dir=None, metrics=None, sink_transaction=None):
+        """
+        分批加载、清理并保存文件，每批记录一次吞吐量
+        
+        参数:
+        files: 文件路径列表
+        sink: 接收每批清理后DataFrame的函数（例如直接导入数据库），None表示追加写入处理后文件
+        archive: 处理成功后是否归档原始文件
+        audit_dir: 指定了 sink 时，另外将清理后的数据写入该目录供审计和调试，None表示不写文件
+        metrics: 本轮流水线的指标（CycleMetrics），每个成功处理的文件记录一条 clean 阶段明细
+        sink_transaction: 返回事务上下文管理器的函数（例如数据库连接管理器的 transaction）。文件的所有批次清理完成后
+                          才开启事务，在同一个事务中依次把各批交给 sink，清理期间不占用数据库写锁；导入失败时
+                          回滚，重试时不会重复导入。该文件清理后的数据在导入前暂存在内存中；
+                          None表示每批清理后立即交给 sink，由 sink 独立提交，内存占用与文件大小无关
+        
+        返回:
+        {文件路径: (读取的行数, 保存的行数)}，只包含成功处理的文件；处理失败的文件记录在 self.failed_files 中
+        """
+        results = {}
+        state = {}
+        self.failed_files = []
+        batch_start = time.time()
+        
+        for file_path, raw_df, cleaned_df in self._clean_batches(self._iter_file_tasks(files)):
+            file_state = state.get(file_path)
+            if file_state is None:
+                file_state = state[file_path] = {"output": None, "rows_in": 0, "rows_out": 0, "batches": 0, "error": None,
+                                                 "pending": [], "started": time.perf_counter()}
+        
+            if raw_df is None:
+                # 文件结束
+                del state[file_path]
+                writer = file_state["output"]
+                if file_state["error"] is None and writer is not None:
+                    try:
+                        writer.close()
+                    except Exception as e:
+                        file_state["error"] = e
+                # 整个文件清理完成后在一个事务中导入；导入失败时回滚，原始文件重试时整个文件重新导入
+                self._sink_pending(file_state, sink, sink_transaction)
+                if file_state["error"] is not None:
+                    # 处理失败时删除不完整的输出，原始文件保留在输入目录中等待重试
+                    if writer is not None:
+                        writer.discard()
+                    logger.error(f"处理文件 {file_path} 时出错: {str(file_state['error'])}")
+                    self.failed_files.append(file_path)
+                    continue
+                if file_state["batches"] == 0:
+                    logger.warning(f"文件 {file_path} 没有有效数据，跳过")
+                    continue
+                if writer is not None and writer.rows:
+                    logger.info(f"已保存处理后的数据到 {writer.path}")
+                elif writer is not None:
+                    writer.discard()
+                logger.info(f"文件 {file_path} 读取 {file_state['rows_in']} 行，清理后保留 {file_state['rows_out']} 行")
+                results[file_path] = (file_state["rows_in"], file_state["rows_out"])
+                if metrics is not None:
+                    metrics.add_file(
+                        "clean", file_path, time.perf_counter() - file_state["started"],
+                        rows_in=file_state["rows_in"], rows_out=file_state["rows_out"],
+                        bytes_in=os.path.getsize(file_path),
+                        bytes_out=os.path.getsize(writer.path) if writer is not None and writer.rows else 0
+                    )
+                if archive:
+                    self.archive_file(file_path)
+                continue
+        
+            if file_state["error"] is not None:
+                continue
+            if isinstance(raw_df, Exception) or isinstance(cleaned_df, Exception):
+                file_state["error"] = raw_df if isinstance(raw_df, Exception) else cleaned_df
+                continue
+        
+            try:
+                if sink is not None and not cleaned_df.empty:
+                    if sink_transaction is not None:
+                        file_state["pending"].append(cleaned_df)
+                    else:
+                        sink(cleaned_df)
+                if sink is None or audit_dir:
+                    if file_state["output"] is None:
+                        file_state["output"] = self.open_processed_output(file_path, audit_dir if sink is not None else None)
+                    file_state["output"].write(cleaned_df)
+            except Exception as e:
+                file_state["error"] = e
+                continue
+        
+            file_state["batches"] += 1
+            file_state["rows_in"] += len(raw_df)
+            file_state["rows_out"] += len(cleaned_df)
+            elapsed = time.time() - batch_start
+            logger.info(f"{os.path.basename(file_path)} 第 {file_state['batches']} 批: 读取 {len(raw_df)} 行，保留 {len(cleaned_df)} 行，"
+                        f"耗时 {elapsed:.2f} 秒（{len(raw_df) / max(elapsed, 1e-6):.0f} 行/秒）")
+            batch_start = time.time()
+        
+        self.log_cache_stats()
+        return results
+    
+    def _sink_pending(self, file_state, sink, sink_transaction):
+        """在一个事务中把文件暂存的各批清理结果交给 sink；文件已出错时直接丢弃，导入失败记为该文件的错误"""
+        pending, file_state["pending"] = file_state["pending"], []
+        if not pending or file_state["error"] is not None:
+            return
+        try:
+            with sink_transaction():
+                for cleaned_df in pending:
+                    sink(cleaned_df)
+        except Exception as e:
+            file_state["error"] = e
+    
+    def process(self, files=None, sink=None, audit_dir=None, metrics=None, sink_transaction=None):
+        """
+        处理新文件
+        
+        参数:
+        files: 只处理指定的文件路径列表，None表示处理输入目录中的所有新文件
+        sink: 接收每批清理后DataFrame的函数，None表示写入处理后文件，见 process_files
+        audit_dir: 指定了 sink 时另外写入清理后数据的目录，见 process_files
+        metrics: 本轮流水线的指标（CycleMetrics），见 process_files
+        sink_transaction: 每个文件的 sink 调用所在的事务，见 process_files
+        
+        返回:
+        仍在写入、本次推迟处理的文件路径列表
+        """
+        if files is None:
+            files = self.get_new_files()
+        else:
+            # 事件指定的文件可能已被归档或删除
+            files = [f for f in files if f.endswith(SUPPORTED_EXTENSIONS) and os.path.isfile(f)]
+        
+        # 采集器仍在写入的文件留到下次处理，避免读到不完整的数据
+        files, pending = self.stability_gate.split(files)
+        if pending:
+            logger.info(f"{len(pending)} 个文件仍在写入，推迟处理: {pending[:5]}")
         if not files:
+            self.failed_files = []
             logger.info("没有新文件需要处理")
-            return
+            return pending
             
         logger.info(f"发现 {len(files)} 个新文件需要处理")
         
-        for file_path in files:
-            logger.info(f"正在处理文件: {file_path}")
-            
-            # 加载数据
-            df = self.load_file(file_path)
-            if df.empty:
-                logger.warning(f"文件 {file_path} 没有有效数据，跳过")
-                continue
-                
-            # 清理数据
-            cleaned_df = self.clean_news_data(df)
-            
-            # 保存处理后的数据
-            self.save_processed_data(cleaned_df, file_path)
-            
-            # 归档原始文件
-            self.archive_file(file_path)
+        # 分批加载、清理并保存（或交给 sink）数据，成功后归档原始文件
+        self.process_files(files, sink=sink, audit_dir=audit_dir, metrics=metrics, sink_transaction=sink_transaction)
             
         logger.info("所有文件处理完成")
+        return pending
+
+# 进程池工作进程中使用的处理器实例
+_worker_processor = None
+
+def _init_clean_worker(processor):
+    global _worker_processor
+    _worker_processor = processor
+
+def _clean_in_worker(df):
+    cleaned = _worker_processor.clean_news_data(df)
+    cache = _worker_processor.clean_cache
+    return cleaned, cache.take_stats() if cache is not None else None
 
 def main():
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description='清理八爪鱼采集器输出的新闻数据')
+    parser.add_argument('--backfill', '-b', default=None, help='分块回填指定的历史数据文件（CSV/JSON/JSONL），不归档原文件')
+    parser.add_argument('--to-db', action='store_true', help='回填时将清理后的数据直接导入数据库，而不是写入处理后文件')
+    parser.add_argument('--audit-dir', default=None, help='配合 --to-db 使用，另外将清理后的数据写入该目录供审计')
+    parser.add_argument('--batch-size', type=int, default=5000, help='每批处理的行数')
+    parser.add_argument('--workers', '-w', type=int, default=1, help='并行清理的进程数')
+    parser.add_argument('--html-backend', choices=HTML_BACKENDS, default='auto', help='HTML去标签后端')
+    parser.add_argument('--intermediate-format', choices=INTERMEDIATE_FORMATS, default='auto', help='处理后文件的格式，auto 表示安装了pyarrow时使用Parquet')
+    parser.add_argument('--cache-db', default=None, help='清理结果缓存的SQLite文件，不指定时只在内存中缓存')
+    parser.add_argument('--config', '-c', default='config.json', help='配置文件路径（读取模式 data_cleaning.schema，以及 --to-db 的数据库设置）')
+    args = parser.parse_args()
+    
     # 配置目录
     input_dir = "data/raw"  # 八爪鱼采集器输出数据的目录
     output_dir = "data/processed"  # 处理后数据的输出目录
     archive_dir = "data/archive"  # 处理完成后原始数据的归档目录
     
-    processor = NewsDataProcessor(input_dir, output_dir, archive_dir)
+    cleaning_config = {}
+    if os.path.exists(args.config):
+        with open(args.config, 'r', encoding='utf-8') as f:
+            cleaning_config = json.load(f).get("data_cleaning", {})
+    
+    processor = NewsDataProcessor(
+        input_dir, output_dir, archive_dir,
+        batch_size=args.batch_size, workers=args.workers, html_backend=args.html_backend,
+        clean_cache=CleanTextCache(db_file=args.cache_db),
+        ingest_schema=IngestSchema.from_config(cleaning_config),
+        time_parser=PublishTimeParser(**cleaning_config.get("publish_time", {})),
+        intermediate_format=args.intermediate_format
+    )
+    
+    if args.backfill:
+        sink = None
+        if args.to_db:
+            from data_integrator import NewsDataIntegrator
+            sink = NewsDataIntegrator(args.config).import_dataframe
+        start = time.time()
+        rows_in, rows_out = processor.process_files([args.backfill], sink=sink, archive=False,
+                                                    audit_dir=args.audit_dir).get(args.backfill, (0, 0))
+        elapsed = time.time() - start
+        logger.info(f"回填完成: 读取 {rows_in} 行，保留 {rows_out} 行，耗时 {elapsed:.1f} 秒（{rows_in / max(elapsed, 1e-6):.0f} 行/秒）")
+        return
     
     # 运行一次处理
     processor.process()
@@ -311,4 +544,4 @@ def main():
     #     time.sleep(600)  # 每10分钟运行一次
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
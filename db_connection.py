@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger("SQLiteConnectionManager")
+
+
+class SQLiteConnectionManager:
+    """
+    SQLite连接管理器
+
+    每个线程复用自己的一个连接（sqlite3 连接不能跨线程使用），打开时统一设置：
+    - journal_mode=WAL：读写互不阻塞，监视器的读取线程不会被导入阻塞
+    - synchronous：WAL模式下 NORMAL 只在检查点时同步磁盘，断电最多丢失最近提交的事务，不会损坏数据库
+    - cache_size / mmap_size：页缓存和内存映射的大小
+    - busy_timeout：其他连接持有写锁时等待而不是立即报错
+
+    连接使用自动提交模式，需要原子性的多条语句放在 transaction() 中执行。
+    """
+
+    def __init__(self, db_file, synchronous="NORMAL", cache_size_kb=65536, mmap_size_mb=256, busy_timeout=30):
+        """
+        初始化连接管理器
+
+        参数:
+        db_file: 数据库文件路径
+        synchronous: PRAGMA synchronous 的取值（OFF、NORMAL、FULL）
+        cache_size_kb: 每个连接的页缓存大小（KB）
+        mmap_size_mb: 内存映射读取的大小（MB），0表示不使用内存映射
+        busy_timeout: 等待写锁的秒数
+        """
+        self.db_file = db_file
+        self.synchronous = synchronous
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size_mb = mmap_size_mb
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+        db_dir = os.path.dirname(db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, db_file, sqlite_config):
+        """根据配置文件中的 integration.sqlite 部分创建连接管理器"""
+        return cls(
+            db_file,
+            synchronous=sqlite_config.get("synchronous", "NORMAL"),
+            cache_size_kb=sqlite_config.get("cache_size_kb", 65536),
+            mmap_size_mb=sqlite_config.get("mmap_size_mb", 256),
+            busy_timeout=sqlite_config.get("busy_timeout", 30)
+        )
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_file, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        # 负数表示以KB为单位
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size_mb) * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def connection(self):
+        """返回当前线程的连接，第一次调用时打开"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+            self._local.depth = 0
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        在当前线程的连接上执行一个事务，正常结束时提交，出错时回滚
+
+        使用 BEGIN IMMEDIATE 在开始时就获取写锁，避免事务中途因锁升级失败而回滚。
+        嵌套调用时只有最外层开启和提交事务。
+        """
+        conn = self.connection()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+        finally:
+            self._local.depth = 0
+
+    def close(self):
+        """关闭所有线程打开的连接"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.error(f"关闭数据库连接时出错: {str(e)}")
+        self._local = threading.local()
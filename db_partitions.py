@@ -0,0 +1,300 @@
+import os
+import re
+import gzip
+import shutil
+import logging
+from datetime import datetime
+
+logger = logging.getLogger("MonthlyPartitions")
+
+# 分区所属的月份：优先按发布时间，没有发布时间时按导入时间
+_MONTH_SQL = "substr(COALESCE(publish_time, imported_at), 1, 7)"
+
+# 只有能识别为 YYYY-MM 的月份才会移出，无法识别的时间留在主库中
+_MONTH_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]"
+
+# 附加分区库时使用的库名
+_ALIAS = "partition_db"
+
+
+def shift_month(month, months):
+    """将 YYYY-MM 格式的月份前后移动若干个月"""
+    year, mon = map(int, month.split('-'))
+    index = year * 12 + (mon - 1) + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class MonthlyPartitions:
+    """
+    按月分区的冷数据存储
+
+    主库（热分区）只保留最近 hot_months 个月的新闻，更早的月份按月移到分区目录下单独的SQLite文件
+    （<表名>_YYYY_MM.db），可以用 ATTACH DATABASE 查询；超过 compress_after_months 个月的分区压缩为 .db.gz。
+    导入、导出和搜索都只访问主库，耗时和主库的大小只与最近几个月的数据量有关。
+
+    移动分两个事务：先把记录复制到分区库（INSERT OR IGNORE，按 content_hash 去重），提交后再从主库删除，
+    中途出错时记录仍在主库中，下次重新移动即可。已移出的月份之后又导入了新闻时，下次运行会合并到该月的分区中。
+
+    移出的记录的 content_hash 登记在主库的 <表名>_moved_hashes 表中，新闻表上的触发器忽略与其重复的插入，
+    重新采集或重新导入已移出的新闻不会在主库中产生新的记录，也不会被监视器当作新记录再次分析。
+    """
+
+    def __init__(self, db, table_name, partition_dir="data/partitions", hot_months=6, compress_after_months=12):
+        """
+        初始化分区存储
+
+        参数:
+        db: 主库的连接管理器（SQLiteConnectionManager）
+        table_name: 新闻表名
+        partition_dir: 分区文件所在目录
+        hot_months: 主库保留的月数（包括当前月份）
+        compress_after_months: 早于多少个月的分区压缩为 .db.gz，None表示不压缩
+        """
+        if hot_months < 1:
+            raise ValueError(f"hot_months 至少为1: {hot_months}")
+        self.db = db
+        self.table_name = table_name
+        self.partition_dir = partition_dir
+        self.hot_months = hot_months
+        self.compress_after_months = compress_after_months
+        self._file_pattern = re.compile(rf"^{re.escape(table_name)}_(\d{{4}})_(\d{{2}})\.db(\.gz)?$")
+        # 移出记录的 content_hash 登记表（在主库中）
+        self.hash_table = f"{table_name}_moved_hashes"
+
+    @classmethod
+    def from_config(cls, db, table_name, retention_config):
+        """根据配置文件中的 retention 部分创建分区存储"""
+        return cls(
+            db, table_name,
+            partition_dir=retention_config.get("partition_dir", "data/partitions"),
+            hot_months=retention_config.get("hot_months", 6),
+            compress_after_months=retention_config.get("compress_after_months", 12)
+        )
+
+    def partition_file(self, month, compressed=False):
+        """某个月份的分区文件路径"""
+        path = os.path.join(self.partition_dir, f"{self.table_name}_{month.replace('-', '_')}.db")
+        return path + ".gz" if compressed else path
+
+    def list_partitions(self):
+        """
+        列出已有的分区（按月份排序）
+
+        返回:
+        字典列表，包含 month、file、compressed 和 bytes
+        """
+        if not os.path.isdir(self.partition_dir):
+            return []
+        partitions = []
+        for filename in sorted(os.listdir(self.partition_dir)):
+            match = self._file_pattern.match(filename)
+            if match:
+                path = os.path.join(self.partition_dir, filename)
+                partitions.append({
+                    "month": f"{match.group(1)}-{match.group(2)}",
+                    "file": path,
+                    "compressed": bool(match.group(3)),
+                    "bytes": os.path.getsize(path)
+                })
+        return partitions
+
+    def cutoff_month(self, now=None):
+        """主库保留的最早月份，早于该月份的记录会被移出"""
+        return shift_month((now or datetime.now()).strftime('%Y-%m'), -(self.hot_months - 1))
+
+    def cold_months(self, now=None):
+        """主库中需要移出的月份（从早到晚）"""
+        cutoff = self.cutoff_month(now) + "-01"
+        rows = self.db.connection().execute(f'''
+        SELECT DISTINCT {_MONTH_SQL} AS month FROM {self.table_name}
+        WHERE (publish_time < ? OR (publish_time IS NULL AND imported_at < ?)) AND month GLOB '{_MONTH_GLOB}'
+        ORDER BY month
+        ''', (cutoff, cutoff)).fetchall()
+        return [row[0] for row in rows]
+
+    def move_month(self, month):
+        """
+        把主库中某个月份的记录移到该月的分区库
+
+        参数:
+        month: YYYY-MM 格式的月份
+
+        返回:
+        从主库移出的记录数
+        """
+        os.makedirs(self.partition_dir, exist_ok=True)
+        path = self.partition_file(month)
+        compressed = self.partition_file(month, compressed=True)
+        if os.path.exists(compressed) and not os.path.exists(path):
+            # 已压缩的月份又有新记录：解压后合并，之后重新压缩
+            _gunzip(compressed, path)
+
+        conn = self.db.connection()
+        self.ensure_hash_registry()
+        start, end = month + "-01", shift_month(month, 1) + "-01"
+        # 只移动本次开始时已存在的记录，移动期间新导入的记录留到下次
+        max_id = conn.execute(f"SELECT MAX(id) FROM {self.table_name}").fetchone()[0] or 0
+        condition = f'''
+            id <= ? AND (
+                (publish_time >= ? AND publish_time < ?)
+                OR (publish_time IS NULL AND imported_at >= ? AND imported_at < ?)
+            )
+        '''
+        params = (max_id, start, end, start, end)
+
+        conn.execute(f"ATTACH DATABASE ? AS {_ALIAS}", (path,))
+        try:
+            # 分区库不使用WAL，整个分区是一个独立的文件，便于压缩和备份
+            conn.execute(f"PRAGMA {_ALIAS}.journal_mode=DELETE")
+            columns = self._ensure_partition_table(conn)
+            column_list = ', '.join(f'"{column}"' for column in columns)
+            with self.db.transaction():
+                copied = conn.execute(f'''
+                INSERT OR IGNORE INTO {_ALIAS}.{self.table_name} ({column_list})
+                SELECT {column_list} FROM main.{self.table_name} WHERE {condition}
+                ''', params).rowcount
+            with self.db.transaction():
+                # 与删除在同一个事务中登记 content_hash，删除后重复的新闻仍然无法再导入主库
+                conn.execute(f'''
+                INSERT OR IGNORE INTO main.{self.hash_table} (content_hash)
+                SELECT content_hash FROM main.{self.table_name} WHERE {condition} AND content_hash IS NOT NULL
+                ''', params)
+                removed = conn.execute(f"DELETE FROM main.{self.table_name} WHERE {condition}", params).rowcount
+        finally:
+            conn.execute(f"DETACH DATABASE {_ALIAS}")
+
+        if removed:
+            logger.info(f"已将 {month} 的 {removed} 条记录移到 {path}"
+                        + (f"（其中 {removed - copied} 条在分区中已存在）" if removed > copied else ""))
+        return removed
+
+    def has_hash_registry(self):
+        """主库中是否已有移出记录的 content_hash 登记表"""
+        return self.db.connection().execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.hash_table,)
+        ).fetchone() is not None
+
+    def ensure_hash_registry(self):
+        """
+        创建移出记录的 content_hash 登记表，以及忽略重复插入的触发器
+
+        触发器在插入之前执行，content_hash 已登记的记录被跳过，不计入插入的行数，与 INSERT OR IGNORE 忽略重复记录的效果相同。
+        """
+        with self.db.transaction() as conn:
+            conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.hash_table} (content_hash TEXT PRIMARY KEY) WITHOUT ROWID
+            ''')
+            conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {self.hash_table}_ignore BEFORE INSERT ON {self.table_name}
+            WHEN EXISTS (SELECT 1 FROM {self.hash_table} WHERE content_hash = new.content_hash)
+            BEGIN
+                SELECT RAISE(IGNORE);
+            END
+            ''')
+
+    def rebuild_hash_registry(self):
+        """
+        根据已有的分区登记 content_hash（用于登记表出现之前移出的分区），压缩的分区临时解压后读取
+
+        返回:
+        新登记的 content_hash 数
+        """
+        self.ensure_hash_registry()
+        conn = self.db.connection()
+        registered = 0
+        for partition in self.list_partitions():
+            path = partition["file"]
+            if partition["compressed"]:
+                path = self.partition_file(partition["month"]) + ".registry"
+                with gzip.open(partition["file"], 'rb') as src, open(path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+            try:
+                conn.execute(f"ATTACH DATABASE ? AS {_ALIAS}", (path,))
+                try:
+                    with self.db.transaction():
+                        registered += conn.execute(f'''
+                        INSERT OR IGNORE INTO main.{self.hash_table} (content_hash)
+                        SELECT content_hash FROM {_ALIAS}.{self.table_name} WHERE content_hash IS NOT NULL
+                        ''').rowcount
+                finally:
+                    conn.execute(f"DETACH DATABASE {_ALIAS}")
+            finally:
+                if partition["compressed"]:
+                    os.remove(path)
+        if registered:
+            logger.info(f"已根据已有的分区登记 {registered} 个移出记录的 content_hash")
+        return registered
+
+    def _ensure_partition_table(self, conn):
+        """在附加的分区库中创建与主库相同列的表和索引，返回主库的列名"""
+        info = conn.execute(f"PRAGMA main.table_info({self.table_name})").fetchall()
+        columns = [row[1] for row in info]
+        definitions = ', '.join(
+            f'"{name}" INTEGER PRIMARY KEY' if name == 'id' else f'"{name}" {col_type}'
+            for _, name, col_type, *_ in info
+        )
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {_ALIAS}.{self.table_name} ({definitions})")
+        # 分区创建之后主库新增的列
+        existing = {row[1] for row in conn.execute(f"PRAGMA {_ALIAS}.table_info({self.table_name})")}
+        for _, name, col_type, *_ in info:
+            if name not in existing:
+                conn.execute(f'ALTER TABLE {_ALIAS}.{self.table_name} ADD COLUMN "{name}" {col_type}')
+        conn.execute(f'''
+        CREATE UNIQUE INDEX IF NOT EXISTS {_ALIAS}.idx_content_hash ON {self.table_name} (content_hash)
+        ''')
+        conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS {_ALIAS}.idx_publish_time ON {self.table_name} (publish_time)
+        ''')
+        return columns
+
+    def compress_old(self, now=None):
+        """
+        压缩早于 compress_after_months 个月的分区
+
+        返回:
+        压缩的分区数
+        """
+        if self.compress_after_months is None:
+            return 0
+        cutoff = shift_month((now or datetime.now()).strftime('%Y-%m'), -self.compress_after_months)
+        compressed = 0
+        for partition in self.list_partitions():
+            if partition["compressed"] or partition["month"] >= cutoff:
+                continue
+            target = self.partition_file(partition["month"], compressed=True)
+            _gzip(partition["file"], target)
+            logger.info(f"已压缩分区 {partition['file']}（{partition['bytes'] / 1024 / 1024:.1f} MB → "
+                        f"{os.path.getsize(target) / 1024 / 1024:.1f} MB）")
+            compressed += 1
+        return compressed
+
+    def run(self, now=None):
+        """
+        执行一次保留策略：移出早于保留期的月份，然后压缩旧分区
+
+        返回:
+        (移出的记录数, 涉及的月份列表, 压缩的分区数)
+        """
+        if not self.has_hash_registry() and self.list_partitions():
+            # 登记表出现之前已经移出过记录
+            self.rebuild_hash_registry()
+        months = self.cold_months(now)
+        moved = sum(self.move_month(month) for month in months)
+        return moved, months, self.compress_old(now)
+
+
+def _gzip(source, target):
+    # 先写临时文件，压缩完成后再删除原文件
+    tmp_file = target + ".tmp"
+    with open(source, 'rb') as src, gzip.open(tmp_file, 'wb') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(tmp_file, target)
+    os.remove(source)
+
+
+def _gunzip(source, target):
+    tmp_file = target + ".tmp"
+    with gzip.open(source, 'rb') as src, open(tmp_file, 'wb') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(tmp_file, target)
+    os.remove(source)
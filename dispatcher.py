@@ -0,0 +1,147 @@
+import time
+import queue
+import logging
+import threading
+
+logger = logging.getLogger("TaskDispatcher")
+
+# 空闲的工作线程每隔多少秒检查一次是否已经停止
+POLL_SECONDS = 0.5
+
+
+class TaskDispatcher:
+    """
+    有界任务队列 + 固定数量的工作线程
+
+    - 队列满时 submit 按调用方指定的方式施加背压：阻塞等待（可设超时）或立即拒绝
+    - 带 key 的任务在排队期间会被合并，同一 key 最多只有一个任务在排队
+    - metrics() 返回队列深度、运行中任务数等统计信息
+    """
+
+    def __init__(self, workers=2, max_queue_size=100, name="Dispatcher"):
+        """
+        初始化任务分发器
+
+        参数:
+        workers: 工作线程数量
+        max_queue_size: 队列最大长度
+        name: 线程名前缀
+        """
+        self.workers = max(1, workers)
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._queued_keys = set()
+        self._threads = []
+        self._stopping = threading.Event()
+        self._active = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "coalesced": 0,
+            "max_queue_depth": 0
+        }
+
+    def start(self):
+        """启动工作线程"""
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"{self.name}-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"{self.name} 已启动 {self.workers} 个工作线程，队列上限 {self._queue.maxsize}")
+
+    def stop(self, wait=True):
+        """
+        停止工作线程，已排队的任务会先执行完
+
+        只设置停止标志，不向队列中放入结束标记，队列已满时也不会阻塞；之后的 submit 被拒绝。
+        """
+        self._stopping.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def submit(self, func, *args, key=None, block=True, timeout=None, **kwargs):
+        """
+        提交任务
+
+        参数:
+        func: 要执行的函数
+        key: 合并键，同一 key 已有任务在排队时本次提交直接合并
+        block: 队列满时是否阻塞等待
+        timeout: 阻塞等待的最长秒数
+
+        返回:
+        任务是否已入队（或被合并到已排队的任务）
+        """
+        if self._stopping.is_set():
+            logger.warning(f"{self.name} 已停止，拒绝任务 {key or func.__name__}")
+            return False
+
+        with self._lock:
+            if key is not None:
+                if key in self._queued_keys:
+                    self._stats["coalesced"] += 1
+                    return True
+                self._queued_keys.add(key)
+
+        try:
+            self._queue.put((key, func, args, kwargs), block=block, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+                if key is not None:
+                    self._queued_keys.discard(key)
+            logger.warning(f"{self.name} 队列已满（{self._queue.maxsize}），拒绝任务 {key or func.__name__}")
+            return False
+
+        with self._lock:
+            self._stats["submitted"] += 1
+            depth = self._queue.qsize()
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+        return True
+
+    def metrics(self):
+        """返回队列深度和任务统计"""
+        with self._lock:
+            metrics = dict(self._stats)
+            metrics["queue_depth"] = self._queue.qsize()
+            metrics["active"] = self._active
+        return metrics
+
+    def _worker(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                # 队列已空：停止后退出，否则继续等待
+                if self._stopping.is_set():
+                    return
+                continue
+
+            key, func, args, kwargs = item
+            with self._lock:
+                # 任务开始执行后，同一 key 的新提交需要重新排队
+                if key is not None:
+                    self._queued_keys.discard(key)
+                self._active += 1
+
+            start = time.time()
+            try:
+                func(*args, **kwargs)
+                with self._lock:
+                    self._stats["completed"] += 1
+            except Exception as e:
+                logger.error(f"{self.name} 执行任务 {key or func.__name__} 时出错: {str(e)}")
+                with self._lock:
+                    self._stats["failed"] += 1
+            finally:
+                with self._lock:
+                    self._active -= 1
+                self._queue.task_done()
+                logger.debug(f"任务 {key or func.__name__} 耗时 {time.time() - start:.2f} 秒")
@@ -0,0 +1,61 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class PathEventQueue:
+    """
+    按文件路径合并事件的工作队列
+
+    同一路径在处理前收到的多次事件只保留最后一次的时间，
+    路径在最后一次事件之后静默 settle_seconds 秒才会被取出。
+    事件不会被丢弃：处理期间到达的新事件会让路径重新入队。
+    """
+
+    def __init__(self, settle_seconds=3):
+        self.settle_seconds = settle_seconds
+        # 路径 -> 最后一次事件的时间（按首次入队顺序排列）
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+
+    def put(self, path):
+        """记录一个路径上的事件"""
+        with self._cond:
+            self._pending[path] = time.monotonic()
+            self._cond.notify()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+    def get_ready(self, timeout=None):
+        """
+        取出所有已静默足够时间的路径
+
+        参数:
+        timeout: 最长等待秒数，None表示一直等待直到有路径就绪
+
+        返回:
+        就绪路径列表（按入队顺序），超时则返回空列表
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                ready = [path for path, last in self._pending.items() if now - last >= self.settle_seconds]
+                if ready:
+                    for path in ready:
+                        del self._pending[path]
+                    return ready
+
+                # 等到最早的路径静默结束，或者有新事件到达
+                if self._pending:
+                    wait = self.settle_seconds - (now - min(self._pending.values()))
+                else:
+                    wait = None
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return []
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
@@ -17,7 +17,7 @@ logger = logging.getLogger("ExportJSON")
 def main():
     # 解析命令行参数
     parser = argparse.ArgumentParser(description='从数据库导出新闻数据为JSON文件')
-    parser.add_argument('--output', '-o', default='data/news_data.json', help='输出的JSON文件路径')
+    parser.add_argument('--output', '-o', default='data/news_data.json', help='输出的JSON文件路径，扩展名为 .jsonl 时每行写一个JSON对象')
     parser.add_argument('--limit', '-l', type=int, default=None, help='限制导出的记录数')
     parser.add_argument('--config', '-c', default='config.json', help='配置文件路径')
     args = parser.parse_args()
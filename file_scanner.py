@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import logging
+
+logger = logging.getLogger("RawFileScanner")
+
+# 采集器输出的数据文件扩展名
+SUPPORTED_EXTENSIONS = ('.json', '.jsonl', '.csv')
+
+# 目录修改时间距扫描时刻小于该秒数时不信任缓存（文件系统时间戳精度有限）
+RACY_SECONDS = 2
+
+
+class RawFileScanner:
+    """
+    基于 os.scandir 的原始数据目录扫描器
+
+    每个目录缓存其修改时间、数据文件的 (mtime, size) 和子目录列表。
+    再次扫描时，修改时间未变的目录复用缓存的文件名和子目录列表而不重新列举，
+    只对每个目录和缓存中的每个数据文件各做一次 stat；有变化的目录用 scandir 列举，
+    文件类型判断复用 DirEntry 中的信息，每个数据文件只需一次 stat。
+
+    原地改写或追加已有文件不会改变目录修改时间，但会改变文件本身的 (mtime, size)，
+    因此逐个 stat 缓存中的文件即可发现；需要时可以调用 scan(full=True) 强制全量扫描。
+    """
+
+    def __init__(self, root_dir, extensions=SUPPORTED_EXTENSIONS, index_file=None):
+        """
+        初始化扫描器
+
+        参数:
+        root_dir: 要扫描的根目录
+        extensions: 需要收集的文件扩展名
+        index_file: 持久化目录索引的JSON文件路径，None表示只在内存中缓存
+        """
+        self.root_dir = root_dir
+        self.extensions = tuple(extensions)
+        self.index_file = index_file
+        # 目录路径 -> {"mtime_ns", "racy", "files": {文件名: [mtime, size]}, "subdirs": [子目录路径]}
+        self._dirs = {}
+        self._dirty = False
+        self.load_index()
+
+    def load_index(self):
+        """从磁盘加载目录索引"""
+        if not self.index_file or not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self._dirs = json.load(f)
+            logger.info(f"已加载 {len(self._dirs)} 个目录的扫描索引")
+        except Exception as e:
+            logger.error(f"加载扫描索引时出错: {str(e)}")
+            self._dirs = {}
+
+    def save_index(self):
+        """将目录索引保存到磁盘（仅在有变化时写入）"""
+        if not self.index_file or not self._dirty:
+            return
+        try:
+            tmp_file = self.index_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._dirs, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_file, self.index_file)
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"保存扫描索引时出错: {str(e)}")
+
+    def scan(self, full=False):
+        """
+        扫描根目录，返回所有数据文件的信息
+
+        参数:
+        full: 为True时忽略缓存，重新列举所有目录
+
+        返回:
+        字典列表，每项包含 path、name、mtime、size，按路径排序
+        """
+        if not os.path.isdir(self.root_dir):
+            logger.warning(f"输入目录 {self.root_dir} 不存在")
+            return []
+
+        now = time.time()
+        seen = set()
+        files = []
+        self._scan_dir(self.root_dir, full, now, seen, files)
+
+        # 清理已经不存在的目录
+        for dir_path in list(self._dirs):
+            if dir_path not in seen:
+                del self._dirs[dir_path]
+                self._dirty = True
+
+        files.sort(key=lambda item: item['path'])
+        return files
+
+    def _scan_dir(self, dir_path, full, now, seen, files):
+        try:
+            dir_mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            return
+        seen.add(dir_path)
+
+        cached = self._dirs.get(dir_path)
+        if full or cached is None or cached["racy"] or cached["mtime_ns"] != dir_mtime_ns:
+            cached = self._list_dir(dir_path, dir_mtime_ns, now)
+            if cached is None:
+                return
+            self._dirs[dir_path] = cached
+            self._dirty = True
+        else:
+            self._restat_files(dir_path, cached)
+
+        for name, (mtime, size) in cached["files"].items():
+            files.append({
+                'path': os.path.join(dir_path, name),
+                'name': name,
+                'mtime': mtime,
+                'size': size
+            })
+
+        for subdir in cached["subdirs"]:
+            self._scan_dir(subdir, full, now, seen, files)
+
+    def _restat_files(self, dir_path, cached):
+        """重新 stat 缓存中的数据文件，发现原地改写或追加的文件"""
+        entry_files = cached["files"]
+        for name in list(entry_files):
+            try:
+                st = os.stat(os.path.join(dir_path, name))
+            except OSError:
+                # 文件已被删除（目录修改时间在时间戳精度内未变化）
+                del entry_files[name]
+                self._dirty = True
+                continue
+            if entry_files[name] != [st.st_mtime, st.st_size]:
+                entry_files[name] = [st.st_mtime, st.st_size]
+                self._dirty = True
+
+    def _list_dir(self, dir_path, dir_mtime_ns, now):
+        entry_files = {}
+        subdirs = []
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.name.endswith(self.extensions) and entry.is_file():
+                            st = entry.stat()
+                            entry_files[entry.name] = [st.st_mtime, st.st_size]
+                    except OSError:
+                        # 文件在扫描过程中被移走或删除
+                        continue
+        except OSError as e:
+            logger.error(f"扫描目录 {dir_path} 时出错: {str(e)}")
+            return None
+
+        return {
+            "mtime_ns": dir_mtime_ns,
+            "racy": dir_mtime_ns / 1e9 >= now - RACY_SECONDS,
+            "files": entry_files,
+            "subdirs": sorted(subdirs)
+        }
+
+
+class FileStabilityGate:
+    """
+    采集器文件写入完成检测
+
+    文件满足以下条件才被认为写入完成：
+    - 大小不为0，且最后修改时间距今不少于 stable_seconds 秒
+    - 配置了 ready_marker_suffix 时，同名标记文件（如 news.json.done）已存在
+    - JSON文件末尾是完整的 ']' 或 '}'，避免读到写了一半的文件
+
+    文件静默超过 max_wait_seconds 后不再等待标记文件和完整的结尾：记录警告后照常处理，
+    避免文件被无限期地推迟，内容不完整时由加载步骤报告错误。
+    """
+
+    def __init__(self, stable_seconds=2, ready_marker_suffix=None, max_wait_seconds=60):
+        """
+        初始化检测器
+
+        参数:
+        stable_seconds: 文件最后修改后需要静默的秒数
+        ready_marker_suffix: 写入完成标记文件的后缀，None表示不使用标记文件
+        max_wait_seconds: 标记文件不存在或JSON文件末尾不完整时，文件静默后最多等待的秒数
+        """
+        self.stable_seconds = stable_seconds
+        self.ready_marker_suffix = ready_marker_suffix
+        self.max_wait_seconds = max_wait_seconds
+
+    def is_ready(self, file_path, stat_result=None):
+        """
+        判断文件是否已经写入完成
+
+        参数:
+        file_path: 文件路径
+        stat_result: 已有的 os.stat 结果，可避免重复 stat
+
+        返回:
+        写入完成返回True
+        """
+        try:
+            st = stat_result or os.stat(file_path)
+        except OSError:
+            return False
+
+        age = time.time() - st.st_mtime
+        if st.st_size == 0 or age < self.stable_seconds:
+            return False
+
+        if self.ready_marker_suffix and not os.path.exists(file_path + self.ready_marker_suffix):
+            if age < self.max_wait_seconds:
+                return False
+            logger.warning(f"{file_path} 静默已超过 {self.max_wait_seconds} 秒仍没有标记文件 "
+                           f"{self.ready_marker_suffix}，不再等待")
+
+        if file_path.endswith('.json') and age < self.max_wait_seconds and not self._json_complete(file_path, st.st_size):
+            return False
+
+        return True
+
+    def split(self, files):
+        """
+        将文件分为已写入完成和仍在写入的两组
+
+        返回:
+        (ready, pending) 两个路径列表
+        """
+        ready, pending = [], []
+        for file_path in files:
+            (ready if self.is_ready(file_path) else pending).append(file_path)
+        return ready, pending
+
+    def remove_marker(self, file_path):
+        """删除文件对应的写入完成标记"""
+        if not self.ready_marker_suffix:
+            return
+        try:
+            os.remove(file_path + self.ready_marker_suffix)
+        except OSError:
+            pass
+
+    def _json_complete(self, file_path, size):
+        try:
+            with open(file_path, 'rb') as f:
+                f.seek(max(0, size - 64))
+                tail = f.read().rstrip()
+        except OSError:
+            return False
+        return tail.endswith((b']', b'}'))
@@ -0,0 +1,127 @@
+import math
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("IngestSchema")
+
+# 配置中的类型名 -> pandas dtype；None 表示沿用读取时推断的类型
+SCHEMA_DTYPES = {
+    "str": object,
+    "category": "category",
+    "int": "Int64",
+    "float": "float64",
+    "auto": None
+}
+
+
+def _is_missing(value):
+    if value is None:
+        return True
+    if isinstance(value, str):
+        # 与 not value.strip() 等价，但遇到第一个非空白字符就返回，不复制字符串
+        return not value or value.isspace()
+    return isinstance(value, float) and math.isnan(value)
+
+
+class IngestSchema:
+    """
+    采集器数据的读取模式
+
+    声明需要读取的列及其类型，以及必填字段：
+    - CSV文件只解析声明的列（usecols），并直接按声明的类型读取，不做类型推断
+    - JSON记录在构建DataFrame之前就丢弃缺少必填字段的记录，只取声明的列
+    - 每批数据都包含全部声明的列且顺序固定，缺少的列填充为空值
+    - 取值较少的字段（如 source）可以声明为 category，减少内存占用
+    """
+
+    def __init__(self, columns=None, required_fields=()):
+        """
+        初始化读取模式
+
+        参数:
+        columns: {列名: 类型名} 的有序字典，类型名见 SCHEMA_DTYPES；None表示保留所有列并推断类型
+        required_fields: 必填字段列表，缺少任一字段（空值或空白字符串）的行在读取时被丢弃
+        """
+        if columns:
+            unknown = [dtype for dtype in columns.values() if dtype not in SCHEMA_DTYPES]
+            if unknown:
+                raise ValueError(f"未知的列类型: {unknown}，可选值: {', '.join(SCHEMA_DTYPES)}")
+        self.columns = dict(columns) if columns else None
+        self.required_fields = list(required_fields or ())
+
+    @classmethod
+    def from_config(cls, cleaning_config):
+        """根据配置文件中的 data_cleaning 部分创建读取模式"""
+        return cls(cleaning_config.get("schema"), cleaning_config.get("required_fields", ()))
+
+    def _dtypes(self):
+        return {
+            column: SCHEMA_DTYPES[dtype] for column, dtype in (self.columns or {}).items()
+            if SCHEMA_DTYPES[dtype] is not None
+        }
+
+    def csv_options(self):
+        """返回传给 pd.read_csv 的 usecols 和 dtype 参数"""
+        if not self.columns:
+            return {}
+        columns = set(self.columns)
+        return {"usecols": lambda column: column in columns, "dtype": self._dtypes()}
+
+    def records_to_frame(self, records):
+        """
+        将JSON记录转换为DataFrame，先丢弃缺少必填字段的记录
+
+        返回:
+        (DataFrame, 丢弃的记录数)
+        """
+        required = self.required_fields
+        if required:
+            kept = [
+                record for record in records
+                if isinstance(record, dict) and not any(_is_missing(record.get(field)) for field in required)
+            ]
+        else:
+            kept = records
+        rejected = len(records) - len(kept)
+
+        if self.columns:
+            df = pd.DataFrame.from_records(kept, columns=list(self.columns))
+            df = self.cast(df)
+        else:
+            df = pd.DataFrame(kept)
+        return df, rejected
+
+    def apply(self, df):
+        """
+        对已读取的DataFrame（如CSV分块）补齐声明的列，并丢弃缺少必填字段的行
+
+        返回:
+        (DataFrame, 丢弃的行数)
+        """
+        if self.columns:
+            df = self.cast(df.reindex(columns=list(self.columns)))
+        if not self.required_fields or df.empty:
+            return df, 0
+
+        keep = np.ones(len(df), dtype=bool)
+        for field in self.required_fields:
+            if field not in df.columns:
+                keep[:] = False
+                break
+            values = df[field]
+            if values.dtype == object:
+                keep &= np.fromiter((not _is_missing(value) for value in values.tolist()), dtype=bool, count=len(values))
+            else:
+                keep &= values.notna().to_numpy()
+        rejected = int((~keep).sum())
+        return (df[keep] if rejected else df), rejected
+
+    def cast(self, df):
+        """将声明了类型的列转换为对应的类型"""
+        dtypes = {
+            column: dtype for column, dtype in self._dtypes().items()
+            if column in df.columns and df[column].dtype != dtype
+        }
+        return df.astype(dtypes) if dtypes else df
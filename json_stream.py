@@ -0,0 +1,165 @@
+import os
+import json
+import sqlite3
+
+# 导出文件格式：json 为JSON数组（每行一条记录），jsonl 为每行一个JSON对象
+EXPORT_FORMATS = ('json', 'jsonl')
+
+# 紧凑的分隔符，不输出多余的空格
+encode_record = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def format_for(file_path):
+    """根据扩展名判断导出格式，.jsonl 为 jsonl，其他为 json"""
+    return 'jsonl' if file_path.endswith('.jsonl') else 'json'
+
+
+def is_time_column(column):
+    """列名包含 time 或 date 的列在导出时格式化为 %Y-%m-%d %H:%M:%S"""
+    return 'time' in column.lower() or 'date' in column.lower()
+
+
+def format_time_value(value):
+    """将数据库中的时间值格式化为 %Y-%m-%d %H:%M:%S，无法识别的值原样返回"""
+    if not isinstance(value, str) or len(value) < 19:
+        return value
+    if value[4] == '-' and value[7] == '-' and value[10] in ' T' and value[13] == ':' and value[16] == ':':
+        return value[:10] + ' ' + value[11:19]
+    return value
+
+
+# format_time_value 能识别的时间文本：日期、空格或T、时分秒，之后可以有小数秒或时区
+_TIME_GLOB = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9][ T][0-9][0-9]:[0-9][0-9]:[0-9][0-9]*'
+
+
+def has_json_functions(conn):
+    """SQLite 是否支持 json_object（3.38 之前需要编译时启用 JSON1 扩展）"""
+    try:
+        conn.execute("SELECT json_object('a', 1)").fetchone()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def json_object_sql(columns):
+    """
+    生成由SQLite直接把一行编码为紧凑JSON对象的SQL表达式
+
+    时间列按 format_time_value 的规则格式化，输出与 encode_record 对 iter_cursor_records 的结果一致。
+
+    参数:
+    columns: 按表中顺序排列的列名
+    """
+    parts = []
+    for column in columns:
+        value = f'"{column}"'
+        if is_time_column(column):
+            value = (f"CASE WHEN {value} GLOB '{_TIME_GLOB}'"
+                     f" THEN substr({value}, 1, 10) || ' ' || substr({value}, 12, 8) ELSE {value} END")
+        parts.append(f"'{column}', {value}")
+    return f"json_object({', '.join(parts)})"
+
+
+def iter_cursor_rows(cursor, batch_size=5000):
+    """用 fetchmany 逐批读取已执行查询的游标，逐行产生结果，内存占用只与 batch_size 有关"""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+
+
+def iter_cursor_records(cursor, batch_size=5000):
+    """
+    逐批读取已执行查询的游标，逐条产生记录字典，时间列按 format_time_value 格式化
+
+    参数:
+    cursor: 已执行 SELECT 的 sqlite3 游标
+    batch_size: 每次 fetchmany 读取的行数
+    """
+    columns = [description[0] for description in cursor.description]
+    time_columns = [i for i, column in enumerate(columns) if is_time_column(column)]
+    for row in iter_cursor_rows(cursor, batch_size):
+        if time_columns:
+            row = list(row)
+            for i in time_columns:
+                row[i] = format_time_value(row[i])
+        yield dict(zip(columns, row))
+
+
+def write_lines(f, lines, fmt='json', batch_size=5000):
+    """
+    将已编码的JSON对象流式写入文本文件对象
+
+    json 格式写出一个数组，每行一条记录，与 append_records 兼容；jsonl 格式每行一个对象。
+
+    参数:
+    f: 以文本模式打开的文件对象
+    lines: 每条记录的JSON文本（不含换行）的可迭代对象
+    fmt: json 或 jsonl
+    batch_size: 每攒够多少条记录写入一次
+
+    返回:
+    写入的记录数
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"未知的导出格式: {fmt}，可选值: {', '.join(EXPORT_FORMATS)}")
+    if fmt == 'json':
+        separator, head, tail = ',\n', '[\n', '\n]'
+    else:
+        separator, head, tail = '\n', '', '\n'
+    count = 0
+    pending = []
+    for line in lines:
+        pending.append(line)
+        if len(pending) >= batch_size:
+            f.write((separator if count else head) + separator.join(pending))
+            count += len(pending)
+            pending = []
+    if pending:
+        f.write((separator if count else head) + separator.join(pending))
+        count += len(pending)
+    if count:
+        f.write(tail)
+    elif fmt == 'json':
+        f.write('[]')
+    return count
+
+
+def append_records(file_path, records, fmt=None):
+    """
+    在已有的导出文件末尾原地追加记录，只写入新增部分
+
+    json 格式要求文件是以 '}' 和 ']' 结尾的非空JSON数组（json.dump 或 write_lines 写出的格式均可），
+    否则抛出 ValueError；jsonl 格式直接追加行。
+
+    参数:
+    file_path: 导出文件路径
+    records: 记录字典的列表
+    fmt: json 或 jsonl，None表示根据扩展名判断
+
+    返回:
+    写入的字节数
+    """
+    fmt = fmt or format_for(file_path)
+    if fmt == 'jsonl':
+        data = ''.join(encode_record(record) + '\n' for record in records).encode('utf-8')
+        with open(file_path, 'ab') as f:
+            f.write(data)
+        return len(data)
+
+    with open(file_path, 'r+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        start = max(0, size - 64)
+        f.seek(start)
+        tail = f.read().rstrip()
+        if not tail.endswith(b']'):
+            raise ValueError(f"{file_path} 不是JSON数组")
+        body = tail[:-1].rstrip()
+        if not body.endswith(b'}'):
+            raise ValueError(f"{file_path} 是空数组或格式无法识别")
+        data = (''.join(',\n' + encode_record(record) for record in records) + '\n]').encode('utf-8')
+        f.seek(start + len(body))
+        f.write(data)
+        f.truncate()
+    return len(data)
@@ -0,0 +1,128 @@
+import re
+import hashlib
+import logging
+from collections import deque, Counter
+
+import numpy as np
+
+logger = logging.getLogger("NearDuplicateIndex")
+
+# 计算指纹前去除空白、标点和数字，避免来源后缀、排版和行情数字的差异影响指纹
+_NORMALIZE_PATTERN = re.compile(r'[\s\d\W_]+')
+
+
+class SimHashIndex:
+    """
+    基于SimHash的近似重复新闻索引
+
+    每篇新闻按字符n-gram计算64位SimHash指纹。汉明距离不超过 max_distance 的
+    两个指纹，按鸽巢原理至少有一个分段完全相同，因此把指纹切成 max_distance+1 段，
+    每段建一个哈希表，查询时只需比较与某一段相同的候选，而不是扫描所有指纹。
+    索引只保留最近的 window_size 条新闻。
+    """
+
+    def __init__(self, max_distance=3, window_size=10000, shingle_size=3):
+        """
+        初始化索引
+
+        参数:
+        max_distance: 视为近似重复的最大汉明距离
+        window_size: 索引保留的最近新闻数量
+        shingle_size: 字符n-gram的长度
+        """
+        self.max_distance = max_distance
+        self.window_size = window_size
+        self.shingle_size = shingle_size
+
+        bands = max_distance + 1
+        width = 64 // bands
+        # 每段的 (位移, 掩码)，最后一段包含剩余的位
+        self._bands = []
+        for i in range(bands):
+            shift = i * width
+            bits = 64 - shift if i == bands - 1 else width
+            self._bands.append((shift, (1 << bits) - 1))
+        self._tables = [{} for _ in self._bands]
+        self._window = deque()
+
+    def fingerprint(self, text):
+        """计算文本的64位SimHash指纹，文本过短时返回None"""
+        if not isinstance(text, str):
+            return None
+        text = _NORMALIZE_PATTERN.sub('', text.lower())
+        n = self.shingle_size
+        if len(text) < n:
+            return None
+
+        shingles = Counter(text[i:i + n] for i in range(len(text) - n + 1))
+        digests = b''.join(
+            hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest() for shingle in shingles
+        )
+        hashes = np.frombuffer(digests, dtype='>u8')
+        weights = np.fromiter(shingles.values(), dtype=np.int64, count=len(shingles))
+
+        # 每个n-gram哈希的第k位为1时加上其权重，为0时减去
+        bits = np.unpackbits(hashes.view(np.uint8)).reshape(-1, 64).astype(np.int64)
+        scores = (weights[:, None] * (2 * bits - 1)).sum(axis=0)
+
+        fp = 0
+        for bit in scores > 0:
+            fp = (fp << 1) | int(bit)
+        return fp
+
+    def find(self, fp):
+        """
+        查找与指纹近似的已有新闻
+
+        返回:
+        最接近的 (key, 汉明距离)，没有时返回 None
+        """
+        if fp is None:
+            return None
+        best = None
+        checked = set()
+        for (shift, mask), table in zip(self._bands, self._tables):
+            for key, other in table.get((fp >> shift) & mask, ()):
+                if key in checked:
+                    continue
+                checked.add(key)
+                distance = bin(fp ^ other).count('1')
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (key, distance)
+        return best
+
+    def add(self, key, fp):
+        """将新闻指纹加入索引，超出窗口时移除最旧的新闻"""
+        if fp is None:
+            return
+        entry = (key, fp)
+        for (shift, mask), table in zip(self._bands, self._tables):
+            table.setdefault((fp >> shift) & mask, []).append(entry)
+        self._window.append(entry)
+
+        while len(self._window) > self.window_size:
+            old = self._window.popleft()
+            old_fp = old[1]
+            for (shift, mask), table in zip(self._bands, self._tables):
+                band = (old_fp >> shift) & mask
+                bucket = table.get(band)
+                if bucket:
+                    bucket.remove(old)
+                    if not bucket:
+                        del table[band]
+
+    def check_and_add(self, key, text):
+        """
+        检查文本是否与最近的新闻近似重复，不重复时加入索引
+
+        返回:
+        近似重复时返回 (已有新闻的key, 汉明距离)，否则返回 None
+        """
+        fp = self.fingerprint(text)
+        match = self.find(fp)
+        if match is None:
+            self.add(key, fp)
+        return match
+
+    def __len__(self):
+        return len(self._window)
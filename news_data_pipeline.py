@@ -5,7 +5,12 @@ import logging
 import schedule
 from datetime import datetime
 from data_processor import NewsDataProcessor
+from file_scanner import FileStabilityGate
+from clean_cache import CleanTextCache
+from ingest_schema import IngestSchema
+from time_parser import PublishTimeParser, DEFAULT_FORMATS
 from data_integrator import NewsDataIntegrator
+from pipeline_metrics import PipelineMetrics, CycleMetrics
 
 # 配置日志
 logging.basicConfig(
@@ -37,6 +42,9 @@ class NewsDataPipeline:
         self.archive_dir = self.config["data_paths"]["archive_dir"]
         self.interval_minutes = self.config["processing"]["interval_minutes"]
         self.run_continuously = self.config["processing"]["run_continuously"]
+        # 内存模式下清理后的数据直接导入数据库，不经过处理后文件
+        self.in_memory = self.config["processing"].get("in_memory", True)
+        self.audit_dir = self.config["processing"].get("audit_dir")
         
         # 确保所有目录存在
         os.makedirs(self.input_dir, exist_ok=True)
@@ -45,8 +53,36 @@ class NewsDataPipeline:
         
         logger.info(f"初始化数据处理器和集成器")
         # 初始化处理器和集成器
-        self.processor = NewsDataProcessor(self.input_dir, self.output_dir, self.archive_dir)
+        stability_config = self.config.get("file_stability", {})
+        stability_gate = FileStabilityGate(
+            stable_seconds=stability_config.get("stable_seconds", 2),
+            ready_marker_suffix=stability_config.get("ready_marker_suffix"),
+            max_wait_seconds=stability_config.get("max_wait_seconds", 60)
+        )
+        cache_config = self.config.get("data_cleaning", {}).get("cache", {})
+        clean_cache = None
+        if cache_config.get("enabled", True):
+            clean_cache = CleanTextCache(
+                max_entries=cache_config.get("max_entries", 100000),
+                db_file=cache_config.get("db_file"),
+                max_disk_entries=cache_config.get("max_disk_entries", 1000000)
+            )
+        self.processor = NewsDataProcessor(
+            self.input_dir, self.output_dir, self.archive_dir, stability_gate,
+            batch_size=self.config["processing"].get("batch_size", 5000),
+            workers=self.config["processing"].get("workers", 1),
+            html_backend=self.config.get("data_cleaning", {}).get("html_backend", "auto"),
+            clean_cache=clean_cache,
+            ingest_schema=IngestSchema.from_config(self.config.get("data_cleaning", {})),
+            time_parser=PublishTimeParser(**self.config.get("data_cleaning", {}).get("publish_time", {})),
+            intermediate_format=self.config["processing"].get("intermediate_format", "auto")
+        )
         self.integrator = NewsDataIntegrator(config_file)
+        # 每轮记录各阶段的耗时、行数和字节数
+        metrics_config = self.config.get("metrics", {})
+        self.metrics = PipelineMetrics.from_config(metrics_config) if metrics_config.get("enabled", True) else None
+        # 上次执行保留策略的时间
+        self.last_retention_at = None
     
     def _ensure_config_keys(self):
         """确保配置中包含所有必要的键"""
@@ -105,34 +141,96 @@ class NewsDataPipeline:
             },
             "processing": {
                 "interval_minutes": 10,
-                "run_continuously": False
+                "run_continuously": False,
+                "in_memory": True,
+                "audit_dir": None,
+                "intermediate_format": "auto"
             },
             "integration": {
                 "target_db_file": "news_database.db",
-                "table_name": "news_articles"
+                "table_name": "news_articles",
+                "sqlite": {
+                    "synchronous": "NORMAL",
+                    "cache_size_kb": 65536,
+                    "mmap_size_mb": 256,
+                    "busy_timeout": 30
+                },
+                "fts": {
+                    "enabled": False,
+                    "tokenizer": "trigram"
+                }
+            },
+            "export": {
+                "incremental": True,
+                "snapshot_interval_minutes": 60
+            },
+            "retention": {
+                "enabled": False,
+                "hot_months": 6,
+                "partition_dir": "data/partitions",
+                "compress_after_months": 12,
+                "interval_hours": 24,
+                "vacuum": True
+            },
+            "metrics": {
+                "enabled": True,
+                "json_file": "data/pipeline_metrics.jsonl",
+                "prometheus_file": None,
+                "max_cycles": 200
             },
             "data_cleaning": {
                 "remove_duplicates": True,
                 "drop_empty_content": True,
-                "required_fields": ["title", "content", "publish_time", "source"]
+                "required_fields": ["title", "content", "publish_time", "source"],
+                "schema": {
+                    "title": "str",
+                    "content": "str",
+                    "publish_time": "str",
+                    "source": "category",
+                    "url": "str"
+                },
+                "publish_time": {
+                    "formats": DEFAULT_FORMATS,
+                    "timezone": "Asia/Shanghai"
+                },
+                "html_backend": "auto",
+                "cache": {
+                    "enabled": True,
+                    "max_entries": 100000,
+                    "db_file": None,
+                    "max_disk_entries": 1000000
+                }
             }
         }
     
-    def run_pipeline(self):
-        """运行完整的数据处理流水线"""
+    def run_pipeline(self, files=None):
+        """
+        运行完整的数据处理流水线
+        
+        参数:
+        files: 只处理指定的原始文件，None表示处理输入目录中的所有文件
+        
+        返回:
+        仍在写入、本次推迟处理的原始文件列表
+        """
         logger.info("开始运行数据处理流水线...")
+        pending_files = []
+        cycle = self.metrics.start_cycle() if self.metrics is not None else CycleMetrics()
         
         try:
             # 步骤1: 处理新数据
             logger.info("步骤1: 处理新数据")
             
+            if files is not None:
+                logger.info(f"本次只处理 {len(files)} 个指定文件: {files[:5]}")
+            
             # 添加调试信息 - 检查目录结构
             logger.info(f"数据输入目录: {self.input_dir} (存在: {os.path.exists(self.input_dir)})")
             logger.info(f"数据输出目录: {self.output_dir} (存在: {os.path.exists(self.output_dir)})")
             logger.info(f"数据归档目录: {self.archive_dir} (存在: {os.path.exists(self.archive_dir)})")
             
             # 添加调试信息 - 列出目录中的文件
-            if os.path.exists(self.input_dir):
+            if files is None and os.path.exists(self.input_dir):
                 all_files = os.listdir(self.input_dir)
                 logger.info(f"输入目录中的所有项: {all_files}")
                 
@@ -142,27 +240,69 @@ class NewsDataPipeline:
                     if os.path.isdir(item_path):
                         logger.info(f"子目录 {item} 中的文件: {os.listdir(item_path)[:5]}...等")
             
-            # 处理数据
-            self.processor.process()
+            # 处理数据；内存模式下每批清理结果直接导入数据库，只在配置了 audit_dir 时另外写文件
+            # 导入的耗时计入 import 阶段，不计入 clean 阶段；每个文件清理完成后在一个事务中导入，
+            # 处理到一半失败的文件不会留下已导入的批次，重试时不会重复导入
+            with cycle.stage("clean"):
+                if self.in_memory:
+                    pending_files = self.processor.process(
+                        files, sink=cycle.timed_sink("import", self.integrator.import_dataframe),
+                        audit_dir=self.audit_dir, metrics=cycle, sink_transaction=cycle.timed_context("import", self.integrator.db.transaction)
+                    ) or []
+                else:
+                    pending_files = self.processor.process(files, metrics=cycle) or []
             
             # 步骤2: 将处理后的数据集成到数据库
+            # 内存模式下数据已在步骤1中导入，这里只导入处理后目录中遗留的文件（如单独运行处理器生成的文件）
             logger.info("步骤2: 将处理后的数据集成到数据库")
-            self.integrator.integrate()
+            with cycle.stage("import"):
+                self.integrator.integrate(metrics=cycle)
             
-            # 步骤3: 导出为JSON文件，用于现有系统
-            logger.info("步骤3: 导出为JSON文件，用于现有系统")
+            # 步骤3: 按保留策略把旧新闻移到按月分区的文件（每 interval_hours 小时一次），
+            # 在导出之前执行，移出记录后本轮即重新完整导出
+            retention_config = self.config.get("retention", {})
+            if retention_config.get("enabled", False) and self._retention_due(retention_config.get("interval_hours", 24)):
+                logger.info("步骤3: 将超过保留期的新闻移到按月分区的文件")
+                with cycle.stage("retention") as stats:
+                    moved = self.integrator.apply_retention()
+                    stats["rows_in"] += moved
+                    stats["rows_out"] += moved
+                self.last_retention_at = time.time()
+            
+            # 步骤4: 导出为JSON文件，用于现有系统
+            logger.info("步骤4: 导出为JSON文件，用于现有系统")
             json_output_file = self.config.get("output_json_file", "data/news_data.json")
             
             # 确保输出目录存在
             os.makedirs(os.path.dirname(json_output_file), exist_ok=True)
             
-            records_exported = self.integrator.export_to_json(json_output_file)
+            # 增量导出只追加新记录，按 snapshot_interval_minutes 定期完整导出
+            export_config = self.config.get("export", {})
+            with cycle.stage("export") as stats:
+                if export_config.get("incremental", True):
+                    records_exported = self.integrator.export_incremental(
+                        json_output_file, export_config.get("snapshot_interval_minutes", 60)
+                    )
+                else:
+                    records_exported = self.integrator.export_to_json(json_output_file)
+                stats["rows_in"] += records_exported
+                stats["rows_out"] += records_exported
+                if records_exported > 0:
+                    stats["bytes_out"] += self.integrator.last_export_bytes
             if records_exported > 0:
                 logger.info(f"已将 {records_exported} 条记录导出到 {json_output_file}")
             
             logger.info("数据处理流水线运行完成")
         except Exception as e:
+            cycle.status = "error"
             logger.error(f"运行数据处理流水线时出错: {str(e)}")
+        if self.metrics is not None:
+            self.metrics.record(cycle)
+        return pending_files
+    
+    def _retention_due(self, interval_hours):
+        """距上次执行保留策略是否已超过 interval_hours 小时，本进程第一轮总是执行"""
+        return self.last_retention_at is None or time.time() - self.last_retention_at >= interval_hours * 3600
     
     def start(self):
         """启动数据处理流水线"""
@@ -4,6 +4,7 @@ import json
 import time
 import logging
 import hashlib
+import threading
 from datetime import datetime
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
@@ -13,6 +14,11 @@ sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 
 # 导入需要的模块
 from news_data_pipeline import NewsDataPipeline
+from record_store import create_record_store
+from file_scanner import RawFileScanner, SUPPORTED_EXTENSIONS
+from event_queue import PathEventQueue
+from dispatcher import TaskDispatcher
+from near_duplicate import SimHashIndex
 
 # 添加src目录到系统路径
 src_dir = os.path.join(os.path.dirname(__file__), 'src')
@@ -56,9 +62,14 @@ class NewsWatcher:
         self.news_data_file = self.config.get("output_json_file", "data/news_data.json")
         self.processed_records_file = self.config.get("watcher", {}).get("processed_records_file", "data/processed_records.json")
         self.check_interval = self.config.get("watcher", {}).get("check_interval_seconds", 30)
+        self.record_store_config = self.config.get("watcher", {}).get("record_store", {})
+        self.retention_days = self.record_store_config.get("retention_days")
+        self.last_eviction = 0
         
-        # 加载已处理记录
-        self.processed_records = self.load_processed_records()
+        # 加载已处理记录（首次运行时自动迁移旧版JSON记录文件）
+        os.makedirs(os.path.dirname(self.processed_records_file), exist_ok=True)
+        self.record_store = create_record_store(self.record_store_config, self.processed_records_file)
+        self.evict_expired_records()
         
         # 初始化数据处理流水线
         self.pipeline = NewsDataPipeline(config_file)
@@ -67,7 +78,6 @@ class NewsWatcher:
         os.makedirs(self.input_dir, exist_ok=True)
         os.makedirs(self.output_dir, exist_ok=True)
         os.makedirs(os.path.dirname(self.news_data_file), exist_ok=True)
-        os.makedirs(os.path.dirname(self.processed_records_file), exist_ok=True)
         
         # 如果文件不存在，创建一个空的JSON文件
         if not os.path.exists(self.news_data_file):
@@ -79,6 +89,37 @@ class NewsWatcher:
         # 读取上次处理时的文件状态（如果存在）
         self.raw_files_state_file = os.path.join(os.path.dirname(self.processed_records_file), "raw_files_state.json")
         self.load_raw_files_state()
+        
+        # raw目录扫描器（目录索引持久化，重启后未变化的目录无需重新列举）
+        scan_index_file = os.path.join(os.path.dirname(self.processed_records_file), "raw_scan_index.json")
+        self.raw_scanner = RawFileScanner(self.input_dir, index_file=scan_index_file)
+        
+        # raw目录文件事件队列：按路径合并事件，文件静默后只处理变化的文件
+        settle_seconds = self.config.get("watcher", {}).get("event_settle_seconds", 3)
+        self.raw_event_queue = PathEventQueue(settle_seconds)
+        self._stop_event = threading.Event()
+        self._raw_event_thread = None
+        
+        # 处理任务分发器：文件事件和轮询只负责提交任务，由工作线程执行耗时的清洗和分析
+        dispatcher_config = self.config.get("watcher", {}).get("dispatcher", {})
+        self.dispatcher = TaskDispatcher(
+            workers=dispatcher_config.get("workers", 2),
+            max_queue_size=dispatcher_config.get("max_queue_size", 100),
+            name="WatcherDispatcher"
+        )
+        self.submit_timeout = dispatcher_config.get("submit_timeout_seconds", 30)
+        # 近似重复新闻索引：转载的同一篇新闻只分析一次
+        near_dup_config = self.config.get("watcher", {}).get("near_duplicate", {})
+        self.near_duplicate_index = None
+        if near_dup_config.get("enabled", True):
+            self.near_duplicate_index = SimHashIndex(
+                max_distance=near_dup_config.get("max_distance", 3),
+                window_size=near_dup_config.get("window_size", 10000)
+            )
+        
+        # 流水线（清洗、入库）串行执行；领取新记录的步骤串行执行，分析可以并行
+        self._pipeline_lock = threading.Lock()
+        self._claim_lock = threading.Lock()
     
     def _load_config(self, config_file):
         """加载配置文件"""
@@ -111,31 +152,48 @@ class NewsWatcher:
                 "table_name": "news_articles"
             },
             "output_json_file": "data/news_data.json",
+            "file_stability": {
+                "stable_seconds": 2,
+                "ready_marker_suffix": None,
+                "max_wait_seconds": 60
+            },
             "watcher": {
                 "enabled": True,
                 "check_interval_seconds": 30,
-                "processed_records_file": "data/processed_records.json"
+                "event_settle_seconds": 3,
+                "dispatcher": {
+                    "workers": 2,
+                    "max_queue_size": 100,
+                    "submit_timeout_seconds": 30
+                },
+                "near_duplicate": {
+                    "enabled": True,
+                    "max_distance": 3,
+                    "window_size": 10000
+                },
+                "processed_records_file": "data/processed_records.json",
+                "record_store": {
+                    "backend": "sqlite",
+                    "path": "data/processed_records.db",
+                    "retention_days": None
+                }
             }
         }
     
-    def load_processed_records(self):
-        """加载已处理的记录"""
-        if os.path.exists(self.processed_records_file):
-            try:
-                with open(self.processed_records_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"加载已处理记录时出错: {str(e)}")
-                return {}
-        return {}
-    
-    def save_processed_records(self):
-        """保存已处理的记录"""
+    def evict_expired_records(self):
+        """按保留天数清理过期的已处理记录（每天最多执行一次）"""
+        if not self.retention_days:
+            return
+        now = time.time()
+        if now - self.last_eviction < 86400:
+            return
+        self.last_eviction = now
         try:
-            with open(self.processed_records_file, 'w', encoding='utf-8') as f:
-                json.dump(self.processed_records, f, ensure_ascii=False, indent=4)
+            evicted = self.record_store.evict_older_than(self.retention_days)
+            if evicted:
+                logger.info(f"已清理 {evicted} 条超过 {self.retention_days} 天的已处理记录")
         except Exception as e:
-            logger.error(f"保存已处理记录时出错: {str(e)}")
+            logger.error(f"清理过期记录时出错: {str(e)}")
     
     def load_raw_files_state(self):
         """加载raw目录文件的状态"""
@@ -169,67 +227,68 @@ class NewsWatcher:
         # 生成MD5哈希
         return hashlib.md5(data_to_hash.encode('utf-8')).hexdigest()
     
+    def find_near_duplicate(self, record_id, news):
+        """
+        检查新闻是否与最近分析过的新闻近似重复
+        
+        返回:
+        (近似新闻的记录ID, 汉明距离)，不重复或未启用时返回 None
+        """
+        if self.near_duplicate_index is None:
+            return None
+        text = (news.get('title') or '') + (news.get('content') or '')
+        return self.near_duplicate_index.check_and_add(record_id, text)
+    
     def get_raw_files_info(self):
         """获取raw目录下的文件信息"""
-        if not os.path.exists(self.input_dir):
-            logger.warning(f"输入目录 {self.input_dir} 不存在")
-            return []
-            
-        # 获取raw目录下的所有文件（包括子目录）
-        files = []
-        
-        # 递归扫描目录函数
-        def scan_directory(directory):
-            for item in os.listdir(directory):
-                item_path = os.path.join(directory, item)
-                if os.path.isdir(item_path):
-                    # 如果是目录，递归扫描
-                    scan_directory(item_path)
-                elif os.path.isfile(item_path):
-                    # 仅处理JSON和CSV文件
-                    if item_path.endswith('.json') or item_path.endswith('.csv'):
-                        mtime = os.path.getmtime(item_path)
-                        size = os.path.getsize(item_path)
-                        files.append({
-                            'path': item_path,
-                            'name': item,
-                            'mtime': mtime,
-                            'size': size,
-                            'mtime_str': datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S')
-                        })
-        
-        # 开始递归扫描
-        scan_directory(self.input_dir)
-        
+        files = self.raw_scanner.scan()
+        self.raw_scanner.save_index()
         return files
     
     def has_new_raw_files(self):
-        """检查raw目录是否有新文件或文件变化"""
+        """
+        检查raw目录是否有新文件或文件变化
+        
+        返回:
+        新增或变化的文件路径列表
+        """
         files_info = self.get_raw_files_info()
         
         if not files_info:
             logger.debug("raw目录中没有文件")
-            return False
+            if self.processed_raw_files:
+                self.processed_raw_files = {}
+                self.save_raw_files_state()
+            return []
         
         # 检查文件是否有变化
-        has_new = False
+        changed_files = []
+        current_state = {}
         for file_info in files_info:
             file_path = file_info['path']
             # 计算文件的指纹（使用修改时间和大小）
             file_fingerprint = f"{file_info['mtime']}_{file_info['size']}"
+            current_state[file_path] = file_fingerprint
             
             # 如果文件不在记录中或者文件有变化
-            if file_path not in self.processed_raw_files or self.processed_raw_files[file_path] != file_fingerprint:
-                logger.info(f"检测到新文件或文件变化: {file_path} (修改时间: {file_info['mtime_str']}, 大小: {file_info['size']}字节)")
-                has_new = True
-                # 更新文件指纹
-                self.processed_raw_files[file_path] = file_fingerprint
+            if self.processed_raw_files.get(file_path) != file_fingerprint:
+                mtime_str = datetime.fromtimestamp(file_info['mtime']).strftime('%Y-%m-%d %H:%M:%S')
+                logger.info(f"检测到新文件或文件变化: {file_path} (修改时间: {mtime_str}, 大小: {file_info['size']}字节)")
+                changed_files.append(file_path)
         
-        # 保存raw文件状态
-        if has_new:
+        # 保存raw文件状态（已归档移走的文件不再保留指纹）
+        if changed_files or len(current_state) != len(self.processed_raw_files):
+            self.processed_raw_files = current_state
             self.save_raw_files_state()
             
-        return has_new
+        return changed_files
+    
+    def forget_raw_files(self, paths):
+        """清除文件的指纹，使 has_new_raw_files 再次把它们当作有变化的文件"""
+        forgotten = [path for path in paths if self.processed_raw_files.pop(path, None) is not None]
+        if forgotten:
+            logger.info(f"{len(forgotten)} 个文件处理失败，下次轮询时重试: {forgotten[:5]}")
+            self.save_raw_files_state()
     
     def process_news_data(self, new_records):
         """使用main模块处理新闻数据"""
@@ -250,6 +309,36 @@ class NewsWatcher:
             logger.error(traceback.format_exc())
             return False
     
+    def start_workers(self):
+        """启动任务分发器和处理raw目录文件事件的后台线程"""
+        self.dispatcher.start()
+        self._raw_event_thread = threading.Thread(target=self._raw_event_loop, name="RawEventWorker", daemon=True)
+        self._raw_event_thread.start()
+    
+    def stop(self):
+        """停止后台线程"""
+        self._stop_event.set()
+        if self._raw_event_thread:
+            self._raw_event_thread.join()
+        self.dispatcher.stop()
+    
+    def _raw_event_loop(self):
+        while not self._stop_event.is_set():
+            files = self.raw_event_queue.get_ready(timeout=1)
+            if not files:
+                continue
+            # 队列满时在这里阻塞（背压），观察者线程只负责入队，不会被阻塞
+            if not self.dispatcher.submit(self.ingest_and_analyze, files, block=True, timeout=self.submit_timeout):
+                # 提交失败时把路径放回事件队列，稍后重试，保证事件不丢失
+                for path in files:
+                    self.raw_event_queue.put(path)
+    
+    def ingest_and_analyze(self, files):
+        """处理指定的原始文件，然后提交一个分析任务"""
+        self.ingest_raw_data(files=files)
+        # 工作线程向自己的队列提交任务不能阻塞；被拒绝时由轮询补上
+        self.dispatcher.submit(self.analyze_new_records, key="analyze", block=False)
+    
     def print_news_data_summary(self, news_data):
         """打印新闻数据摘要"""
         if not news_data:
@@ -266,55 +355,101 @@ class NewsWatcher:
         if len(news_data) > 3:
             logger.info(f"  ... 还有 {len(news_data) - 3} 条记录")
     
-    def process_new_data(self, force_pipeline_run=False):
-        """处理新的数据"""
+    def process_new_data(self, force_pipeline_run=False, files=None):
+        """
+        处理新的数据：先运行流水线处理原始文件，再分析数据库中的新记录
+        
+        参数:
+        force_pipeline_run: 是否强制对整个输入目录运行流水线
+        files: 文件事件指定的原始文件，只对这些文件运行流水线
+        """
+        self.ingest_raw_data(force_pipeline_run, files)
+        self.analyze_new_records()
+    
+    def ingest_raw_data(self, force_pipeline_run=False, files=None):
+        """
+        运行数据处理流水线，将原始文件清洗后导入数据库
+        
+        参数:
+        force_pipeline_run: 是否强制对整个输入目录运行流水线
+        files: 文件事件指定的原始文件，只对这些文件运行流水线
+        """
+        pending_files = []
         try:
-            # 检查raw目录是否有新文件
-            has_new_raw = self.has_new_raw_files()
-            
-            # 如果有新文件或强制运行
-            if has_new_raw or force_pipeline_run:
-                # 运行数据处理流水线（处理raw目录中的文件并更新news_data.json）
-                logger.info("检测到raw目录有新数据或强制运行流水线，开始处理...")
-                self.pipeline.run_pipeline()
-            else:
-                logger.debug("raw目录没有新数据，跳过处理流水线")
-            
-            # 不管raw目录是否有新数据，都检查news_data.json中是否有未处理的记录
-            # 读取更新后的新闻数据
-            if not os.path.exists(self.news_data_file):
-                logger.warning(f"新闻数据文件 {self.news_data_file} 不存在")
-                return
-            
-            with open(self.news_data_file, 'r', encoding='utf-8') as f:
-                news_data = json.load(f)
-            
-            # 打印数据摘要
-            self.print_news_data_summary(news_data)
-            
-            if not news_data:
-                logger.info("没有新闻数据可处理")
-                return
-            
-            # 筛选出新的记录
-            new_records = []
-            for news in news_data:
-                record_id = self.generate_record_id(news)
-                if record_id not in self.processed_records:
+            with self._pipeline_lock:
+                if files:
+                    # 文件事件已经指明了变化的文件，只处理这些文件
+                    logger.info(f"处理文件事件指定的 {len(files)} 个文件...")
+                    pending_files = self.pipeline.run_pipeline(files=files)
+                elif force_pipeline_run:
+                    # 运行数据处理流水线（处理raw目录中的所有文件并更新news_data.json）
+                    logger.info("强制运行流水线，开始处理...")
+                    pending_files = self.pipeline.run_pipeline()
+                else:
+                    # 检查raw目录是否有新文件，只处理新增或变化的文件
+                    changed_files = self.has_new_raw_files()
+                    if changed_files:
+                        logger.info("检测到raw目录有新数据，开始处理...")
+                        pending_files = self.pipeline.run_pipeline(files=changed_files)
+                    else:
+                        logger.debug("raw目录没有新数据，跳过处理流水线")
+        except Exception as e:
+            logger.error(f"处理原始数据时出错: {str(e)}")
+            import traceback
+            logger.error(traceback.format_exc())
+        
+        # 处理失败的文件清除指纹，下次轮询时重新处理（否则要等文件再次变化才会重试）
+        self.forget_raw_files(self.pipeline.processor.failed_files)
+        
+        # 仍在写入的文件重新放回事件队列，写入完成后再处理
+        for path in pending_files:
+            self.raw_event_queue.put(path)
+    
+    def analyze_new_records(self):
+        """从上次的游标位置读取数据库中的新记录并进行分析"""
+        try:
+            # 领取新记录：读取游标、标记已处理、推进游标在锁内完成，保证同一条记录只被一个线程领取
+            with self._claim_lock:
+                last_id = self.record_store.get_state("last_news_id", 0)
+                news_data = self.pipeline.integrator.fetch_records_after(last_id)
+                
+                if not news_data:
+                    logger.debug("没有新的新闻数据可处理")
+                    return
+                
+                # 打印数据摘要
+                self.print_news_data_summary(news_data)
+                
+                # 筛选出新的记录
+                new_records = []
+                new_entries = []
+                seen_ids = set()
+                for news in news_data:
+                    record_id = self.generate_record_id(news)
+                    if record_id in seen_ids or record_id in self.record_store:
+                        logger.debug(f"记录已处理过: {news.get('title', '无标题')[:30]}... (ID: {record_id[:8]})")
+                        continue
+                    seen_ids.add(record_id)
+                    # 近似重复的新闻同样标记为已处理，但不再调用大模型分析
+                    new_entries.append((record_id, news.get('title', '无标题'), None))
+                    duplicate = self.find_near_duplicate(record_id, news)
+                    if duplicate:
+                        logger.info(f"跳过近似重复新闻: {news.get('title', '无标题')[:30]}... (ID: {record_id[:8]}, 与 {duplicate[0][:8]} 距离 {duplicate[1]})")
+                        continue
                     new_records.append(news)
-                    # 将其标记为已处理
-                    self.processed_records[record_id] = {
-                        "processed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "title": news.get('title', '无标题')
-                    }
                     logger.info(f"找到新记录: {news.get('title', '无标题')[:30]}... (ID: {record_id[:8]})")
-                else:
-                    logger.debug(f"记录已处理过: {news.get('title', '无标题')[:30]}... (ID: {record_id[:8]})")
-            
-            # 保存已处理记录
-            self.save_processed_records()
+                
+                # 将新记录标记为已处理（只写入新增部分）
+                try:
+                    self.record_store.add_many(new_entries)
+                except Exception as e:
+                    logger.error(f"保存已处理记录时出错: {str(e)}")
+                
+                # 推进游标，下次只读取比本批次更新的记录
+                self.record_store.set_state("last_news_id", max(news['id'] for news in news_data))
+                self.evict_expired_records()
             
-            # 如果有新记录，处理它们
+            # 如果有新记录，处理它们（耗时的分析在锁外执行）
             if new_records:
                 logger.info(f"发现 {len(new_records)} 条新的新闻记录，开始处理...")
                 # 调用main模块中的process_news_data处理新闻
@@ -331,30 +466,33 @@ class RawFileHandler(FileSystemEventHandler):
     def __init__(self, watcher):
         super().__init__()
         self.watcher = watcher
-        self.last_processed = 0
-        # 设置一个合理的防抖时间（秒）
-        self.debounce_seconds = 3
+        self.ready_marker_suffix = watcher.config.get("file_stability", {}).get("ready_marker_suffix")
     
     def on_created(self, event):
         # 只处理文件创建事件
-        if not event.is_directory and (event.src_path.endswith('.json') or event.src_path.endswith('.csv')):
-            if event.src_path.startswith(self.watcher.input_dir):
-                self._handle_event(event)
+        if not event.is_directory:
+            self._handle_path(event.src_path)
     
     def on_modified(self, event):
         # 只处理文件修改事件
-        if not event.is_directory and (event.src_path.endswith('.json') or event.src_path.endswith('.csv')):
-            if event.src_path.startswith(self.watcher.input_dir):
-                self._handle_event(event)
+        if not event.is_directory:
+            self._handle_path(event.src_path)
+    
+    def on_moved(self, event):
+        # 采集器先写临时文件再重命名时，以重命名后的路径为准
+        if not event.is_directory:
+            self._handle_path(event.dest_path)
             
-    def _handle_event(self, event):
-        current_time = time.time()
-        # 防抖：确保在短时间内多次触发事件只处理一次
-        if current_time - self.last_processed > self.debounce_seconds:
-            logger.info(f"检测到raw目录文件变化: {event.src_path}")
-            self.last_processed = current_time
-            # 强制运行流水线处理
-            self.watcher.process_new_data(force_pipeline_run=True)
+    def _handle_path(self, path):
+        if not path.startswith(self.watcher.input_dir):
+            return
+        # 写入完成标记文件出现时，处理对应的数据文件
+        if self.ready_marker_suffix and path.endswith(self.ready_marker_suffix):
+            path = path[:-len(self.ready_marker_suffix)]
+        if path.endswith(SUPPORTED_EXTENSIONS):
+            # 事件按路径合并进入队列，由后台线程在文件静默后只处理变化的文件
+            logger.debug(f"检测到raw目录文件变化: {path}")
+            self.watcher.raw_event_queue.put(path)
 
 class NewsDataFileHandler(FileSystemEventHandler):
     def __init__(self, watcher):
@@ -372,8 +510,8 @@ class NewsDataFileHandler(FileSystemEventHandler):
             if current_time - self.last_processed > self.debounce_seconds:
                 logger.info(f"检测到新闻数据文件变化: {event.src_path}")
                 self.last_processed = current_time
-                # 由于文件变化可能是由pipeline引起的，我们不强制运行流水线
-                self.watcher.process_new_data(force_pipeline_run=False)
+                # 文件变化通常由pipeline引起，只需提交分析任务；队列满时直接放弃，由轮询补上
+                self.watcher.dispatcher.submit(self.watcher.analyze_new_records, key="analyze", block=False)
 
 def main():
     # 创建实例并传入配置文件路径
@@ -390,6 +528,7 @@ def main():
     raw_observer = Observer()
     raw_observer.schedule(raw_event_handler, path=watcher.input_dir, recursive=True)
     raw_observer.start()
+    watcher.start_workers()
     
     # 设置文件系统监视器：监控news_data.json文件
     logger.info(f"开始监视文件 {watcher.news_data_file} 的变化...")
@@ -402,10 +541,12 @@ def main():
         while True:
             # 每隔一段时间主动检查一次（作为备选机制）
             time.sleep(watcher.check_interval)  # 使用配置的检查间隔
-            watcher.process_new_data()
+            watcher.dispatcher.submit(watcher.process_new_data, key="poll", block=False)
+            logger.info(f"任务队列状态: {watcher.dispatcher.metrics()}, 待处理文件事件: {len(watcher.raw_event_queue)}")
     except KeyboardInterrupt:
         raw_observer.stop()
         news_data_observer.stop()
+        watcher.stop()
     
     raw_observer.join()
     news_data_observer.join()
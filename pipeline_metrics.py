@@ -0,0 +1,356 @@
+import os
+import json
+import time
+import argparse
+import logging
+from datetime import datetime
+from contextlib import contextmanager
+
+logger = logging.getLogger("PipelineMetrics")
+
+# 每个阶段统计的计数项
+STAGE_COUNTERS = ("rows_in", "rows_out", "bytes_in", "bytes_out")
+
+# 写入Prometheus文本文件的阶段指标：(指标名, 统计项, 说明)
+_PROMETHEUS_STAGE_METRICS = (
+    ("news_pipeline_stage_seconds", "seconds", "最近一轮中各阶段的耗时（秒）"),
+    ("news_pipeline_stage_rows_in", "rows_in", "最近一轮中各阶段读取的行数"),
+    ("news_pipeline_stage_rows_out", "rows_out", "最近一轮中各阶段输出的行数"),
+    ("news_pipeline_stage_bytes_in", "bytes_in", "最近一轮中各阶段读取的字节数"),
+    ("news_pipeline_stage_bytes_out", "bytes_out", "最近一轮中各阶段写入的字节数"),
+    ("news_pipeline_stage_rows_per_second", "rows_per_second", "最近一轮中各阶段的吞吐量（读取行数/秒）"),
+)
+
+
+class CycleMetrics:
+    """
+    一轮流水线运行的指标
+
+    按阶段累计耗时、读取/输出的行数和字节数，并记录每个文件的明细。
+    阶段可以嵌套（例如内存模式下清理阶段中调用的导入），嵌套阶段的耗时不计入外层阶段。
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.files = []
+        self.status = "ok"
+        # 正在计时的阶段：[阶段名, 嵌套阶段的耗时]
+        self._active = []
+
+    def _stage(self, name):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = {"seconds": 0.0, **{counter: 0 for counter in STAGE_COUNTERS}}
+        return stats
+
+    @contextmanager
+    def stage(self, name):
+        """
+        为一个阶段计时，返回该阶段的统计字典，调用方可以累加其中的计数项
+
+        参数:
+        name: 阶段名，同名阶段多次计时时累加
+        """
+        stats = self._stage(name)
+        start = time.perf_counter()
+        self._active.append([name, 0.0])
+        try:
+            yield stats
+        finally:
+            _, nested = self._active.pop()
+            elapsed = time.perf_counter() - start
+            stats["seconds"] += elapsed - nested
+            if self._active:
+                self._active[-1][1] += elapsed
+
+    def timed_context(self, name, factory):
+        """
+        包装返回上下文管理器的函数（如 SQLiteConnectionManager.transaction），从进入到退出（包括提交）的耗时计入指定阶段
+
+        返回:
+        包装后的函数，返回的上下文管理器与 factory 返回的相同
+        """
+        @contextmanager
+        def wrapped():
+            with self.stage(name):
+                with factory() as value:
+                    yield value
+        return wrapped
+
+    def timed_sink(self, name, sink):
+        """
+        包装接收DataFrame的函数（如 NewsDataIntegrator.import_dataframe），每次调用计入指定阶段
+
+        返回:
+        包装后的函数，返回值与 sink 相同
+        """
+        def wrapped(df):
+            with self.stage(name) as stats:
+                stats["rows_in"] += len(df)
+                rows = sink(df)
+                stats["rows_out"] += rows or 0
+            return rows
+        return wrapped
+
+    def add_file(self, stage, file_path, seconds, rows_in=0, rows_out=0, bytes_in=0, bytes_out=0):
+        """记录一个文件在某阶段的明细，行数和字节数同时计入该阶段"""
+        stats = self._stage(stage)
+        counts = {"rows_in": rows_in, "rows_out": rows_out, "bytes_in": bytes_in, "bytes_out": bytes_out}
+        for counter, value in counts.items():
+            stats[counter] += value
+        self.files.append({
+            "stage": stage,
+            "file": file_path,
+            "seconds": round(seconds, 4),
+            **counts,
+            "rows_per_second": round(rows_in / seconds, 1) if seconds > 0 else None
+        })
+
+    def to_dict(self):
+        """转换为可写入JSON的字典"""
+        stages = {}
+        for name, stats in self.stages.items():
+            seconds = stats["seconds"]
+            stages[name] = {
+                "seconds": round(seconds, 4),
+                **{counter: stats[counter] for counter in STAGE_COUNTERS},
+                "rows_per_second": round(stats["rows_in"] / seconds, 1) if seconds > 0 else None
+            }
+        return {
+            "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "seconds": round(time.perf_counter() - self._start, 4),
+            "status": self.status,
+            "stages": stages,
+            "files": self.files
+        }
+
+
+class PipelineMetrics:
+    """
+    流水线指标的记录器
+
+    每轮运行结束后：
+    - 在JSON Lines指标文件末尾追加一行，不重写已有内容；行数超过 max_cycles 的两倍时
+      才重写文件，只保留最近 max_cycles 轮
+    - 配置了 prometheus_file 时，将最近一轮的阶段指标写入Prometheus文本文件
+      （供 node_exporter 的 textfile collector 采集）
+    - 在日志中记录一行各阶段的耗时和吞吐量
+    """
+
+    def __init__(self, json_file="data/pipeline_metrics.jsonl", prometheus_file=None, max_cycles=200):
+        """
+        初始化指标记录器
+
+        参数:
+        json_file: JSON Lines指标文件，每行一轮，None表示不写入
+        prometheus_file: Prometheus文本文件（通常以 .prom 结尾），None表示不写入
+        max_cycles: 指标文件中保留的轮数
+        """
+        self.json_file = json_file
+        self.prometheus_file = prometheus_file
+        self.max_cycles = max_cycles
+        self.cycles_total = 0
+        # 指标文件当前的行数，第一次写入时统计
+        self._lines = None
+
+    @classmethod
+    def from_config(cls, metrics_config):
+        """根据配置文件中的 metrics 部分创建指标记录器"""
+        return cls(
+            json_file=metrics_config.get("json_file", "data/pipeline_metrics.jsonl"),
+            prometheus_file=metrics_config.get("prometheus_file"),
+            max_cycles=metrics_config.get("max_cycles", 200)
+        )
+
+    def start_cycle(self):
+        """开始记录新的一轮"""
+        return CycleMetrics()
+
+    def load(self):
+        """读取指标文件中保存的各轮指标（从旧到新）"""
+        return load_cycles(self.json_file)
+
+    def record(self, cycle):
+        """
+        保存一轮的指标
+
+        参数:
+        cycle: CycleMetrics 实例
+        """
+        entry = cycle.to_dict()
+        self.cycles_total += 1
+        logger.info(f"本轮耗时 {entry['seconds']:.2f} 秒，" + "，".join(
+            f"{name} {stats['seconds']:.2f} 秒/{stats['rows_in']} 行" for name, stats in entry["stages"].items()
+        ))
+
+        if self.json_file:
+            try:
+                self._append(entry)
+            except Exception as e:
+                logger.error(f"写入指标文件时出错: {str(e)}")
+
+        if self.prometheus_file:
+            try:
+                _write_atomic(self.prometheus_file, self._prometheus_text(entry))
+            except Exception as e:
+                logger.error(f"写入Prometheus指标文件时出错: {str(e)}")
+        return entry
+
+    def _append(self, entry):
+        if self._lines is None:
+            self._lines = _count_lines(self.json_file)
+        directory = os.path.dirname(self.json_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.json_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._lines += 1
+
+        # 积累到保留轮数的两倍时重写一次，平均每轮只追加一行
+        if self._lines > 2 * self.max_cycles:
+            cycles = self.load()[-self.max_cycles:]
+            _write_atomic(self.json_file, "".join(json.dumps(cycle, ensure_ascii=False) + "\n" for cycle in cycles))
+            self._lines = len(cycles)
+
+    def _prometheus_text(self, entry):
+        lines = []
+        for metric, key, help_text in _PROMETHEUS_STAGE_METRICS:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for name, stats in entry["stages"].items():
+                value = stats[key]
+                lines.append(f'{metric}{{stage="{name}"}} {value if value is not None else 0}')
+        started = datetime.strptime(entry["started_at"], "%Y-%m-%d %H:%M:%S")
+        lines += [
+            "# HELP news_pipeline_cycle_seconds 最近一轮的总耗时（秒）",
+            "# TYPE news_pipeline_cycle_seconds gauge",
+            f"news_pipeline_cycle_seconds {entry['seconds']}",
+            "# HELP news_pipeline_cycle_success 最近一轮是否成功完成",
+            "# TYPE news_pipeline_cycle_success gauge",
+            f"news_pipeline_cycle_success {1 if entry['status'] == 'ok' else 0}",
+            "# HELP news_pipeline_last_cycle_timestamp_seconds 最近一轮的开始时间（Unix时间戳）",
+            "# TYPE news_pipeline_last_cycle_timestamp_seconds gauge",
+            f"news_pipeline_last_cycle_timestamp_seconds {started.timestamp():.0f}",
+            "# HELP news_pipeline_cycles_total 本进程运行的轮数",
+            "# TYPE news_pipeline_cycles_total counter",
+            f"news_pipeline_cycles_total {self.cycles_total}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, text):
+    # 先写临时文件再替换，读取方不会看到写了一半的文件
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+
+
+def _count_lines(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f)
+
+
+def load_cycles(json_file):
+    """
+    读取指标文件，文件不存在或无法解析时返回空列表
+
+    每行一轮的JSON Lines文件中无法解析的行（例如写入时进程退出留下的半行）被跳过；
+    也兼容旧版本写入的整个文件为一个JSON数组的格式。
+    """
+    if not json_file or not os.path.exists(json_file):
+        return []
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            text = f.read()
+    except Exception as e:
+        logger.error(f"读取指标文件时出错: {str(e)}")
+        return []
+
+    if text.lstrip().startswith('['):
+        try:
+            cycles = json.loads(text)
+            return cycles if isinstance(cycles, list) else []
+        except ValueError as e:
+            logger.error(f"读取指标文件时出错: {str(e)}")
+            return []
+
+    cycles = []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            cycles.append(json.loads(line))
+        except ValueError:
+            logger.warning(f"跳过指标文件 {json_file} 第 {line_no} 行无法解析的记录")
+    return cycles
+
+
+def summarize(cycles):
+    """
+    生成最近若干轮的文本摘要：每轮各阶段的耗时和吞吐量，以及各阶段的平均耗时和占比
+
+    参数:
+    cycles: load_cycles 返回的各轮指标
+
+    返回:
+    摘要文本
+    """
+    if not cycles:
+        return "没有指标记录"
+
+    stage_names = []
+    for cycle in cycles:
+        for name in cycle["stages"]:
+            if name not in stage_names:
+                stage_names.append(name)
+
+    lines = []
+    for cycle in cycles:
+        parts = []
+        for name in stage_names:
+            stats = cycle["stages"].get(name)
+            if stats is not None:
+                rate = stats["rows_per_second"]
+                parts.append(f"{name} {stats['seconds']:.2f}秒/{stats['rows_in']}行/{rate if rate is not None else '-'}行每秒")
+        lines.append(f"{cycle['started_at']}  {cycle['status']:<5} 总耗时 {cycle['seconds']:.2f}秒  " + "  ".join(parts))
+
+    total_seconds = sum(cycle["seconds"] for cycle in cycles)
+    lines.append("")
+    lines.append(f"最近 {len(cycles)} 轮，平均每轮 {total_seconds / len(cycles):.2f} 秒")
+    for name in stage_names:
+        seconds = sum(cycle["stages"].get(name, {}).get("seconds", 0) for cycle in cycles)
+        rows = sum(cycle["stages"].get(name, {}).get("rows_in", 0) for cycle in cycles)
+        share = seconds / total_seconds if total_seconds else 0
+        lines.append(f"  {name}: 平均 {seconds / len(cycles):.2f} 秒（占 {share:.1%}），"
+                     f"共 {rows} 行，{rows / seconds if seconds else 0:.0f} 行/秒")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='查看新闻数据处理流水线最近几轮的运行指标')
+    parser.add_argument('--file', '-f', default=None, help='指标文件，不指定时读取配置文件中的 metrics.json_file')
+    parser.add_argument('--config', '-c', default='config.json', help='配置文件路径')
+    parser.add_argument('--last', '-n', type=int, default=10, help='显示最近的轮数')
+    args = parser.parse_args()
+
+    json_file = args.file
+    if json_file is None:
+        metrics_config = {}
+        if os.path.exists(args.config):
+            with open(args.config, 'r', encoding='utf-8') as f:
+                metrics_config = json.load(f).get("metrics", {})
+        json_file = metrics_config.get("json_file", "data/pipeline_metrics.jsonl")
+
+    print(summarize(load_cycles(json_file)[-args.last:]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+import logging
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger("ProcessedIO")
+
+# 处理器与集成器之间的中间文件格式，auto 表示安装了pyarrow时使用Parquet，否则使用CSV
+INTERMEDIATE_FORMATS = ('auto', 'parquet', 'csv')
+
+# 集成器识别的处理后文件扩展名
+PROCESSED_EXTENSIONS = ('.parquet', '.csv')
+
+
+def resolve_format(name='auto'):
+    """
+    确定实际使用的中间文件格式
+
+    参数:
+    name: auto、parquet 或 csv；指定 parquet 但未安装pyarrow时退回 csv
+
+    返回:
+    'parquet' 或 'csv'
+    """
+    if name not in INTERMEDIATE_FORMATS:
+        raise ValueError(f"未知的中间文件格式: {name}，可选值: {', '.join(INTERMEDIATE_FORMATS)}")
+    if name in ('auto', 'parquet'):
+        if pq is not None:
+            return 'parquet'
+        if name == 'parquet':
+            logger.warning("pyarrow 未安装，中间文件改用 CSV 格式")
+    return 'csv'
+
+
+class ProcessedFileWriter:
+    """
+    将一个原始文件的各批清理结果依次写入同一个中间文件
+
+    文件格式由扩展名决定（.parquet 或 .csv）。列以第一批为准，后续批次按第一批的列对齐，
+    多出的列记录警告后丢弃。Parquet 文件在 close() 之后才完整可读。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = 'parquet' if path.endswith('.parquet') else 'csv'
+        self.columns = None
+        self.rows = 0
+        self._parquet_writer = None
+
+    def write(self, df):
+        """追加写入一批数据"""
+        if df.empty:
+            return
+        if self.columns is None:
+            self.columns = list(df.columns)
+        else:
+            extra = [column for column in df.columns if column not in self.columns]
+            if extra:
+                logger.warning(f"后续批次包含第一批没有的列 {extra}，这些列不会写入 {self.path}")
+            df = df.reindex(columns=self.columns)
+
+        if self.format == 'parquet':
+            self._write_parquet(df)
+        else:
+            df.to_csv(self.path, mode='a' if self.rows else 'w', header=not self.rows, index=False, encoding='utf-8')
+        self.rows += len(df)
+
+    def _write_parquet(self, df):
+        # 各批次的分类列取值不同，按普通字符串写入，Parquet本身会对重复的字符串做字典编码
+        categorical = [column for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)]
+        if categorical:
+            df = df.astype({column: object for column in categorical})
+
+        if self._parquet_writer is None:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            # 第一批中全为空的列推断不出类型，按字符串处理，避免与后续批次不一致
+            for i, field in enumerate(schema):
+                if pa.types.is_null(field.type):
+                    schema = schema.set(i, pa.field(field.name, pa.string()))
+            self._parquet_writer = pq.ParquetWriter(self.path, schema)
+        table = pa.Table.from_pandas(df, schema=self._parquet_writer.schema, preserve_index=False)
+        self._parquet_writer.write_table(table)
+
+    def close(self):
+        """结束写入"""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def discard(self):
+        """结束写入并删除不完整的文件"""
+        try:
+            self.close()
+        except Exception:
+            pass
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def iter_processed_chunks(file_path, chunk_rows):
+    """
+    分块读取处理后的中间文件（Parquet或CSV）
+
+    参数:
+    file_path: 文件路径
+    chunk_rows: 每块的行数
+
+    返回:
+    DataFrame的生成器
+    """
+    if file_path.endswith('.parquet'):
+        if pq is None:
+            raise ImportError(f"读取 {file_path} 需要安装 pyarrow")
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(file_path, encoding='utf-8', chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                yield chunk
@@ -0,0 +1,327 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+logger = logging.getLogger("RecordStore")
+
+
+class RecordStore(ABC):
+    """
+    已处理记录存储的接口
+
+    记录以 record_id（新闻内容哈希）为键，要求成员判断为 O(1)，
+    写入只与新增记录数量相关，而不是与历史记录总量相关。
+    """
+
+    @abstractmethod
+    def __contains__(self, record_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self):
+        raise NotImplementedError
+
+    def add(self, record_id, title="", processed_at=None):
+        """添加一条已处理记录"""
+        self.add_many([(record_id, title, processed_at)])
+
+    @abstractmethod
+    def add_many(self, records):
+        """
+        批量添加已处理记录
+
+        参数:
+        records: (record_id, title, processed_at) 元组的可迭代对象，processed_at 为时间戳或 None
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def evict_older_than(self, days):
+        """
+        删除超过指定天数的记录
+
+        返回:
+        删除的记录数
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_state(self, key, default=None):
+        """读取与记录一起持久化的状态值（如增量游标）"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_state(self, key, value):
+        """保存状态值"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteRecordStore(RecordStore):
+    """基于SQLite表的已处理记录存储"""
+
+    def __init__(self, db_file):
+        db_dir = os.path.dirname(db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        # 监视器的多个线程共享同一个连接，由锁保证串行访问
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS processed_records (
+            record_id TEXT PRIMARY KEY,
+            title TEXT,
+            processed_at REAL
+        )
+        ''')
+        self._conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_processed_at ON processed_records (processed_at)
+        ''')
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS store_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        ''')
+        self._conn.commit()
+
+    def __contains__(self, record_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM processed_records WHERE record_id = ?", (record_id,)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM processed_records").fetchone()[0]
+
+    def add_many(self, records):
+        now = time.time()
+        rows = [(record_id, title, processed_at or now) for record_id, title, processed_at in records]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO processed_records (record_id, title, processed_at) VALUES (?, ?, ?)",
+                    rows
+                )
+
+    def evict_older_than(self, days):
+        cutoff = time.time() - days * 86400
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "DELETE FROM processed_records WHERE processed_at < ?", (cutoff,)
+                )
+        return cursor.rowcount
+
+    def get_state(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM store_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_state(self, key, value):
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO store_state (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value))
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class AppendLogRecordStore(RecordStore):
+    """
+    基于追加日志的已处理记录存储
+
+    每条新记录以一行JSON追加到日志文件，内存中保存 record_id -> processed_at 的映射。
+    每次追加后检查日志中的失效行（被覆盖的状态值、重复或已删除的记录），
+    失效行超过有效行数且不少于 min_compact_lines 行时压缩重写，长期运行的监视器的日志不会无限增长。
+    """
+
+    def __init__(self, log_file, min_compact_lines=1000):
+        """
+        初始化追加日志存储
+
+        参数:
+        log_file: 日志文件路径
+        min_compact_lines: 失效行少于该数量时不压缩，避免频繁重写小文件
+        """
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        self.log_file = log_file
+        self._lock = threading.Lock()
+        self._records = {}
+        self._state = {}
+        self.min_compact_lines = min_compact_lines
+        self._log_lines = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 进程中断时最后一行可能不完整
+                    logger.warning(f"跳过损坏的记录日志行: {line[:50]}")
+                    continue
+                self._log_lines += 1
+                if "state" in entry:
+                    self._state[entry["state"]] = entry.get("value")
+                elif entry.get("deleted"):
+                    self._records.pop(entry["id"], None)
+                else:
+                    self._records[entry["id"]] = (entry.get("title", ""), entry.get("ts", 0))
+
+    def __contains__(self, record_id):
+        return record_id in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def add_many(self, records):
+        now = time.time()
+        lines = []
+        with self._lock:
+            for record_id, title, processed_at in records:
+                ts = processed_at or now
+                self._records[record_id] = (title, ts)
+                lines.append(json.dumps({"id": record_id, "title": title, "ts": ts}, ensure_ascii=False))
+            if not lines:
+                return
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+            self._log_lines += len(lines)
+            self._compact_if_needed_locked()
+
+    def evict_older_than(self, days):
+        cutoff = time.time() - days * 86400
+        with self._lock:
+            expired = [record_id for record_id, (_, ts) in self._records.items() if ts < cutoff]
+            for record_id in expired:
+                del self._records[record_id]
+            if expired:
+                self._compact()
+        return len(expired)
+
+    def get_state(self, key, default=None):
+        return self._state.get(key, default)
+
+    def set_state(self, key, value):
+        with self._lock:
+            self._state[key] = value
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"state": key, "value": value}, ensure_ascii=False) + "\n")
+            self._log_lines += 1
+            self._compact_if_needed_locked()
+
+    def _compact(self):
+        """重写日志文件，只保留有效记录（调用方需持有锁）"""
+        tmp_file = self.log_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for record_id, (title, ts) in self._records.items():
+                f.write(json.dumps({"id": record_id, "title": title, "ts": ts}, ensure_ascii=False) + "\n")
+            for key, value in self._state.items():
+                f.write(json.dumps({"state": key, "value": value}, ensure_ascii=False) + "\n")
+        os.replace(tmp_file, self.log_file)
+        self._log_lines = len(self._records) + len(self._state)
+
+    def _compact_if_needed_locked(self):
+        # 每次追加后调用（调用方需持有锁）；只比较计数，不需要读取文件
+        live = len(self._records) + len(self._state)
+        if self._log_lines - live > max(live, self.min_compact_lines):
+            self._compact()
+
+    def compact_if_needed(self):
+        """当日志中的失效行超过有效行数（且不少于 min_compact_lines）时压缩日志"""
+        with self._lock:
+            self._compact_if_needed_locked()
+
+
+def migrate_json_records(store, json_file):
+    """
+    将旧版 processed_records.json 中的记录一次性迁移到记录存储
+
+    迁移完成后原文件被重命名为 *.migrated，避免重复迁移。
+
+    参数:
+    store: 目标记录存储
+    json_file: 旧版JSON记录文件路径
+
+    返回:
+    迁移的记录数
+    """
+    if not json_file or not os.path.exists(json_file):
+        return 0
+
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            old_records = json.load(f)
+    except Exception as e:
+        logger.error(f"读取旧版已处理记录文件时出错: {str(e)}")
+        return 0
+
+    rows = []
+    for record_id, info in old_records.items():
+        processed_at = None
+        if isinstance(info, dict) and info.get("processed_at"):
+            try:
+                processed_at = datetime.strptime(info["processed_at"], "%Y-%m-%d %H:%M:%S").timestamp()
+            except ValueError:
+                pass
+        title = info.get("title", "") if isinstance(info, dict) else ""
+        rows.append((record_id, title, processed_at))
+
+    store.add_many(rows)
+    os.replace(json_file, json_file + ".migrated")
+    logger.info(f"已从 {json_file} 迁移 {len(rows)} 条已处理记录")
+    return len(rows)
+
+
+def create_record_store(store_config, legacy_json_file=None):
+    """
+    根据配置创建记录存储，并在需要时迁移旧版JSON记录
+
+    参数:
+    store_config: watcher.record_store 配置字典
+    legacy_json_file: 旧版 processed_records.json 路径
+
+    返回:
+    RecordStore 实例
+    """
+    backend = store_config.get("backend", "sqlite")
+    if backend == "sqlite":
+        store = SQLiteRecordStore(store_config.get("path", "data/processed_records.db"))
+    elif backend == "append_log":
+        store = AppendLogRecordStore(store_config.get("path", "data/processed_records.log"))
+    else:
+        raise ValueError(f"不支持的记录存储类型: {backend}")
+
+    migrate_json_records(store, legacy_json_file)
+
+    if isinstance(store, AppendLogRecordStore):
+        store.compact_if_needed()
+
+    return store
@@ -0,0 +1,263 @@
+import re
+import sqlite3
+import logging
+
+from json_stream import format_time_value
+
+logger = logging.getLogger("FullTextIndex")
+
+# 全文索引的分词器：trigram 按三个字符切分，适合中文的子串匹配（需要SQLite 3.34+）；
+# unicode61 按空白和标点切分，中文连续的一段文字只作为一个词
+SEARCH_TOKENIZERS = ('trigram', 'unicode61')
+
+# trigram 分词器无法用索引匹配少于3个字符的词，这些词退回 LIKE 过滤
+TRIGRAM_MIN_CHARS = 3
+
+# 摘要中匹配部分的标记
+SNIPPET_START = '【'
+SNIPPET_END = '】'
+
+# 摘要的长度（trigram 分词时约等于字符数）
+SNIPPET_TOKENS = 32
+
+# 标题的 bm25 权重高于内容
+TITLE_WEIGHT = 5.0
+CONTENT_WEIGHT = 1.0
+
+# 搜索结果中返回的文章列
+RESULT_COLUMNS = ('id', 'title', 'publish_time', 'source', 'url')
+
+
+def split_terms(query):
+    """按空白拆分搜索词，去掉重复的词"""
+    terms = []
+    for term in query.split():
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def _like_pattern(term):
+    # 转义 LIKE 的通配符，配合 ESCAPE '\'
+    return '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _like_filter(terms, alias):
+    """每个词都需要出现在标题或内容中的 LIKE 条件和参数"""
+    conditions = []
+    params = []
+    for term in terms:
+        conditions.append(f"({alias}.title LIKE ? ESCAPE '\\' OR {alias}.content LIKE ? ESCAPE '\\')")
+        params += [_like_pattern(term)] * 2
+    return conditions, params
+
+
+def make_snippet(title, content, terms, width=SNIPPET_TOKENS):
+    """
+    在Python中生成摘要：取内容（内容中没有时取标题）中第一个匹配的词前后的文字，并标记所有匹配的词
+
+    用于没有全文索引时的 LIKE 搜索，格式与 FTS5 的 snippet() 一致。
+    """
+    pattern = re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    text = content or ''
+    match = pattern.search(text)
+    if match is None:
+        text = title or ''
+        match = pattern.search(text)
+    if match is None:
+        return text[:width] + ('…' if len(text) > width else '')
+    start = max(0, match.start() - width // 3)
+    end = min(len(text), start + width)
+    snippet = pattern.sub(lambda m: SNIPPET_START + m.group(0) + SNIPPET_END, text[start:end])
+    return ('…' if start > 0 else '') + snippet + ('…' if end < len(text) else '')
+
+
+class FullTextIndex:
+    """
+    新闻标题和内容的FTS5全文索引
+
+    索引是外部内容表（content=新闻表），只保存倒排索引，不重复保存文本。新闻表上的触发器在插入、
+    删除和修改标题或内容时同步更新索引，导入、compact() 等写入路径不需要额外处理。
+    """
+
+    def __init__(self, table_name, tokenizer='trigram'):
+        """
+        初始化全文索引
+
+        参数:
+        table_name: 新闻表名，索引表名为 <table_name>_fts
+        tokenizer: trigram 或 unicode61；SQLite 不支持 trigram 时退回 unicode61
+        """
+        if tokenizer not in SEARCH_TOKENIZERS:
+            raise ValueError(f"未知的分词器: {tokenizer}，可选值: {', '.join(SEARCH_TOKENIZERS)}")
+        self.table_name = table_name
+        self.fts_table = f"{table_name}_fts"
+        self.tokenizer = tokenizer
+
+    @classmethod
+    def from_config(cls, table_name, fts_config):
+        """根据配置文件中的 integration.fts 部分创建全文索引"""
+        return cls(table_name, tokenizer=fts_config.get("tokenizer", "trigram"))
+
+    def exists(self, conn):
+        """索引表是否已经存在"""
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.fts_table,)
+        ).fetchone() is not None
+
+    def current_tokenizer(self, conn):
+        """已有索引使用的分词器，索引不存在时返回None"""
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (self.fts_table,)).fetchone()
+        if row is None:
+            return None
+        return 'trigram' if 'trigram' in row[0] else 'unicode61'
+
+    def create(self, conn):
+        """
+        创建索引表和同步触发器，并为表中已有的记录建立索引，需要在事务中调用
+
+        返回:
+        实际使用的分词器
+        """
+        tokenizer = self.tokenizer
+        try:
+            self._create_table(conn, tokenizer)
+        except sqlite3.OperationalError as e:
+            if tokenizer != 'trigram':
+                raise
+            # SQLite 3.34 之前没有 trigram 分词器
+            logger.warning(f"SQLite {sqlite3.sqlite_version} 不支持 trigram 分词器（{str(e)}），全文索引改用 unicode61")
+            tokenizer = 'unicode61'
+            self._create_table(conn, tokenizer)
+
+        table, fts = self.table_name, self.fts_table
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+        ''')
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        END
+        ''')
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF title, content ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO {fts} (rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+        ''')
+        self.rebuild(conn)
+        return tokenizer
+
+    def _create_table(self, conn, tokenizer):
+        conn.execute(f'''
+        CREATE VIRTUAL TABLE {self.fts_table} USING fts5(
+            title, content, content='{self.table_name}', content_rowid='id', tokenize='{tokenizer}'
+        )
+        ''')
+
+    def rebuild(self, conn):
+        """根据新闻表重建整个索引"""
+        conn.execute(f"INSERT INTO {self.fts_table} ({self.fts_table}) VALUES ('rebuild')")
+
+    def optimize(self, conn):
+        """合并索引的各个段，大量导入后可以加快查询"""
+        conn.execute(f"INSERT INTO {self.fts_table} ({self.fts_table}) VALUES ('optimize')")
+
+    def drop(self, conn):
+        """删除触发器和索引表"""
+        for suffix in ('insert', 'delete', 'update'):
+            conn.execute(f"DROP TRIGGER IF EXISTS {self.fts_table}_{suffix}")
+        conn.execute(f"DROP TABLE IF EXISTS {self.fts_table}")
+
+    def search(self, conn, query, limit=20):
+        """
+        用全文索引搜索，按 bm25 相关度排序（标题的权重高于内容）
+
+        搜索词之间是"与"的关系，每个词按短语（子串）匹配。使用 trigram 分词器时，
+        少于3个字符的词无法使用索引，只在其他词的匹配结果上用 LIKE 过滤；所有词都少于3个字符时返回None，
+        由调用方改用 like_search。
+
+        参数:
+        conn: 数据库连接
+        query: 搜索词，多个词用空白分隔
+        limit: 返回的最大结果数
+
+        返回:
+        结果字典列表，包含 RESULT_COLUMNS、snippet（摘要，匹配部分用【】标记）和 score（越大越相关）
+        """
+        terms = split_terms(query)
+        if self.current_tokenizer(conn) == 'trigram':
+            indexed = [term for term in terms if len(term) >= TRIGRAM_MIN_CHARS]
+        else:
+            indexed = terms
+        if not indexed:
+            return None
+        short = [term for term in terms if term not in indexed]
+
+        match = ' '.join('"' + term.replace('"', '""') + '"' for term in indexed)
+        fts = self.fts_table
+        conditions, params = _like_filter(short, 'a')
+        join = f" JOIN {self.table_name} AS a ON a.id = {fts}.rowid" if conditions else ""
+        # 先只按相关度取出前 limit 条的id，摘要只为这些记录生成，而不是为所有匹配的记录生成
+        ranked = conn.execute(f'''
+        SELECT {fts}.rowid, bm25({fts}, {TITLE_WEIGHT}, {CONTENT_WEIGHT}) AS score
+        FROM {fts}{join}
+        WHERE {fts} MATCH ? {''.join(' AND ' + condition for condition in conditions)}
+        ORDER BY score
+        LIMIT ?
+        ''', [match] + params + [limit]).fetchall()
+        if not ranked:
+            return []
+
+        columns = ', '.join(f"a.{column}" for column in RESULT_COLUMNS)
+        rows = {}
+        # 分组查询，避免超过SQLite的参数数量限制
+        for start in range(0, len(ranked), 500):
+            row_ids = [row_id for row_id, _ in ranked[start:start + 500]]
+            for row in conn.execute(f'''
+            SELECT {columns}, snippet({fts}, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', {SNIPPET_TOKENS})
+            FROM {fts} JOIN {self.table_name} AS a ON a.id = {fts}.rowid
+            WHERE {fts} MATCH ? AND {fts}.rowid IN ({', '.join('?' * len(row_ids))})
+            ''', [match] + row_ids):
+                rows[row[0]] = row
+
+        results = []
+        for row_id, score in ranked:
+            row = rows[row_id]
+            result = dict(zip(RESULT_COLUMNS, row))
+            result['publish_time'] = format_time_value(result['publish_time'])
+            result['snippet'] = row[-1]
+            # bm25 越小越相关，取相反数使 score 越大越相关
+            result['score'] = round(-score, 4)
+            results.append(result)
+        return results
+
+
+def like_search(conn, table_name, query, limit=20):
+    """
+    不使用全文索引的搜索：每个词都需要出现在标题或内容中，按发布时间倒序；匹配的记录较少时需要扫描整个表
+
+    参数与返回值同 FullTextIndex.search，score 为None。
+    """
+    terms = split_terms(query)
+    if not terms:
+        return []
+    conditions, params = _like_filter(terms, 'a')
+    columns = ', '.join(f"a.{column}" for column in RESULT_COLUMNS)
+    rows = conn.execute(f'''
+    SELECT {columns}, a.content FROM {table_name} AS a
+    WHERE {' AND '.join(conditions)}
+    ORDER BY a.publish_time DESC
+    LIMIT ?
+    ''', params + [limit]).fetchall()
+
+    results = []
+    for row in rows:
+        result = dict(zip(RESULT_COLUMNS, row))
+        result['publish_time'] = format_time_value(result['publish_time'])
+        result['snippet'] = make_snippet(result['title'], row[-1], terms)
+        result['score'] = None
+        results.append(result)
+    return results
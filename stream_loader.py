@@ -0,0 +1,120 @@
+import json
+import logging
+
+logger = logging.getLogger("StreamLoader")
+
+# 每次从文件读取的字符数
+READ_CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = ' \t\r\n\ufeff'
+
+
+def iter_json_records(file_path, chunk_size=READ_CHUNK_SIZE):
+    """
+    逐条读取JSON文件中的记录，内存占用与文件大小无关
+
+    支持顶层为数组的文件（逐个元素返回）和顶层为单个对象的文件。
+
+    参数:
+    file_path: JSON文件路径
+    chunk_size: 每次读取的字符数
+
+    返回:
+    记录的生成器
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buf = f.read(chunk_size)
+        eof = len(buf) < chunk_size
+        pos = _skip(buf, 0, _WHITESPACE)
+        # 开头的空白可能超过一个读取块
+        while pos >= len(buf) and not eof:
+            buf = f.read(chunk_size)
+            eof = len(buf) < chunk_size
+            pos = _skip(buf, 0, _WHITESPACE)
+
+        # 顶层是单个对象时，读取完整内容后直接解析
+        if pos < len(buf) and buf[pos] != '[':
+            yield json.loads(buf[pos:] + f.read())
+            return
+        if pos >= len(buf):
+            return
+        pos += 1
+
+        while True:
+            pos = _skip(buf, pos, _WHITESPACE + ',')
+            if pos < len(buf) and buf[pos] == ']':
+                return
+
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+                # 解析恰好停在缓冲区末尾时（例如数字），可能还没读完整，需要读入更多内容再解析
+                complete = end < len(buf) or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+
+            if complete:
+                yield record
+                pos = end
+                continue
+
+            chunk = f.read(chunk_size)
+            eof = len(chunk) < chunk_size
+            buf = buf[pos:] + chunk
+            pos = 0
+
+
+def iter_jsonl_records(file_path):
+    """
+    逐行读取JSON Lines文件中的记录
+
+    参数:
+    file_path: JSONL文件路径
+
+    返回:
+    记录的生成器
+    """
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"跳过 {file_path} 第 {line_no} 行无法解析的记录: {str(e)}")
+
+
+def iter_record_batches(file_path, batch_size):
+    """
+    按固定大小分批读取JSON或JSONL文件中的记录
+
+    参数:
+    file_path: 文件路径（.json 或 .jsonl）
+    batch_size: 每批记录数
+
+    返回:
+    记录列表的生成器
+    """
+    if file_path.endswith('.jsonl'):
+        records = iter_jsonl_records(file_path)
+    else:
+        records = iter_json_records(file_path)
+
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _skip(buf, pos, chars):
+    length = len(buf)
+    while pos < length and buf[pos] in chars:
+        pos += 1
+    return pos
@@ -0,0 +1,68 @@
+import pickle
+
+from clean_cache import CleanTextCache
+
+
+class CountingCleaner:
+    """记录实际清理了哪些文本的清理引擎"""
+
+    def __init__(self, namespace, suffix=""):
+        self.cache_namespace = namespace
+        self.suffix = suffix
+        self.cleaned = []
+
+    def clean(self, text):
+        if not isinstance(text, str):
+            return text
+        self.cleaned.append(text)
+        return text.strip() + self.suffix
+
+
+def test_hits_and_misses_within_and_across_batches():
+    cache = CleanTextCache()
+    cleaner = CountingCleaner("v1")
+    assert cache.clean_many([" a ", " b ", " a ", None], cleaner) == ["a", "b", "a", None]
+    assert cleaner.cleaned == [" a ", " b "]
+    assert cache.clean_many([" b ", " c "], cleaner) == ["b", "c"]
+    assert cleaner.cleaned == [" a ", " b ", " c "]
+
+    stats = cache.take_stats()
+    assert stats["lookups"] == 5
+    assert stats["memory_hits"] == 2
+    assert stats["disk_hits"] == 0
+    assert cache.take_stats()["lookups"] == 0
+
+
+def test_namespaces_do_not_share_results(tmp_path):
+    cache = CleanTextCache(db_file=str(tmp_path / "cache.db"))
+    old = CountingCleaner("text_cleaner:v1:fast", suffix="-v1")
+    new = CountingCleaner("text_cleaner:v2:fast", suffix="-v2")
+    assert cache.clean_many(["x"], old) == ["x-v1"]
+    assert cache.clean_many(["x"], new) == ["x-v2"]
+    assert cache.clean_many(["x"], old) == ["x-v1"]
+    assert old.cleaned == ["x"]
+    assert new.cleaned == ["x"]
+
+
+def test_disk_cache_is_reused_by_a_new_instance(tmp_path):
+    db_file = str(tmp_path / "cache.db")
+    first = CleanTextCache(db_file=db_file)
+    first.clean_many(["a", "b"], CountingCleaner("v1"))
+    first.close()
+
+    cleaner = CountingCleaner("v1")
+    second = CleanTextCache(db_file=db_file)
+    assert second.clean_many(["a", "b", "c"], cleaner) == ["a", "b", "c"]
+    assert cleaner.cleaned == ["c"]
+    assert second.take_stats()["disk_hits"] == 2
+    second.close()
+
+
+def test_memory_is_bounded_and_not_pickled():
+    cache = CleanTextCache(max_entries=2)
+    cleaner = CountingCleaner("v1")
+    cache.clean_many(["a", "b", "c"], cleaner)
+    assert len(cache) == 2
+    cache.clean_many(["a"], cleaner)
+    assert cleaner.cleaned == ["a", "b", "c", "a"]
+    assert len(pickle.loads(pickle.dumps(cache))) == 0
@@ -0,0 +1,136 @@
+import json
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from data_integrator import NewsDataIntegrator
+
+
+def make_config(tmp_path, **overrides):
+    config = {
+        "data_paths": {"output_dir": str(tmp_path / "processed")},
+        "integration": {"target_db_file": str(tmp_path / "news.db"), "table_name": "news_articles"},
+    }
+    config.update(overrides)
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(config), encoding="utf-8")
+    return str(config_file)
+
+
+def news_frame(count, publish_time="2024-03-05 10:00:00"):
+    return pd.DataFrame({
+        "title": [f"新闻标题 {i}" for i in range(count)],
+        "content": [f"新闻正文内容，第 {i} 条" for i in range(count)],
+        "publish_time": pd.to_datetime([publish_time] * count),
+        "source": ["test"] * count,
+        "url": [f"https://example.com/{i}" for i in range(count)],
+    })
+
+
+@pytest.fixture
+def integrator(tmp_path):
+    integrator = NewsDataIntegrator(make_config(tmp_path))
+    yield integrator
+    integrator.db.close()
+
+
+def count_rows(integrator):
+    return integrator.db.connection().execute("SELECT COUNT(*) FROM news_articles").fetchone()[0]
+
+
+def test_reimport_is_ignored(integrator):
+    assert integrator.import_dataframe(news_frame(3)) == 3
+    assert integrator.import_dataframe(news_frame(3)) == 0
+    assert count_rows(integrator) == 3
+
+
+def test_backfill_resolves_rows_that_collide_with_the_unique_index(tmp_path, integrator):
+    integrator.import_dataframe(news_frame(2))
+    with integrator.db.transaction() as conn:
+        # 没有 content_hash 的旧记录：一条与已有记录重复，一条是新的
+        conn.executemany(
+            "INSERT INTO news_articles (title, content) VALUES (?, ?)",
+            [("新闻标题 0", "新闻正文内容，第 0 条"), ("另一条新闻", "另一条新闻的正文")]
+        )
+    integrator.db.close()
+
+    reopened = NewsDataIntegrator(make_config(tmp_path))
+    try:
+        conn = reopened.db.connection()
+        assert count_rows(reopened) == 3
+        assert conn.execute("SELECT COUNT(*) FROM news_articles WHERE content_hash IS NULL").fetchone()[0] == 0
+        assert conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_content_hash'"
+        ).fetchone() is not None
+        assert reopened.import_dataframe(news_frame(2)) == 0
+    finally:
+        reopened.db.close()
+
+
+@pytest.fixture
+def retention_integrator(tmp_path):
+    retention = {"enabled": True, "hot_months": 1, "partition_dir": str(tmp_path / "partitions"),
+                 "compress_after_months": 3, "vacuum": False}
+    integrator = NewsDataIntegrator(make_config(tmp_path, retention=retention))
+    yield integrator
+    integrator.db.close()
+
+
+def test_reimport_of_moved_month_is_ignored(retention_integrator):
+    integrator = retention_integrator
+    assert integrator.import_dataframe(news_frame(3, "2024-01-15 09:00:00")) == 3
+    assert integrator.apply_retention(now=datetime(2024, 6, 1)) == 3
+    assert count_rows(integrator) == 0
+
+    assert integrator.import_dataframe(news_frame(3, "2024-01-15 09:00:00")) == 0
+    assert count_rows(integrator) == 0
+    assert integrator.fetch_records_after(0) == []
+
+
+def test_registry_is_rebuilt_from_partitions_moved_before_it_existed(retention_integrator):
+    integrator = retention_integrator
+    integrator.import_dataframe(news_frame(3, "2024-01-15 09:00:00"))
+    integrator.apply_retention(now=datetime(2024, 6, 1))
+    assert integrator.partitions.list_partitions()[0]["compressed"]
+    with integrator.db.transaction() as conn:
+        # 模拟登记表出现之前移出的分区
+        conn.execute("DROP TRIGGER news_articles_moved_hashes_ignore")
+        conn.execute("DROP TABLE news_articles_moved_hashes")
+
+    integrator.apply_retention(now=datetime(2024, 6, 1))
+    assert integrator.import_dataframe(news_frame(3, "2024-01-15 09:00:00")) == 0
+    assert count_rows(integrator) == 0
+
+
+def test_fetch_records_after_reads_only_new_rows(integrator):
+    integrator.import_dataframe(news_frame(3))
+    first = integrator.fetch_records_after(0)
+    assert [record["title"] for record in first] == ["新闻标题 0", "新闻标题 1", "新闻标题 2"]
+    assert first[0]["publish_time"] == "2024-03-05 10:00:00"
+
+    last_id = max(record["id"] for record in first)
+    assert integrator.fetch_records_after(last_id) == []
+
+    more = news_frame(5).iloc[3:]
+    integrator.import_dataframe(more)
+    assert [record["title"] for record in integrator.fetch_records_after(last_id)] == ["新闻标题 3", "新闻标题 4"]
+    assert len(integrator.fetch_records_after(0, limit=2)) == 2
+
+
+@pytest.mark.parametrize("sql_json", [True, False])
+def test_export_omits_internal_columns(tmp_path, integrator, monkeypatch, sql_json):
+    monkeypatch.setattr("data_integrator.has_json_functions", lambda conn: sql_json)
+    integrator.import_dataframe(news_frame(2))
+    output_file = tmp_path / "news_data.json"
+    assert integrator.export_to_json(str(output_file)) == 2
+    records = json.loads(output_file.read_text(encoding="utf-8"))
+    assert [sorted(record) for record in records] == [
+        ["content", "id", "imported_at", "processed_at", "publish_time", "source", "title", "url"]
+    ] * 2
+
+    integrator.import_dataframe(news_frame(3).iloc[2:])
+    assert integrator.export_incremental(str(output_file)) == 1
+    records = json.loads(output_file.read_text(encoding="utf-8"))
+    assert len(records) == 3
+    assert all("content_hash" not in record for record in records)
@@ -0,0 +1,104 @@
+import os
+from contextlib import contextmanager
+
+import pandas as pd
+import pytest
+
+from data_processor import NewsDataProcessor
+
+
+def make_rows(count):
+    return pd.DataFrame({
+        "title": [f"第{i}条新闻的标题" for i in range(count)],
+        "content": [f"<p>第{i}条新闻的正文内容，长度需要超过二十个字符才会保留</p>" for i in range(count)],
+        "source": ["新华社"] * count,
+        "publish_time": ["2024-03-05 12:30:00"] * count
+    })
+
+
+@pytest.fixture
+def processor(tmp_path):
+    return NewsDataProcessor(str(tmp_path / "raw"), str(tmp_path / "processed"), str(tmp_path / "archive"),
+                             batch_size=10, intermediate_format="csv")
+
+
+def write_csv(processor, count, name="news.csv"):
+    path = os.path.join(processor.input_dir, name)
+    make_rows(count).to_csv(path, index=False, encoding="utf-8")
+    return path
+
+
+def test_csv_is_read_in_batch_size_chunks(processor):
+    path = write_csv(processor, 25)
+    sizes = [len(df) for df in processor.iter_file_batches(path)]
+    assert sizes == [10, 10, 5]
+
+
+def test_chunks_are_appended_to_one_processed_file(processor):
+    path = write_csv(processor, 25)
+    results = processor.process_files([path])
+    assert results == {path: (25, 25)}
+    outputs = os.listdir(processor.output_dir)
+    assert len(outputs) == 1
+    saved = pd.read_csv(os.path.join(processor.output_dir, outputs[0]))
+    assert saved["title"].tolist() == make_rows(25)["title"].tolist()
+    assert not saved["content"].str.contains("<p>").any()
+    assert not os.path.exists(path)
+
+
+def test_backfill_sink_receives_every_chunk_without_writing_files(processor):
+    path = write_csv(processor, 25)
+    batches = []
+    results = processor.process_files([path], sink=batches.append, archive=False)
+    assert results == {path: (25, 25)}
+    assert [len(df) for df in batches] == [10, 10, 5]
+    assert os.listdir(processor.output_dir) == []
+    assert os.path.exists(path)
+
+
+def test_transaction_is_opened_only_after_the_file_is_cleaned(processor):
+    path = write_csv(processor, 25)
+    events = []
+    clean = processor.clean_news_data
+
+    def logged_clean(df):
+        events.append("clean")
+        return clean(df)
+
+    @contextmanager
+    def transaction():
+        events.append("begin")
+        try:
+            yield
+        except Exception:
+            events.append("rollback")
+            raise
+        events.append("commit")
+
+    processor.clean_news_data = logged_clean
+    results = processor.process_files([path], sink=lambda df: events.append("sink"), sink_transaction=transaction)
+    assert results == {path: (25, 25)}
+    assert events == ["clean"] * 3 + ["begin"] + ["sink"] * 3 + ["commit"]
+
+
+def test_failed_import_rolls_back_and_keeps_the_raw_file(processor):
+    path = write_csv(processor, 25)
+    events = []
+
+    @contextmanager
+    def transaction():
+        try:
+            yield
+        except Exception:
+            events.append("rollback")
+            raise
+
+    def sink(df):
+        if events.count("sink") == 1:
+            raise RuntimeError("disk full")
+        events.append("sink")
+
+    assert processor.process_files([path], sink=sink, sink_transaction=transaction) == {}
+    assert events == ["sink", "rollback"]
+    assert processor.failed_files == [path]
+    assert os.path.exists(path)
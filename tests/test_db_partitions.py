@@ -0,0 +1,94 @@
+import gzip
+import json
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from data_integrator import NewsDataIntegrator
+from db_partitions import MonthlyPartitions, shift_month
+
+NOW = datetime(2024, 6, 1)
+
+
+@pytest.fixture
+def integrator(tmp_path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({
+        "data_paths": {"output_dir": str(tmp_path / "processed")},
+        "integration": {"target_db_file": str(tmp_path / "news.db"), "table_name": "news_articles"},
+        "retention": {"enabled": True, "hot_months": 2, "partition_dir": str(tmp_path / "partitions"),
+                      "compress_after_months": 3, "vacuum": False},
+    }), encoding="utf-8")
+    integrator = NewsDataIntegrator(str(config_file))
+    yield integrator
+    integrator.close()
+
+
+def import_month(integrator, month, count, first=0):
+    return integrator.import_dataframe(pd.DataFrame({
+        "title": [f"{month} 新闻 {i}" for i in range(first, first + count)],
+        "content": [f"{month} 的新闻正文 {i}" for i in range(first, first + count)],
+        "publish_time": pd.to_datetime([f"{month}-15 09:00:00"] * count),
+    }))
+
+
+def main_months(integrator):
+    rows = integrator.db.connection().execute(
+        "SELECT substr(publish_time, 1, 7), COUNT(*) FROM news_articles GROUP BY 1 ORDER BY 1"
+    ).fetchall()
+    return dict(rows)
+
+
+def partition_rows(partition, tmp_path):
+    path = partition["file"]
+    if partition["compressed"]:
+        path = str(tmp_path / "unpacked.db")
+        with gzip.open(partition["file"], "rb") as src, open(path, "wb") as dst:
+            dst.write(src.read())
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM news_articles").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_shift_month():
+    assert shift_month("2024-01", -1) == "2023-12"
+    assert shift_month("2024-12", 1) == "2025-01"
+    assert shift_month("2024-06", -25) == "2022-05"
+
+
+def test_cold_months_are_moved_and_old_partitions_compressed(integrator, tmp_path):
+    import_month(integrator, "2024-01", 3)
+    import_month(integrator, "2024-04", 2)
+    import_month(integrator, "2024-05", 4)
+    partitions = integrator.partitions
+
+    assert partitions.cutoff_month(NOW) == "2024-05"
+    assert partitions.cold_months(NOW) == ["2024-01", "2024-04"]
+    assert partitions.run(NOW) == (5, ["2024-01", "2024-04"], 1)
+    assert main_months(integrator) == {"2024-05": 4}
+
+    listed = partitions.list_partitions()
+    assert [(p["month"], p["compressed"]) for p in listed] == [("2024-01", True), ("2024-04", False)]
+    assert [partition_rows(p, tmp_path) for p in listed] == [3, 2]
+
+
+def test_new_rows_for_a_compressed_month_are_merged(integrator, tmp_path):
+    import_month(integrator, "2024-01", 3)
+    integrator.partitions.run(NOW)
+
+    # 移出之后又采集到该月的新新闻，以及已移出的旧新闻
+    assert import_month(integrator, "2024-01", 4) == 1
+    assert integrator.partitions.run(NOW) == (1, ["2024-01"], 1)
+    listed = integrator.partitions.list_partitions()
+    assert [(p["month"], p["compressed"]) for p in listed] == [("2024-01", True)]
+    assert partition_rows(listed[0], tmp_path) == 4
+    assert main_months(integrator) == {}
+
+
+def test_hot_months_must_be_positive(integrator):
+    with pytest.raises(ValueError):
+        MonthlyPartitions(integrator.db, "news_articles", hot_months=0)
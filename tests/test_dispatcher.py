@@ -0,0 +1,55 @@
+import threading
+import time
+
+from dispatcher import TaskDispatcher
+
+
+def test_queued_tasks_run_and_keys_are_coalesced():
+    dispatcher = TaskDispatcher(workers=1, max_queue_size=10)
+    gate = threading.Event()
+    done = []
+    dispatcher.start()
+    dispatcher.submit(gate.wait)
+    for i in range(3):
+        assert dispatcher.submit(done.append, i, key="same")
+    gate.set()
+    dispatcher.stop()
+    assert done == [0]
+    assert dispatcher.metrics()["coalesced"] == 2
+
+
+def test_full_queue_rejects_without_blocking():
+    dispatcher = TaskDispatcher(workers=1, max_queue_size=1)
+    gate = threading.Event()
+    dispatcher.start()
+    dispatcher.submit(gate.wait)
+    time.sleep(0.1)
+    assert dispatcher.submit(time.sleep, 0)
+    assert not dispatcher.submit(time.sleep, 0, block=False)
+    assert dispatcher.metrics()["rejected"] == 1
+    gate.set()
+    dispatcher.stop()
+
+
+def test_stop_does_not_block_on_a_full_queue():
+    dispatcher = TaskDispatcher(workers=2, max_queue_size=2)
+    gate = threading.Event()
+    done = []
+    dispatcher.start()
+    dispatcher.submit(gate.wait)
+    dispatcher.submit(gate.wait)
+    time.sleep(0.1)
+    dispatcher.submit(done.append, 1)
+    dispatcher.submit(done.append, 2)
+
+    start = time.perf_counter()
+    dispatcher.stop(wait=False)
+    assert time.perf_counter() - start < 0.5
+    assert not dispatcher.submit(done.append, 3, block=False)
+
+    # 已排队的任务在停止后仍会执行完
+    gate.set()
+    deadline = time.time() + 5
+    while len(done) < 2 and time.time() < deadline:
+        time.sleep(0.05)
+    assert sorted(done) == [1, 2]
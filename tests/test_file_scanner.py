@@ -0,0 +1,72 @@
+import os
+import time
+
+from file_scanner import RawFileScanner
+
+
+def make_old(*paths, age=100):
+    # 修改时间早于 RACY_SECONDS，扫描器才会信任目录缓存
+    stamp = time.time() - age
+    for path in paths:
+        os.utime(path, (stamp, stamp))
+
+
+def make_tree(tmp_path):
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (tmp_path / "a.json").write_text("[]", encoding="utf-8")
+    (sub / "b.csv").write_text("title\n", encoding="utf-8")
+    (sub / "ignored.txt").write_text("x", encoding="utf-8")
+    make_old(tmp_path / "a.json", sub / "b.csv", sub, tmp_path)
+    return sub
+
+
+def test_scan_lists_supported_files_recursively(tmp_path):
+    make_tree(tmp_path)
+    names = [item["name"] for item in RawFileScanner(str(tmp_path)).scan()]
+    assert names == ["a.json", "b.csv"]
+
+
+def test_unchanged_directories_are_not_listed_again(tmp_path, monkeypatch):
+    sub = make_tree(tmp_path)
+    scanner = RawFileScanner(str(tmp_path))
+    scanner.scan()
+
+    listed = []
+    original = scanner._list_dir
+    monkeypatch.setattr(scanner, "_list_dir", lambda path, *args: listed.append(path) or original(path, *args))
+    assert len(scanner.scan()) == 2
+    assert listed == []
+
+    # 新文件改变了子目录的修改时间，只有该目录被重新列举
+    (sub / "c.jsonl").write_text("{}\n", encoding="utf-8")
+    assert [item["name"] for item in scanner.scan()] == ["a.json", "b.csv", "c.jsonl"]
+    assert listed == [str(sub)]
+
+
+def test_in_place_rewrite_is_detected_without_listing(tmp_path):
+    make_tree(tmp_path)
+    scanner = RawFileScanner(str(tmp_path))
+    before = {item["name"]: item["size"] for item in scanner.scan()}
+
+    dir_stat = os.stat(tmp_path)
+    with open(tmp_path / "a.json", "a", encoding="utf-8") as f:
+        f.write("   ")
+    os.utime(tmp_path, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+
+    after = {item["name"]: item["size"] for item in scanner.scan()}
+    assert after["a.json"] == before["a.json"] + 3
+
+
+def test_index_is_persisted(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    make_tree(raw)
+    index_file = str(tmp_path / "index.json")
+    scanner = RawFileScanner(str(raw), index_file=index_file)
+    scanner.scan()
+    scanner.save_index()
+
+    reloaded = RawFileScanner(str(raw), index_file=index_file)
+    assert str(raw) in reloaded._dirs
+    assert len(reloaded.scan()) == 2
@@ -0,0 +1,53 @@
+import io
+
+import pandas as pd
+import pytest
+
+from ingest_schema import IngestSchema
+
+COLUMNS = {"title": "str", "content": "str", "source": "category", "views": "int"}
+
+
+@pytest.fixture
+def schema():
+    return IngestSchema(COLUMNS, required_fields=["title", "content"])
+
+
+def test_json_records_missing_required_fields_are_dropped(schema):
+    records = [
+        {"title": "标题一", "content": "正文", "source": "新华社", "views": 3, "extra": "x"},
+        {"title": "  ", "content": "正文"},
+        {"title": "标题三"},
+        "not a record",
+        {"content": "正文", "title": "标题五", "source": None},
+    ]
+    df, rejected = schema.records_to_frame(records)
+    assert rejected == 3
+    assert list(df.columns) == list(COLUMNS)
+    assert df["title"].tolist() == ["标题一", "标题五"]
+    assert str(df["source"].dtype) == "category"
+    assert str(df["views"].dtype) == "Int64"
+    assert df["views"].isna().tolist() == [False, True]
+
+
+def test_csv_reads_only_declared_columns_and_fills_missing_ones(schema):
+    text = "title,content,extra\n标题一,正文,x\n,正文,y\n标题三, ,z\n"
+    chunk = pd.read_csv(io.StringIO(text), **schema.csv_options())
+    df, rejected = schema.apply(chunk)
+    assert rejected == 2
+    assert list(df.columns) == list(COLUMNS)
+    assert df["title"].tolist() == ["标题一"]
+    assert df["source"].isna().all()
+
+
+def test_without_columns_everything_is_kept():
+    schema = IngestSchema()
+    assert schema.csv_options() == {}
+    df, rejected = schema.records_to_frame([{"a": 1, "b": "x"}, {"a": 2}])
+    assert rejected == 0
+    assert list(df.columns) == ["a", "b"]
+
+
+def test_unknown_type_is_rejected():
+    with pytest.raises(ValueError):
+        IngestSchema({"title": "text"})
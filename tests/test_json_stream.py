@@ -0,0 +1,73 @@
+import io
+import json
+import sqlite3
+
+import pytest
+
+from json_stream import (append_records, encode_record, iter_cursor_records, json_object_sql, write_lines)
+
+RECORDS = [{"id": i, "title": f"新闻 {i}", "publish_time": "2024-03-05 10:00:00"} for i in range(5)]
+
+
+def written(records, fmt, batch_size=2):
+    f = io.StringIO()
+    count = write_lines(f, (encode_record(record) for record in records), fmt, batch_size)
+    return count, f.getvalue()
+
+
+def test_write_lines_json_and_jsonl():
+    count, text = written(RECORDS, "json")
+    assert count == 5
+    assert json.loads(text) == RECORDS
+    assert text.count("\n") == 6
+
+    count, text = written(RECORDS, "jsonl")
+    assert count == 5
+    assert [json.loads(line) for line in text.splitlines()] == RECORDS
+
+    assert written([], "json") == (0, "[]")
+    assert written([], "jsonl") == (0, "")
+    with pytest.raises(ValueError):
+        written(RECORDS, "csv")
+
+
+@pytest.mark.parametrize("name", ["news.json", "news.jsonl"])
+def test_append_records_to_an_existing_export(tmp_path, name):
+    path = tmp_path / name
+    path.write_text(written(RECORDS[:3], "jsonl" if name.endswith(".jsonl") else "json")[1], encoding="utf-8")
+    assert append_records(str(path), RECORDS[3:]) > 0
+    text = path.read_text(encoding="utf-8")
+    if name.endswith(".jsonl"):
+        assert [json.loads(line) for line in text.splitlines()] == RECORDS
+    else:
+        assert json.loads(text) == RECORDS
+
+
+def test_append_records_to_a_json_dump_with_trailing_whitespace(tmp_path):
+    path = tmp_path / "news.json"
+    path.write_text(json.dumps(RECORDS[:1], ensure_ascii=False, indent=4) + "\n\n", encoding="utf-8")
+    append_records(str(path), RECORDS[1:2])
+    assert json.loads(path.read_text(encoding="utf-8")) == RECORDS[:2]
+
+
+@pytest.mark.parametrize("text", ["[]", '{"id": 1}', ""])
+def test_append_records_rejects_files_it_cannot_extend(tmp_path, text):
+    path = tmp_path / "news.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(ValueError):
+        append_records(str(path), RECORDS[:1])
+    assert path.read_text(encoding="utf-8") == text
+
+
+def test_sql_and_python_encoding_agree():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE news (id INTEGER, title TEXT, publish_time TEXT, imported_at TEXT)")
+    conn.execute("INSERT INTO news VALUES (1, '标题 \"引号\"', '2024-03-05T10:00:00.123456', '2024-03-05 10:00:00')")
+    conn.execute("INSERT INTO news VALUES (2, NULL, '2024年3月5日', NULL)")
+    columns = ["id", "title", "publish_time", "imported_at"]
+
+    in_sql = [json.loads(row[0]) for row in conn.execute(f"SELECT {json_object_sql(columns)} FROM news ORDER BY id")]
+    in_python = list(iter_cursor_records(conn.execute("SELECT * FROM news ORDER BY id"), batch_size=1))
+    assert in_sql == in_python
+    assert in_python[0]["publish_time"] == "2024-03-05 10:00:00"
+    assert in_python[1]["publish_time"] == "2024年3月5日"
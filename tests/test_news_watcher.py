@@ -0,0 +1,55 @@
+import json
+import os
+import time
+
+import pytest
+
+from news_watcher import NewsWatcher
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    config = {
+        "data_paths": {
+            "input_dir": str(tmp_path / "raw"),
+            "output_dir": str(tmp_path / "processed"),
+            "archive_dir": str(tmp_path / "archive"),
+        },
+        "integration": {"target_db_file": str(tmp_path / "news.db"), "table_name": "news_articles"},
+        "output_json_file": str(tmp_path / "news_data.json"),
+        "file_stability": {"stable_seconds": 0},
+        "metrics": {"json_file": str(tmp_path / "metrics.jsonl")},
+        "watcher": {
+            "processed_records_file": str(tmp_path / "state" / "processed_records.json"),
+            "record_store": {"backend": "sqlite", "path": str(tmp_path / "state" / "records.db")},
+        },
+    }
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(config), encoding="utf-8")
+    watcher = NewsWatcher(str(config_file))
+    yield watcher
+    watcher.pipeline.integrator.close()
+
+
+def write_raw(path, text):
+    path.write_text(text, encoding="utf-8")
+    stamp = time.time() - 100
+    os.utime(path, (stamp, stamp))
+
+
+def test_failed_file_is_retried_by_polling(watcher, tmp_path):
+    raw_file = tmp_path / "raw" / "news.json"
+    write_raw(raw_file, '[{"title": "未写完的文件')
+    watcher.ingest_raw_data()
+    assert raw_file.exists()
+    assert str(raw_file) not in watcher.processed_raw_files
+
+    # 文件没有变化，下一次轮询仍然把它当作需要处理的文件
+    assert watcher.has_new_raw_files() == [str(raw_file)]
+    assert watcher.has_new_raw_files() == []
+
+    records = [{"title": "重试后的新闻标题", "content": "文件修复之后由下一次轮询重新处理的新闻正文内容", "source": "s"}]
+    write_raw(raw_file, json.dumps(records, ensure_ascii=False))
+    watcher.ingest_raw_data()
+    assert not raw_file.exists()
+    assert [record["title"] for record in watcher.pipeline.integrator.fetch_records_after(0)] == ["重试后的新闻标题"]
@@ -0,0 +1,60 @@
+import json
+import time
+from contextlib import contextmanager
+
+from pipeline_metrics import CycleMetrics, PipelineMetrics, load_cycles
+
+
+def record_cycles(metrics, count):
+    for _ in range(count):
+        cycle = metrics.start_cycle()
+        with cycle.stage("clean") as stats:
+            stats["rows_in"] += 1
+        metrics.record(cycle)
+
+
+def test_each_cycle_appends_one_line_and_old_cycles_are_trimmed(tmp_path):
+    json_file = tmp_path / "metrics.jsonl"
+    metrics = PipelineMetrics(json_file=str(json_file), max_cycles=3)
+    record_cycles(metrics, 6)
+    assert len(json_file.read_text(encoding="utf-8").splitlines()) == 6
+
+    record_cycles(metrics, 1)
+    assert len(json_file.read_text(encoding="utf-8").splitlines()) == 3
+
+    # 新的记录器从已有文件的行数继续计数
+    metrics = PipelineMetrics(json_file=str(json_file), max_cycles=3)
+    record_cycles(metrics, 3)
+    assert len(metrics.load()) == 6
+    record_cycles(metrics, 1)
+    assert len(metrics.load()) == 3
+
+
+def test_partial_lines_and_legacy_array_files_are_readable(tmp_path):
+    entry = CycleMetrics().to_dict()
+    json_file = tmp_path / "metrics.jsonl"
+    json_file.write_text(json.dumps(entry) + "\n" + '{"started_at": "2024', encoding="utf-8")
+    assert load_cycles(str(json_file)) == [entry]
+
+    legacy = tmp_path / "metrics.json"
+    legacy.write_text(json.dumps([entry, entry], indent=2), encoding="utf-8")
+    assert load_cycles(str(legacy)) == [entry, entry]
+
+
+def test_transaction_commit_is_timed_under_import():
+    cycle = CycleMetrics()
+
+    @contextmanager
+    def transaction():
+        yield
+        time.sleep(0.05)  # 提交
+
+    sink = cycle.timed_sink("import", lambda df: len(df))
+    with cycle.stage("clean"):
+        with cycle.timed_context("import", transaction)():
+            sink([1, 2, 3])
+
+    stages = cycle.to_dict()["stages"]
+    assert stages["import"]["seconds"] >= 0.05
+    assert stages["clean"]["seconds"] < 0.05
+    assert stages["import"]["rows_in"] == 3
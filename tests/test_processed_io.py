@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from processed_io import ProcessedFileWriter, iter_processed_chunks, pq, resolve_format
+
+FORMATS = [
+    "csv",
+    pytest.param("parquet", marks=pytest.mark.skipif(pq is None, reason="pyarrow 未安装")),
+]
+
+
+def batch(start, count, **extra):
+    df = pd.DataFrame({
+        "title": [f"标题{i}" for i in range(start, start + count)],
+        "source": pd.Categorical(["新华社"] * count),
+        "publish_time": pd.to_datetime(["2024-03-05 12:30"] * count),
+        "views": np.arange(start, start + count)
+    })
+    for column, value in extra.items():
+        df[column] = value
+    return df
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_batches_are_appended_and_read_back_in_chunks(tmp_path, fmt):
+    writer = ProcessedFileWriter(str(tmp_path / f"news_processed.{fmt}"))
+    writer.write(batch(0, 4))
+    writer.write(batch(4, 0))
+    writer.write(batch(4, 3, extra="dropped"))
+    writer.close()
+    assert writer.rows == 7
+
+    chunks = list(iter_processed_chunks(writer.path, 3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    df = pd.concat(chunks, ignore_index=True)
+    assert list(df.columns) == ["title", "source", "publish_time", "views"]
+    assert df["title"].tolist() == [f"标题{i}" for i in range(7)]
+    assert df["views"].tolist() == list(range(7))
+
+
+@pytest.mark.skipif(pq is None, reason="pyarrow 未安装")
+def test_parquet_keeps_column_types(tmp_path):
+    writer = ProcessedFileWriter(str(tmp_path / "news_processed.parquet"))
+    first = batch(0, 2)
+    first["author"] = None
+    writer.write(first)
+    writer.write(batch(2, 2, author="张三"))
+    writer.close()
+
+    df = next(iter_processed_chunks(writer.path, 10))
+    assert pd.api.types.is_datetime64_any_dtype(df["publish_time"])
+    # 第一批全为空的列按字符串写入，后续批次的值不会因类型不一致而写入失败
+    assert df["author"].isna().tolist() == [True, True, False, False]
+    assert df["author"].iloc[2] == "张三"
+
+
+def test_discard_removes_the_partial_file(tmp_path):
+    writer = ProcessedFileWriter(str(tmp_path / "news_processed.csv"))
+    writer.write(batch(0, 2))
+    writer.discard()
+    assert not (tmp_path / "news_processed.csv").exists()
+
+
+def test_resolve_format():
+    assert resolve_format("csv") == "csv"
+    assert resolve_format("auto") == ("parquet" if pq is not None else "csv")
+    with pytest.raises(ValueError):
+        resolve_format("feather")
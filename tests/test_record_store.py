@@ -0,0 +1,70 @@
+import json
+import time
+
+import pytest
+
+from record_store import AppendLogRecordStore, create_record_store, migrate_json_records
+
+
+@pytest.fixture(params=["sqlite", "append_log"])
+def store_config(request, tmp_path):
+    suffix = ".db" if request.param == "sqlite" else ".log"
+    return {"backend": request.param, "path": str(tmp_path / f"records{suffix}")}
+
+
+def test_records_and_state_survive_reopen(store_config):
+    store = create_record_store(store_config)
+    store.add_many([("a", "标题A", None), ("b", "标题B", None)])
+    store.add("c", "标题C")
+    store.set_state("last_news_id", 41)
+    store.set_state("last_news_id", 42)
+    store.close()
+
+    store = create_record_store(store_config)
+    assert len(store) == 3
+    assert "a" in store and "c" in store and "x" not in store
+    assert store.get_state("last_news_id") == 42
+    assert store.get_state("missing", 0) == 0
+    store.close()
+
+
+def test_evict_older_than(store_config):
+    store = create_record_store(store_config)
+    store.add_many([("old", "", time.time() - 10 * 86400), ("new", "", None)])
+    assert store.evict_older_than(5) == 1
+    assert "old" not in store and "new" in store
+    store.close()
+
+
+def test_migrate_json_records(store_config, tmp_path):
+    json_file = tmp_path / "processed_records.json"
+    json_file.write_text(json.dumps({
+        "h1": {"title": "旧记录", "processed_at": "2024-03-05 10:00:00"},
+        "h2": {"title": "时间格式错误", "processed_at": "yesterday"},
+    }, ensure_ascii=False), encoding="utf-8")
+
+    store = create_record_store(store_config, legacy_json_file=str(json_file))
+    assert "h1" in store and "h2" in store
+    assert not json_file.exists()
+    assert (tmp_path / "processed_records.json.migrated").exists()
+    # 已迁移的文件不会再次迁移
+    assert migrate_json_records(store, str(json_file)) == 0
+    store.close()
+
+
+def test_append_log_compacts_while_running(tmp_path):
+    log_file = tmp_path / "records.log"
+    store = AppendLogRecordStore(str(log_file), min_compact_lines=100)
+    store.add_many([(f"r{i}", "", None) for i in range(50)])
+    # 监视器每个分析批次都会更新游标，每次追加一行
+    for last_id in range(1000):
+        store.set_state("last_news_id", last_id)
+
+    lines = log_file.read_text(encoding="utf-8").splitlines()
+    assert len(lines) <= 50 + 1 + 100 + 1
+    store.close()
+
+    reopened = AppendLogRecordStore(str(log_file))
+    assert len(reopened) == 50
+    assert reopened.get_state("last_news_id") == 999
+
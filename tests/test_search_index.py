@@ -0,0 +1,110 @@
+import json
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from data_integrator import NewsDataIntegrator
+from search_index import FullTextIndex, like_search, make_snippet
+
+ARTICLES = [
+    (1, "华为发布新款手机", "华为今天在深圳发布了新款手机，搭载自研芯片。", "2024-03-01 10:00:00"),
+    (2, "钙钛矿电池效率创新高", "研究团队报告钙钛矿太阳能电池的转换效率再创纪录。", "2024-03-02 10:00:00"),
+    (3, "量子计算进展", "多家公司公布量子计算路线图，华为也在其中。", "2024-03-03 10:00:00"),
+    (4, "股市收盘", "沪指小幅上涨，成交额放大。", "2024-03-04T10:00:00.500000"),
+]
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE news (id INTEGER PRIMARY KEY, title TEXT, content TEXT, publish_time TEXT, source TEXT, url TEXT)")
+    conn.executemany("INSERT INTO news (id, title, content, publish_time) VALUES (?, ?, ?, ?)", ARTICLES[:2])
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def index(conn):
+    index = FullTextIndex("news")
+    with conn:
+        index.create(conn)
+    # 建立索引之后插入的记录由触发器同步
+    with conn:
+        conn.executemany("INSERT INTO news (id, title, content, publish_time) VALUES (?, ?, ?, ?)", ARTICLES[2:])
+    return index
+
+
+def ids(results):
+    return [result["id"] for result in results]
+
+
+def test_title_matches_rank_first(conn, index):
+    results = index.search(conn, "华为")
+    # 两个字的词 trigram 无法使用索引，交给 LIKE 搜索
+    assert results is None
+    results = index.search(conn, "钙钛矿")
+    assert ids(results) == [2]
+    assert "【钙钛矿】" in results[0]["snippet"]
+    assert results[0]["score"] > 0
+
+    assert ids(index.search(conn, "量子计算 华为")) == [3]
+    assert index.search(conn, "不存在的词") == []
+
+
+def test_index_follows_updates_and_deletes(conn, index):
+    with conn:
+        conn.execute("UPDATE news SET title = '量子计算新突破' WHERE id = 2")
+        conn.execute("DELETE FROM news WHERE id = 3")
+    assert ids(index.search(conn, "量子计算")) == [2]
+    assert index.search(conn, "路线图") == []
+
+
+def test_like_search_matches_without_an_index(conn, index):
+    results = like_search(conn, "news", "华为", limit=10)
+    assert ids(results) == [3, 1]
+    assert results[0]["score"] is None
+    assert "【华为】" in results[0]["snippet"]
+    assert ids(like_search(conn, "news", "100%", limit=10)) == []
+    assert like_search(conn, "news", "  ", limit=10) == []
+
+
+def test_publish_time_is_formatted_like_the_export(conn, index):
+    assert index.search(conn, "成交额")[0]["publish_time"] == "2024-03-04 10:00:00"
+
+
+def test_make_snippet_marks_every_term():
+    snippet = make_snippet("标题", "前面的文字" * 10 + "华为和量子计算" + "后面的文字" * 10, ["华为", "量子计算"], width=20)
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "【华为】和【量子计算】" in snippet
+
+
+def test_drop_removes_triggers(conn, index):
+    with conn:
+        index.drop(conn)
+        conn.execute("INSERT INTO news (id, title, content) VALUES (5, 'x', 'y')")
+    assert not index.exists(conn)
+
+
+def test_integrator_search_uses_the_index_and_falls_back_to_like(tmp_path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({
+        "data_paths": {"output_dir": str(tmp_path / "processed")},
+        "integration": {"target_db_file": str(tmp_path / "news.db"), "table_name": "news_articles",
+                        "fts": {"enabled": True, "tokenizer": "trigram"}},
+    }), encoding="utf-8")
+    integrator = NewsDataIntegrator(str(config_file))
+    try:
+        integrator.import_dataframe(pd.DataFrame({
+            "title": [title for _, title, _, _ in ARTICLES],
+            "content": [content for _, _, content, _ in ARTICLES],
+            "publish_time": pd.to_datetime(["2024-03-01", "2024-03-02", "2024-03-03", "2024-03-04"]),
+        }))
+        results = integrator.search("钙钛矿")
+        assert [result["title"] for result in results] == ["钙钛矿电池效率创新高"]
+        assert results[0]["score"] is not None
+        results = integrator.search("华为")
+        assert [result["title"] for result in results] == ["量子计算进展", "华为发布新款手机"]
+        assert results[0]["score"] is None
+    finally:
+        integrator.close()
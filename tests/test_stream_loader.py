@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from stream_loader import iter_json_records, iter_jsonl_records, iter_record_batches
+
+RECORDS = [{"id": i, "title": f"新闻 {i}", "score": i * 1.5} for i in range(50)]
+
+
+def write_json(tmp_path, text, name="news.json"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_json_array_is_streamed_across_chunk_boundaries(tmp_path, chunk_size):
+    path = write_json(tmp_path, "﻿ " + json.dumps(RECORDS, ensure_ascii=False, indent=1))
+    assert list(iter_json_records(path, chunk_size=chunk_size)) == RECORDS
+
+
+def test_top_level_object_and_empty_array(tmp_path):
+    assert list(iter_json_records(write_json(tmp_path, '{"id": 1}'), chunk_size=4)) == [{"id": 1}]
+    assert list(iter_json_records(write_json(tmp_path, " [ ] "), chunk_size=4)) == []
+
+
+@pytest.mark.parametrize("tail", ['{"id": 2', '{"id": 2}', '{"id": 2},'])
+def test_truncated_tail_raises_after_complete_records(tmp_path, tail):
+    path = write_json(tmp_path, '[{"id": 0}, {"id": 1}, ' + tail)
+    records = iter_json_records(path, chunk_size=8)
+    assert next(records) == {"id": 0}
+    assert next(records) == {"id": 1}
+    if tail.startswith('{"id": 2}'):
+        assert next(records) == {"id": 2}
+    with pytest.raises(json.JSONDecodeError):
+        next(records)
+
+
+def test_jsonl_skips_blank_and_broken_lines(tmp_path):
+    lines = [json.dumps(RECORDS[0]), "", "{broken", json.dumps(RECORDS[1])]
+    path = write_json(tmp_path, "\n".join(lines) + "\n", name="news.jsonl")
+    assert list(iter_jsonl_records(path)) == RECORDS[:2]
+
+
+@pytest.mark.parametrize("name", ["news.json", "news.jsonl"])
+def test_record_batches_have_fixed_size(tmp_path, name):
+    if name.endswith(".jsonl"):
+        text = "\n".join(json.dumps(record) for record in RECORDS)
+    else:
+        text = json.dumps(RECORDS)
+    batches = list(iter_record_batches(write_json(tmp_path, text, name=name), 20))
+    assert [len(batch) for batch in batches] == [20, 20, 10]
+    assert [record for batch in batches for record in batch] == RECORDS
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from time_parser import PublishTimeParser
+
+
+def parse(values, sources=None):
+    return PublishTimeParser().parse(pd.Series(values, dtype=object), sources)
+
+
+def test_epoch_seconds_and_millis_are_local_time():
+    result, failed = parse(['1709600000', 1709600000, '1709600000000'])
+    assert failed == 0
+    assert (result == pd.Timestamp('2024-03-05 08:53:20')).all()
+
+
+def test_compact_digit_date_is_parsed_as_text():
+    # 20240305 小于秒级时间戳的下限，不能当作时间戳丢弃
+    result, failed = parse(['20240305', '2024-03-06 10:00:00'])
+    assert failed == 0
+    assert result.tolist() == [pd.Timestamp('2024-03-05'), pd.Timestamp('2024-03-06 10:00:00')]
+
+
+def test_mixed_formats_and_unparseable_values():
+    result, failed = parse(['2024年03月05日 10:30', '2024/03/05', 'not a time', '12345', None])
+    assert failed == 2
+    assert result[0] == pd.Timestamp('2024-03-05 10:30')
+    assert result[1] == pd.Timestamp('2024-03-05')
+    assert np.isnat(result[2:].to_numpy()).all()
+
+
+def test_compact_digit_datetimes_are_not_timestamps():
+    # 12位和14位的值落在毫秒时间戳的取值范围内，但只有13位的字符串才是毫秒时间戳
+    result, failed = parse(['202403051230', '20240305123000', '1709600000000'])
+    assert failed == 0
+    assert result.tolist() == [
+        pd.Timestamp('2024-03-05 12:30'), pd.Timestamp('2024-03-05 12:30:00'), pd.Timestamp('2024-03-05 08:53:20')
+    ]
+
+
+def test_learned_compact_format_does_not_match_other_lengths():
+    # 先学到 '%Y%m%d%H%M%S' 之后，12位的值不能被它按1位分钟、1位秒解析
+    parser = PublishTimeParser()
+    sources = pd.Series(['财经网'])
+    parser.parse(pd.Series(['20240305123000'], dtype=object), sources)
+    result, failed = parser.parse(pd.Series(['202403051230'], dtype=object), sources)
+    assert failed == 0
+    assert result[0] == pd.Timestamp('2024-03-05 12:30')
+
+
+def test_timestamps_beyond_datetime64_range_are_unparsed():
+    result, failed = parse([99999999999, '9999999999', 9e13])
+    assert failed == 3
+    assert np.isnat(result.to_numpy()).all()
@@ -0,0 +1,302 @@
+import re
+import html
+import logging
+from abc import ABC, abstractmethod
+
+import numpy as np
+from html.entities import html5 as html5_entities
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree as lxml_etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+logger = logging.getLogger("TextCleaner")
+
+# 这些元素中的内容不是正文（与 BeautifulSoup 的 get_text() 一致）
+NON_TEXT_ELEMENTS = ('script', 'style', 'template', 'rp', 'rt')
+
+# 可选的HTML去标签后端，auto 表示安装了lxml时使用lxml，否则使用 fast
+HTML_BACKENDS = ('auto', 'fast', 'lxml', 'bs4')
+
+
+class HTMLStripper(ABC):
+    """HTML去标签后端的接口：输入HTML片段，返回其中的正文文本"""
+
+    name = None
+
+    @abstractmethod
+    def strip(self, text):
+        raise NotImplementedError
+
+
+# 没有结束标签的空元素，不会包含文本
+VOID_ELEMENTS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem',
+    'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame',
+    'image', 'isindex', 'nextid', 'spacer'
+))
+
+
+class _TextCollector(HTMLParser):
+    """
+    在分词过程中收集正文文本片段
+
+    只维护打开的标签名栈，用于判断当前文本是否位于非正文元素中；
+    结束标签会关闭栈中与之匹配的元素及其后打开的元素，没有匹配的结束标签被忽略。
+    实体的处理方式与 BeautifulSoup 相同（未知实体保留为 '&name'）。
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.parts = []
+        self.open_tags = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        self.open_tags.append(tag)
+        if tag in NON_TEXT_ELEMENTS:
+            self.skip_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        if tag not in self.open_tags:
+            return
+        while True:
+            closed = self.open_tags.pop()
+            if closed in NON_TEXT_ELEMENTS:
+                self.skip_depth -= 1
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+    def handle_entityref(self, name):
+        self.handle_data(html5_entities.get(name + ';', '&' + name))
+
+    def handle_charref(self, name):
+        self.handle_data(html.unescape(f'&#{name};'))
+
+    def unknown_decl(self, data):
+        # CDATA段的内容属于正文
+        if data.startswith('CDATA['):
+            self.handle_data(data[6:])
+
+
+class FastHTMLStripper(HTMLStripper):
+    """
+    基于标准库 html.parser 分词器的去标签后端
+
+    只在分词过程中收集文本片段，不构建文档树，也没有额外依赖。
+    """
+
+    name = 'fast'
+
+    def strip(self, text):
+        collector = _TextCollector()
+        collector.feed(text)
+        collector.close()
+        return ''.join(collector.parts)
+
+
+class LxmlHTMLStripper(HTMLStripper):
+    """基于lxml（libxml2）的去标签后端，需要安装lxml"""
+
+    name = 'lxml'
+
+    def __init__(self):
+        if lxml_html is None:
+            raise ImportError("lxml 未安装")
+
+    def strip(self, text):
+        root = lxml_html.fragment_fromstring(text, create_parent='div')
+        lxml_etree.strip_elements(root, *NON_TEXT_ELEMENTS, with_tail=False)
+        return root.text_content()
+
+
+class BeautifulSoupHTMLStripper(HTMLStripper):
+    """基于BeautifulSoup的去标签后端，构建完整的文档树，速度最慢但兼容性最好"""
+
+    name = 'bs4'
+
+    def strip(self, text):
+        return BeautifulSoup(text, 'html.parser').get_text()
+
+
+def create_html_stripper(backend='auto'):
+    """
+    根据名称创建HTML去标签后端
+
+    参数:
+    backend: auto、fast、lxml 或 bs4；指定 lxml 但未安装时退回 fast
+
+    返回:
+    HTMLStripper 实例
+    """
+    if backend not in HTML_BACKENDS:
+        raise ValueError(f"未知的HTML去标签后端: {backend}，可选值: {', '.join(HTML_BACKENDS)}")
+    if backend in ('auto', 'lxml'):
+        if lxml_html is not None:
+            return LxmlHTMLStripper()
+        if backend == 'lxml':
+            logger.warning("lxml 未安装，HTML去标签改用 fast 后端")
+        return FastHTMLStripper()
+    if backend == 'bs4':
+        return BeautifulSoupHTMLStripper()
+    return FastHTMLStripper()
+
+class TextCleaner:
+    """
+    新闻文本清理引擎
+
+    所有正则表达式在初始化时编译一次。每个替换步骤前先做字面量检查
+    （例如文本中没有 '{' 时不可能匹配CSS规则），不可能匹配的步骤直接跳过；
+    空白字符合并使用 str.split/join 而不是正则。
+
+    各步骤的顺序和语义与逐条调用 re.sub 的实现完全一致：前一步的删除可能让
+    后一步产生新的匹配，因此这些模式不能合并成一个交替模式。
+    """
+
+    # 清理规则的版本，修改规则后递增，使清理结果缓存中的旧结果失效
+    VERSION = 1
+
+    def __init__(self, html_backend='auto'):
+        """
+        初始化清理引擎
+
+        参数:
+        html_backend: HTML去标签后端，见 HTML_BACKENDS
+        """
+        self.html_stripper = create_html_stripper(html_backend)
+        self.fallback_stripper = BeautifulSoupHTMLStripper()
+        # 清理结果缓存按该标识区分不同规则版本和后端的结果
+        self.cache_namespace = f"text_cleaner:v{self.VERSION}:{self.html_stripper.name}"
+
+        # CSS样式定义：(必须出现的字面量, 模式)
+        self.css_patterns = [
+            ('ct_hqimg', re.compile(r'ct_hqimg\s*\{[^\}]*\}', re.DOTALL)),
+            ('.hqimg_wrapper', re.compile(r'\.hqimg_wrapper\s*\{[^\}]*\}', re.DOTALL)),
+            # 通用CSS规则。选择器字符连续出现时，只要从其中一个位置开始能匹配，
+            # 从这段字符的开头也一定能匹配到同一个 '{'，因此用后行断言跳过中间位置，
+            # 避免在长的字母数字串上逐个位置重试
+            ('{', re.compile(r'(?<![a-zA-Z0-9_\-\.])[a-zA-Z0-9_\-\.]+\s*\{[^\}]*\}', re.DOTALL)),
+        ]
+        self.style_tag_pattern = re.compile(r'<style[^>]*>.*?</style>', re.DOTALL)
+        self.tag_pattern = re.compile(r'<[^>]+>')
+        self.attr_pattern = re.compile(r'(class|id|style)=["\'][^"\']+["\']')
+        self.attr_literals = ('class=', 'id=', 'style=')
+        self.script_pattern = re.compile(r'<script[^>]*>.*?</script>', re.DOTALL)
+        self.url_pattern = re.compile(r'https?://\S+')
+        # 不使用 str.translate：它对含中文的文本逐字符查表，比这个正则慢约10倍
+        self.control_pattern = re.compile(r'[\x00-\x1F\x7F]')
+
+        # 常见的无意义文本：(必须出现的字面量, 模式)
+        self.boilerplate_patterns = [
+            (literal, re.compile(pattern)) for literal, pattern in [
+                ('图片来源：', r'图片来源：.*?网络'),
+                ('来源：', r'来源：.*?网'),
+                ('编辑：', r'编辑：.*?[\s,，。；;]'),
+                ('记者：', r'记者：.*?[\s,，。；;]'),
+                ('责任编辑：', r'责任编辑：.*?[\s,，。；;]'),
+                ('作者：', r'作者：.*?[\s,，。；;]'),
+                ('发布时间：', r'发布时间：.*?[\s,，。；;]'),
+                ('更新时间：', r'更新时间：.*?[\s,，。；;]'),
+            ]
+        ]
+
+    def strip_html(self, text):
+        """去除HTML标签，只保留文本；所选后端失败时依次退回BeautifulSoup和正则表达式"""
+        try:
+            return self.html_stripper.strip(text)
+        except Exception:
+            pass
+        if self.html_stripper.name != self.fallback_stripper.name:
+            try:
+                return self.fallback_stripper.strip(text)
+            except Exception:
+                pass
+        # 如果BeautifulSoup处理失败，使用正则表达式去除HTML标签
+        return self.tag_pattern.sub(' ', text)
+
+    def clean(self, text):
+        """
+        清理文本内容，去除HTML标签、CSS样式和多余的空白字符
+
+        参数:
+        text: 需要清理的文本
+
+        返回:
+        清理后的文本，非字符串原样返回
+        """
+        if not isinstance(text, str):
+            return text
+
+        # 先处理一些常见的CSS样式定义，完全移除它们
+        if '{' in text:
+            for literal, pattern in self.css_patterns:
+                if literal in text:
+                    text = pattern.sub('', text)
+        if '<style' in text:
+            text = self.style_tag_pattern.sub('', text)
+
+        # 解码HTML实体
+        text = html.unescape(text)
+
+        # 只有当文本看起来像HTML时才去除标签
+        if '<' in text and '>' in text:
+            text = self.strip_html(text)
+
+        # 去除常见的CSS类名和ID
+        if any(literal in text for literal in self.attr_literals):
+            text = self.attr_pattern.sub(' ', text)
+
+        # 去除JavaScript代码
+        if '<script' in text:
+            text = self.script_pattern.sub(' ', text)
+
+        # 去除可能的URL
+        if '://' in text:
+            text = self.url_pattern.sub('', text)
+
+        # 去除常见的无意义文本
+        if '：' in text:
+            for literal, pattern in self.boilerplate_patterns:
+                if literal in text:
+                    text = pattern.sub('', text)
+
+        # 合并空白字符（与 \s+ 替换为单个空格等价，首尾的空白最后会被修剪）
+        text = ' '.join(text.split())
+
+        # 去除特殊控制字符并修剪
+        return self.control_pattern.sub('', text).strip()
+
+    def clean_column(self, values, cache=None):
+        """
+        清理一列文本，一次遍历同时得到清理后的文本和长度
+
+        参数:
+        values: 文本值的可迭代对象（如 Series）
+        cache: CleanTextCache 实例，已缓存的文本不再重复清理；None表示不使用缓存
+
+        返回:
+        (清理后的值列表, 长度数组)，非字符串值的长度记为 -1
+        """
+        if cache is not None:
+            cleaned = cache.clean_many(values, self)
+        else:
+            clean = self.clean
+            cleaned = [clean(value) for value in values]
+        lengths = np.fromiter(
+            (len(value) if isinstance(value, str) else -1 for value in cleaned),
+            dtype=np.int64, count=len(cleaned)
+        )
+        return cleaned, lengths
@@ -0,0 +1,199 @@
+import re
+import logging
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("PublishTimeParser")
+
+# 默认尝试的时间格式；ISO8601 兼容 'T' 或空格分隔、带或不带秒和时区的ISO字符串
+DEFAULT_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y年%m月%d日 %H:%M',
+    'ISO8601',
+    '%Y年%m月%d日 %H:%M:%S',
+    '%Y年%m月%d日',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y/%m/%d %H:%M',
+    '%Y/%m/%d',
+    '%Y%m%d%H%M%S',
+    '%Y%m%d%H%M'
+]
+
+# 纪元时间戳的取值范围，用于区分秒和毫秒：下限约为1973年，上限留出时区换算的余量，
+# 保证转换为本地时间后仍在 datetime64[ns] 能表示的范围内（2262年之前）
+_EPOCH_LIMIT = (pd.Timestamp.max - pd.Timedelta(days=1)).value
+_EPOCH_SECONDS_RANGE = (1e8, _EPOCH_LIMIT // 10 ** 9)
+_EPOCH_MILLIS_RANGE = (1e11, _EPOCH_LIMIT // 10 ** 6)
+
+# 纯数字字符串只有这些长度时才当作时间戳，其余（如 20240305、202403051230）按日期格式解析
+_EPOCH_DIGITS = {'s': 10, 'ms': 13}
+
+# 紧凑格式中各指令的位数。strptime 允许 %m、%H、%M 等只有1位，'202403051230' 也能按
+# '%Y%m%d%H%M%S' 解析成 12:03，因此只由这些指令组成的格式只匹配长度恰好相符的字符串
+_DIRECTIVE_WIDTHS = {'Y': 4, 'm': 2, 'd': 2, 'H': 2, 'M': 2, 'S': 2}
+_COMPACT_FORMAT = re.compile(r'(?:%[YmdHMS])+')
+
+# 带时区的ISO字符串结尾：Z 或 +08:00 / +0800
+_TZ_SUFFIX = r'(?:Z|[+-]\d{2}:?\d{2})$'
+
+_NAT = np.datetime64('NaT', 'ns')
+
+# 值的类别
+_OTHER, _TEXT, _NUMBER = 0, 1, 2
+
+
+def _kind(value):
+    if isinstance(value, str):
+        return _NUMBER if value.isdigit() else _TEXT
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+        return _NUMBER
+    return _OTHER
+
+
+class PublishTimeParser:
+    """
+    发布时间解析器
+
+    按格式分组向量化解析：每次用一个格式解析所有尚未解析的值（pd.to_datetime 指定
+    format，不走逐个元素推断格式的慢路径），成功的值不再参与后续格式的尝试。
+
+    每个来源（source）使用过的格式会被记住，下一批数据中该来源先尝试这些格式，
+    其余格式按全局命中次数排序。数字按取值范围识别为秒或毫秒级纪元时间戳，10位和13位的
+    纯数字字符串分别识别为秒和毫秒级时间戳，转换为 timezone 时区的本地时间；其他纯数字字符串
+    （如 20240305、20240305123000）按文本格式解析。
+    带时区的ISO字符串同样转换为本地时间。
+    无法解析的值为 NaT，并统计其比例。
+    """
+
+    def __init__(self, formats=None, timezone='Asia/Shanghai'):
+        """
+        初始化解析器
+
+        参数:
+        formats: 候选的时间格式（strftime格式或 'ISO8601'），None表示使用 DEFAULT_FORMATS
+        timezone: 纪元时间戳和带时区的时间转换到的本地时区
+        """
+        self.formats = list(formats or DEFAULT_FORMATS)
+        self.timezone = timezone
+        # 来源 -> 该来源最近成功使用的格式（最近的在前）
+        self._source_formats = {}
+        self._format_hits = Counter()
+        self.parsed = 0
+        self.unparsed = 0
+
+    def parse(self, values, sources=None):
+        """
+        解析一列发布时间
+
+        参数:
+        values: 发布时间的 Series
+        sources: 与 values 对齐的来源 Series，None表示不区分来源
+
+        返回:
+        (datetime64[ns] 的 Series, 无法解析的非空值数量)
+        """
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values, 0
+
+        raw = values.to_numpy(dtype=object)
+        result = np.full(len(raw), _NAT, dtype='datetime64[ns]')
+        present = ~pd.isna(raw)
+
+        kinds = np.fromiter((_kind(value) for value in raw), dtype=np.int8, count=len(raw))
+
+        # 1. 纪元时间戳（数字，或10位、13位的纯数字字符串）
+        number_positions = np.flatnonzero(present & (kinds == _NUMBER))
+        if len(number_positions):
+            numbers = raw[number_positions].astype(float)
+            # 数字的位数记为0，纯数字字符串记为字符串长度
+            digits = np.fromiter((len(value) if isinstance(value, str) else 0 for value in raw[number_positions]),
+                                 dtype=np.int64, count=len(number_positions))
+            epoch = np.zeros(len(number_positions), dtype=bool)
+            for unit, (low, high) in (('s', _EPOCH_SECONDS_RANGE), ('ms', _EPOCH_MILLIS_RANGE)):
+                mask = (numbers >= low) & (numbers < high) & ((digits == 0) | (digits == _EPOCH_DIGITS[unit]))
+                if mask.any():
+                    result[number_positions[mask]] = self._to_local(pd.to_datetime(numbers[mask], unit=unit, utc=True))
+                epoch |= mask
+            # 其余纯数字字符串（如紧凑日期 20240305、20240305123000）交给文本格式解析
+            kinds[number_positions[~epoch & (digits > 0)]] = _TEXT
+
+        # 2. 字符串按来源分组，依次尝试格式
+        text_positions = np.flatnonzero(present & (kinds == _TEXT))
+        if len(text_positions):
+            if sources is None:
+                groups = {None: text_positions}
+            else:
+                # 缺少来源的值共用空字符串这一组
+                source_values = pd.Series(sources.to_numpy(dtype=object)[text_positions]).fillna('')
+                groups = pd.Series(text_positions).groupby(source_values).indices
+                groups = {source: text_positions[index] for source, index in groups.items()}
+            for source, positions in groups.items():
+                self._parse_group(raw, result, source, positions)
+
+        failed = int((present & np.isnat(result)).sum())
+        total = int(present.sum())
+        self.parsed += total - failed
+        self.unparsed += failed
+        if failed:
+            examples = raw[present & np.isnat(result)][:3].tolist()
+            logger.warning(f"publish_time 有 {failed}/{total}（{failed / total:.1%}）个值无法解析，示例: {examples}")
+        return pd.Series(result, index=values.index, name=values.name), failed
+
+    def _candidate_formats(self, source):
+        learned = self._source_formats.get(source, [])
+        rest = sorted((fmt for fmt in self.formats if fmt not in learned),
+                      key=lambda fmt: -self._format_hits[fmt])
+        return learned + rest
+
+    def _parse_group(self, raw, result, source, positions):
+        used = []
+        for fmt in self._candidate_formats(source):
+            if not len(positions):
+                break
+            parsed = self._parse_format(pd.Series(raw[positions]), fmt)
+            ok = ~np.isnat(parsed)
+            if not ok.any():
+                continue
+            result[positions[ok]] = parsed[ok]
+            positions = positions[~ok]
+            used.append(fmt)
+            self._format_hits[fmt] += int(ok.sum())
+
+        if used:
+            learned = self._source_formats.get(source, [])
+            self._source_formats[source] = used + [fmt for fmt in learned if fmt not in used]
+
+    def _parse_format(self, texts, fmt):
+        if fmt != 'ISO8601':
+            width = _compact_width(fmt)
+            if width is not None:
+                parsed = np.full(len(texts), _NAT, dtype='datetime64[ns]')
+                fits = (texts.str.len() == width).to_numpy()
+                if fits.any():
+                    parsed[fits] = pd.to_datetime(texts[fits], format=fmt, errors='coerce').to_numpy(dtype='datetime64[ns]')
+                return parsed
+            parsed = pd.to_datetime(texts, format=fmt, errors='coerce')
+            return parsed.to_numpy(dtype='datetime64[ns]')
+
+        # 带时区和不带时区的ISO字符串混在一起时 pandas 会报错，分开解析
+        parsed = np.full(len(texts), _NAT, dtype='datetime64[ns]')
+        aware = texts.str.contains(_TZ_SUFFIX, regex=True, na=False).to_numpy()
+        if (~aware).any():
+            naive = pd.to_datetime(texts[~aware], format='ISO8601', errors='coerce')
+            parsed[~aware] = naive.to_numpy(dtype='datetime64[ns]')
+        if aware.any():
+            parsed[aware] = self._to_local(pd.to_datetime(texts[aware], format='ISO8601', errors='coerce', utc=True))
+        return parsed
+
+    def _to_local(self, times):
+        times = pd.DatetimeIndex(times).tz_convert(self.timezone).tz_localize(None)
+        return times.to_numpy(dtype='datetime64[ns]')
+
+
+def _compact_width(fmt):
+    """只由数字指令组成的紧凑格式（如 '%Y%m%d%H%M'）对应的字符串长度，其他格式返回None"""
+    if not _COMPACT_FORMAT.fullmatch(fmt):
+        return None
+    return sum(_DIRECTIVE_WIDTHS[directive] for directive in fmt[1::2])